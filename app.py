@@ -5,6 +5,9 @@ Portfolio & CV - FINALE VERSION
 
 import streamlit as st
 from datetime import datetime
+from services.admin import admin_requested, render_admin_section
+from services.refresh import start_refresher
+from services.warmup import start_warmup
 
 # =========================
 # Page Configuration
@@ -16,6 +19,10 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Caches der Analyse-Seiten im Hintergrund vorwärmen und Datenstand aktuell halten (einmal pro Prozess)
+start_warmup()
+start_refresher()
+
 # =========================
 # CSS
 # =========================
@@ -649,3 +656,9 @@ st.markdown("""
     <p>dariawag.aw@gmail.com</p>
 </div>
 """, unsafe_allow_html=True)
+
+# =========================
+# Admin (versteckt, nur mit ?admin=<Token> oder PORTFOLIO_ADMIN=1)
+# =========================
+if admin_requested():
+    render_admin_section()
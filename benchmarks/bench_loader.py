@@ -0,0 +1,165 @@
+"""
+Loader Benchmark
+================
+Misst load_production_data und die Datenaufbereitung der drei Pages
+(load_and_prepare_data / load_and_validate_data) auf synthetischen
+Datensätzen mit dem Schema der Original-CSV.
+
+Jede Messung läuft in einem eigenen Prozess, damit Peak-RSS und Caches
+nicht von vorherigen Messungen beeinflusst werden.
+
+Aufruf (aus dem Repository-Root):
+    python -m benchmarks.bench_loader --rows 10000 1000000 10000000 --output bench_loader.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Callable, Dict, List
+
+BASE_PATH = Path(__file__).resolve().parent.parent
+if str(BASE_PATH) not in sys.path:
+    sys.path.append(str(BASE_PATH))
+
+DATA_DIR = BASE_PATH / "benchmarks" / ".data"
+DEFAULT_ROWS = [10_000, 1_000_000, 10_000_000]
+STAGES = ["load_production_data", "oop.load_and_prepare_data",
+          "sql.load_and_validate_data", "kpi.load_and_prepare_data"]
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux liefert KiB, macOS Bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _stage_functions(path: str) -> Dict[str, Callable[[], object]]:
+    from services.data_loader import load_production_data
+    from services.data_prep import (
+        KPI_COLUMNS, OOP_COLUMNS, prepare_kpi_data, prepare_oop_data, prepare_sql_data
+    )
+
+    return {
+        "load_production_data": lambda: load_production_data(path),
+        "oop.load_and_prepare_data": lambda: prepare_oop_data(load_production_data(path, columns=OOP_COLUMNS)),
+        "sql.load_and_validate_data": lambda: prepare_sql_data(load_production_data(path)),
+        "kpi.load_and_prepare_data": lambda: prepare_kpi_data(load_production_data(path, columns=KPI_COLUMNS))
+    }
+
+
+def _run_stage(path: str, stage: str, repeat: int) -> Dict[str, object]:
+    """Läuft im frischen Worker-Prozess: kalter Lauf + warme Wiederholungen."""
+    from services.data_loader import clear_column_cache
+
+    func = _stage_functions(path)[stage]
+
+    clear_column_cache()
+    start = time.perf_counter()
+    result = func()
+    cold = time.perf_counter() - start
+
+    warm = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        warm.append(time.perf_counter() - start)
+
+    frame = getattr(result, "clean", result)
+    return {
+        "cold_s": round(cold, 4),
+        "warm_s": round(min(warm), 4) if warm else None,
+        "result_rows": len(frame),
+        "peak_rss_mb": round(_peak_rss_mb(), 1)
+    }
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_PATH,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def dataset_path(rows: int, seed: int = 0) -> Path:
+    """Erzeugt den synthetischen Datensatz einmalig und verwendet ihn danach wieder."""
+    from services.synthetic import write_synthetic_csv
+
+    path = DATA_DIR / f"synthetic_{rows}_seed{seed}.csv"
+    if not path.exists():
+        write_synthetic_csv(rows, path, seed=seed)
+    return path
+
+
+def run_benchmark(rows_list: List[int], stages: List[str], repeat: int = 3) -> Dict[str, object]:
+    """Führt alle Messungen aus und liefert ein JSON-serialisierbares Ergebnis."""
+    import numpy as np
+    import pandas as pd
+
+    results = []
+    for rows in rows_list:
+        start = time.perf_counter()
+        path = dataset_path(rows)
+        prepare_s = time.perf_counter() - start
+
+        for stage in stages:
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+                measurement = pool.submit(_run_stage, str(path), stage, repeat).result()
+            results.append({
+                "rows": rows,
+                "stage": stage,
+                "file_mb": round(path.stat().st_size / 1e6, 1),
+                **measurement
+            })
+            print(f"{rows:>11,} rows | {stage:<28} | cold {measurement['cold_s']:>8.3f}s "
+                  f"| warm {measurement['warm_s'] or 0:>8.3f}s | {measurement['peak_rss_mb']:>8.1f} MB",
+                  file=sys.stderr)
+
+        if prepare_s > 1:
+            print(f"(Datensatz {rows:,} Zeilen in {prepare_s:.1f}s erzeugt)", file=sys.stderr)
+
+    return {
+        "benchmark": "loader",
+        "revision": _git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count()
+        },
+        "results": results
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark für Loader und Datenaufbereitung")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS)
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--repeat", type=int, default=3, help="Anzahl warmer Wiederholungen")
+    parser.add_argument("--output", type=Path, help="JSON-Datei (Standard: stdout)")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.rows, args.stages, args.repeat)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Page Render Benchmark
+=====================
+Rendert app.py und die drei Analyse-Seiten headless über Streamlits
+AppTest und misst:
+
+- cold:  erster Lauf mit leeren Caches
+- warm:  erneuter Lauf ohne Änderung (Median)
+- Interaktionen: Widget-Änderungen wie Jahr, Linie, Schicht oder Zeitraum,
+  auf der SQL-Seite Query 3, Kostenzuordnung, OLAP und Sketches
+
+Die Seiten lesen einen synthetischen Datensatz (PORTFOLIO_DATA_PATH).
+Überschreitet eine Messung ihr Latenzbudget, endet das Skript mit
+Exit-Code 1 – geeignet für CI, läuft komplett offline.
+
+Aufruf (aus dem Repository-Root):
+    python -m benchmarks.bench_pages --rows 10000 100000 --output bench_pages.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from benchmarks.bench_loader import BASE_PATH, DATA_DIR, _git_revision, dataset_path
+
+DEFAULT_ROWS = [10_000, 100_000]
+TIMEOUT_S = 300
+
+# Latenzbudgets in Sekunden je Seite und Messung ("*" gilt für alle Interaktionen)
+DEFAULT_BUDGETS: Dict[str, Dict[str, float]] = {
+    "app.py": {"cold": 2.0, "warm": 1.0, "*": 1.0},
+    "pages/1_OOP_Produktionsanalyse.py": {"cold": 20.0, "warm": 10.0, "*": 10.0},
+    "pages/2_SQL_Data_Analysis.py": {"cold": 20.0, "warm": 10.0, "*": 5.0},
+    "pages/3_Production_KPIs_Pandas.py": {"cold": 20.0, "warm": 5.0, "*": 5.0}
+}
+
+
+def _widget(widgets, label: str):
+    return next(w for w in widgets if w.label == label)
+
+
+def _keyed(widgets, key: str):
+    """Widget über seinen Key (für mehrfach vergebene Labels wie "Kennzahl")."""
+    return widgets(key=key)
+
+
+def _interactions() -> Dict[str, List[Tuple[str, Callable]]]:
+    """Widget-Interaktionen je Seite: (Name, Funktion(at) -> at)."""
+    def kpi_year(at):
+        box = _widget(at.selectbox, "📅 Year")
+        return box.select(box.options[0])
+
+    def kpi_line(at):
+        box = _widget(at.selectbox, "🏭 Line")
+        return box.select(box.options[1])
+
+    def kpi_shift(at):
+        box = _widget(at.selectbox, "🕐 Shift")
+        return box.select(box.options[1])
+
+    def oop_line(at):
+        box = _widget(at.selectbox, "Produktionslinie")
+        return box.select(box.options[-1])
+
+    def oop_shift(at):
+        box = _widget(at.multiselect, "Schicht")
+        return box.unselect(box.options[0])
+
+    def oop_date_range(at):
+        date_input = _widget(at.date_input, "Zeitraum")
+        start, end = date_input.value
+        return date_input.set_value((start, start.replace(year=start.year + 1)))
+
+    def sql_min_units(at):
+        return _widget(at.number_input, "Mindeststückzahl je Produkt").set_value(1000)
+
+    def sql_cost_metric(at):
+        box = _keyed(at.selectbox, "cost_metric")
+        return box.select(box.options[1])
+
+    def sql_cost_grouping(at):
+        box = _keyed(at.selectbox, "cost_grouping")
+        return box.select(box.options[-1])
+
+    def sql_olap_drill_down(at):
+        slider = _widget(at.select_slider, "Drill-down bis")
+        return slider.set_value(slider.options[-1])
+
+    def sql_olap_slice(at):
+        box = _widget(at.selectbox, "Slice: Jahr")
+        return box.select(box.options[0])
+
+    def sql_sketch_by(at):
+        return _widget(at.multiselect, "Gruppieren nach").select("Monat")
+
+    def app_next_page(at):
+        return _widget(at.button, "Weiter ➡️").click()
+
+    return {
+        "app.py": [("next_page", app_next_page)],
+        "pages/1_OOP_Produktionsanalyse.py": [
+            ("line", oop_line), ("shift", oop_shift), ("date_range", oop_date_range)
+        ],
+        "pages/2_SQL_Data_Analysis.py": [
+            ("query3_min_units", sql_min_units), ("cost_metric", sql_cost_metric),
+            ("cost_grouping", sql_cost_grouping), ("olap_drill_down", sql_olap_drill_down),
+            ("olap_slice", sql_olap_slice), ("sketch_by", sql_sketch_by)
+        ],
+        "pages/3_Production_KPIs_Pandas.py": [
+            ("year", kpi_year), ("line", kpi_line), ("shift", kpi_shift)
+        ]
+    }
+
+
+def _timed_run(at) -> float:
+    start = time.perf_counter()
+    at.run(timeout=TIMEOUT_S)
+    elapsed = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return elapsed
+
+
+def _bench_pages(data_path: str, pages: List[str], repeat: int) -> List[Dict[str, object]]:
+    """Läuft im frischen Worker-Prozess mit eigener Datenquelle."""
+    os.environ["PORTFOLIO_DATA_PATH"] = data_path
+    os.environ["PORTFOLIO_PARTITION_ROOT"] = str(DATA_DIR / "no-partitions")
+    # Cold-Messungen sollen nicht von Warm-up- oder Refresher-Thread vorgewärmt werden
+    os.environ["PORTFOLIO_WARMUP"] = "0"
+    os.environ["PORTFOLIO_REFRESH_INTERVAL"] = "0"
+    if str(BASE_PATH) not in sys.path:
+        sys.path.insert(0, str(BASE_PATH))
+
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+    from services.data_loader import clear_column_cache
+
+    interactions = _interactions()
+    results = []
+
+    for page in pages:
+        st.cache_data.clear()
+        clear_column_cache()
+
+        at = AppTest.from_file(str(BASE_PATH / page), default_timeout=TIMEOUT_S)
+        results.append({"page": page, "measure": "cold", "seconds": _timed_run(at)})
+
+        warm = [_timed_run(at) for _ in range(repeat)]
+        results.append({"page": page, "measure": "warm", "seconds": statistics.median(warm)})
+
+        for name, action in interactions[page]:
+            action(at)
+            results.append({"page": page, "measure": name, "seconds": _timed_run(at)})
+
+    return results
+
+
+def _budget(budgets: Dict[str, Dict[str, float]], page: str, measure: str) -> Optional[float]:
+    page_budgets = budgets.get(page, {})
+    return page_budgets.get(measure, page_budgets.get("*"))
+
+
+def run_benchmark(
+    rows_list: List[int],
+    pages: List[str],
+    budgets: Dict[str, Dict[str, float]],
+    repeat: int = 3
+) -> Dict[str, object]:
+    """Führt alle Messungen aus und bewertet sie gegen die Budgets."""
+    results = []
+    for rows in rows_list:
+        path = dataset_path(rows)
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            measurements = pool.submit(_bench_pages, str(path), pages, repeat).result()
+
+        for m in measurements:
+            budget = _budget(budgets, m["page"], m["measure"])
+            m.update({
+                "rows": rows,
+                "seconds": round(m["seconds"], 4),
+                "budget_s": budget,
+                "ok": budget is None or m["seconds"] <= budget
+            })
+            results.append(m)
+            print(f"{rows:>9,} rows | {m['page']:<36} | {m['measure']:<10} | {m['seconds']:>7.3f}s "
+                  f"| budget {budget if budget is not None else '-'} | {'ok' if m['ok'] else 'OVER'}",
+                  file=sys.stderr)
+
+    return {
+        "benchmark": "pages",
+        "revision": _git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "passed": all(r["ok"] for r in results),
+        "results": results
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Headless Render-Benchmark für alle Seiten")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS)
+    parser.add_argument("--pages", nargs="+", choices=list(DEFAULT_BUDGETS), default=list(DEFAULT_BUDGETS))
+    parser.add_argument("--repeat", type=int, default=3, help="Anzahl warmer Läufe")
+    parser.add_argument("--budgets", type=Path, help="JSON mit Budgets {page: {measure: seconds}}")
+    parser.add_argument("--output", type=Path, help="JSON-Datei (Standard: stdout)")
+    args = parser.parse_args()
+
+    budgets = DEFAULT_BUDGETS
+    if args.budgets:
+        budgets = {**DEFAULT_BUDGETS, **json.loads(args.budgets.read_text(encoding="utf-8"))}
+
+    report = run_benchmark(args.rows, args.pages, budgets, args.repeat)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    sys.exit(0 if report["passed"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Query Benchmark
+===============
+Vergleicht den Planer aus services.query (GROUP BY auf den Integer-
+Fremdschlüsseln, Labels erst am Ergebnis) mit dem bisherigen Vorgehen
+der SQL-Seite (Faktentabelle mit der Dimension mergen, dann auf den
+String-Spalten gruppieren) – für die Abfragen der SQL-Seite auf
+synthetischen Datensätzen. Beide Ergebnisse werden zusätzlich verglichen.
+
+Aufruf (aus dem Repository-Root):
+    python -m benchmarks.bench_queries --rows 100000 1000000 --output bench_queries.json
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List
+
+BASE_PATH = Path(__file__).resolve().parent.parent
+if str(BASE_PATH) not in sys.path:
+    sys.path.append(str(BASE_PATH))
+
+from benchmarks.bench_loader import _git_revision, dataset_path
+from services.query import DIMENSIONS, Measure, QuerySpec, Ratio, execute, _id_column
+
+DEFAULT_ROWS = [100_000, 1_000_000]
+
+_RATIO = Ratio("ausschussquote_prozent", numerator="ausschuss", denominator="stueckzahl")
+_MEASURES = (Measure("Stueckzahl", "stueckzahl"), Measure("Ausschuss", "ausschuss"))
+
+# Abfragen der SQL-Seite
+QUERIES: Dict[str, QuerySpec] = {
+    "line": QuerySpec("dim_produktionslinie", ("Produktionslinie",), _MEASURES, (_RATIO,),
+                      (("ausschussquote_prozent", False),)),
+    "shift": QuerySpec("dim_schicht", ("Schicht",), _MEASURES, (_RATIO,),
+                       (("ausschussquote_prozent", False),)),
+    "products": QuerySpec("dim_produkt", ("Produkt", "Modifikation"), _MEASURES, (_RATIO,),
+                          (("ausschussquote_prozent", False),), limit=15),
+    "trend": QuerySpec("dim_datum", ("jahr", "monat"), _MEASURES, (_RATIO,),
+                       (("jahr", True), ("monat", True))),
+}
+
+
+def merge_groupby(spec: QuerySpec, schema):
+    """Referenz: das bisherige merge + groupby auf den Label-Spalten."""
+    import pandas as pd
+
+    attribute, _ = DIMENSIONS[spec.dimension]
+    result = (
+        schema.fact_produktion
+        .merge(getattr(schema, attribute), on=_id_column(spec.dimension))
+        .groupby(list(spec.group_by), as_index=False)
+        .agg(**{m.alias: (m.column, m.agg) for m in spec.measures})
+    )
+    for r in spec.ratios:
+        result[r.alias] = (
+            result[r.numerator] * r.scale / result[r.denominator].replace(0, pd.NA)
+        ).round(r.digits)
+    if spec.order_by:
+        columns, ascending = zip(*spec.order_by)
+        result = result.sort_values(list(columns), ascending=list(ascending))
+    if spec.limit is not None:
+        result = result.head(spec.limit)
+    return result.reset_index(drop=True)
+
+
+def _best_of(func, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run_benchmark(rows_list: List[int], queries: List[str], repeat: int = 5) -> Dict[str, object]:
+    """Führt alle Messungen aus und liefert ein JSON-serialisierbares Ergebnis."""
+    import numpy as np
+    import pandas as pd
+
+    from services.data_loader import load_production_data
+    from services.data_prep import prepare_sql_data
+    from services.star_schema import build_star_schema
+
+    results = []
+    for rows in rows_list:
+        schema = build_star_schema(prepare_sql_data(load_production_data(dataset_path(rows))).clean)
+        for name in queries:
+            spec = QUERIES[name]
+            planner = execute(spec, schema)
+            reference = merge_groupby(spec, schema)
+            labels = list(spec.group_by)
+            same = bool(
+                np.allclose(planner.drop(columns=labels).to_numpy(dtype=float),
+                            reference.drop(columns=labels).to_numpy(dtype=float))
+                # Bei LIMIT können Gleichstände an der Grenze unterschiedlich einsortiert sein
+                and (spec.limit is not None
+                     or (planner[labels].to_numpy() == reference[labels].to_numpy()).all())
+            )
+
+            planner_s = _best_of(lambda: execute(spec, schema), repeat)
+            merge_s = _best_of(lambda: merge_groupby(spec, schema), repeat)
+            results.append({
+                "rows": rows,
+                "query": name,
+                "planner_s": round(planner_s, 5),
+                "merge_groupby_s": round(merge_s, 5),
+                "speedup": round(merge_s / planner_s, 1) if planner_s else None,
+                "same_result": same
+            })
+            print(f"{rows:>11,} rows | {name:<9} | planner {planner_s:>8.4f}s "
+                  f"| merge+groupby {merge_s:>8.4f}s | x{merge_s / planner_s:>6.1f}"
+                  f"{'' if same else ' | ABWEICHUNG'}", file=sys.stderr)
+
+    return {
+        "benchmark": "queries",
+        "revision": _git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": {
+            "pandas": pd.__version__,
+            "numpy": np.__version__
+        },
+        "results": results
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark für den Abfrage-Planer der SQL-Seite")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS)
+    parser.add_argument("--queries", nargs="+", choices=list(QUERIES), default=list(QUERIES))
+    parser.add_argument("--repeat", type=int, default=5, help="Wiederholungen je Messung (Minimum zählt)")
+    parser.add_argument("--output", type=Path, help="JSON-Datei (Standard: stdout)")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.rows, args.queries, args.repeat)
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,10 +6,19 @@ Fokus: Klassenstruktur, Geschäftslogik, SOLID-Prinzipien.
 """
 
 import streamlit as st
+import numpy as np
 import pandas as pd
 from dataclasses import dataclass
 from typing import List, Optional
-from services.data_loader import load_production_data
+from services.data_loader import load_partition_index
+from services.downtime import DEFAULT_THRESHOLD, MAD_SCALE
+from services.kpis import KPIS
+from services.page_data import (
+    load_downtime_histograms, load_oee, load_oee_totals, load_oop_data
+)
+from services.ranking import top_k
+from services.refresh import current_snapshot
+from services.timing import begin_page, render_timing_panel, span
 
 # =========================
 # Page Configuration
@@ -19,6 +28,10 @@ st.set_page_config(
     page_icon="⚙️",
     layout="wide"
 )
+begin_page("oop")
+
+# Datenstand für den ganzen Seitenlauf festhalten (Aktualisierung im Hintergrund)
+version = current_snapshot().version
 
 
 # =========================
@@ -103,23 +116,22 @@ class ProductionLine:
         """Gesamter Energieverbrauch in kWh"""
         return sum(r.energie_kwh for r in self.records)
 
+    def _ratio(self, kpi: str, numerator: float, denominator: float) -> float:
+        """Quote aus Summen nach services.kpis.KPIS (0 ohne Daten)"""
+        value = KPIS[kpi].of(numerator, denominator)
+        return 0.0 if np.isnan(value) else value
+
     def avg_scrap_rate(self) -> float:
-        """Durchschnittliche Ausschussquote über alle Records"""
-        if not self.records:
-            return 0.0
-        return sum(r.scrap_rate() for r in self.records) / len(self.records)
+        """Ausschussquote der Linie: Σ Ausschuss / Σ Stückzahl (stückzahlgewichtet)"""
+        return self._ratio("Ausschussquote_%", self.total_scrap(), self.total_output())
 
     def avg_energy_per_unit(self) -> float:
-        """Durchschnittlicher Energieverbrauch pro Stück"""
-        if not self.records:
-            return 0.0
-        return sum(r.energy_per_unit() for r in self.records) / len(self.records)
+        """Energieverbrauch pro Stück: Σ kWh / Σ Stückzahl"""
+        return self._ratio("kWh_pro_Stück", self.total_energy(), self.total_output())
 
     def avg_productivity(self) -> float:
-        """Durchschnittliche Produktivitätsrate"""
-        if not self.records:
-            return 0.0
-        return sum(r.productivity_rate() for r in self.records) / len(self.records)
+        """Produktivitätsrate: Σ Gutteile / Σ Stückzahl"""
+        return self._ratio("Qualitaet_%", self.good_units(), self.total_output())
 
     def good_units(self) -> int:
         """Anzahl fehlerfreier produzierter Einheiten"""
@@ -138,11 +150,11 @@ class ProductionLine:
             "Gesamtstückzahl": self.total_output(),
             "Gesamtausschuss": self.total_scrap(),
             "Fehlerfreie Einheiten": self.good_units(),
-            "Ø Ausschussquote (%)": round(self.avg_scrap_rate(), 2),
+            "Ausschussquote (%)": round(self.avg_scrap_rate(), 2),
             "Gesamtstillstand (Min)": round(self.total_downtime(), 1),
             "Gesamtenergie (kWh)": round(self.total_energy(), 2),
-            "Ø Energie/Stück (kWh)": round(self.avg_energy_per_unit(), 3),
-            "Ø Produktivität (%)": round(self.avg_productivity(), 2)
+            "Energie/Stück (kWh)": round(self.avg_energy_per_unit(), 3),
+            "Produktivität (%)": round(self.avg_productivity(), 2)
         }
 
 
@@ -156,25 +168,43 @@ class ProductionAnalyzer:
     def __init__(self, lines: List[ProductionLine]):
         self.lines = lines
 
-    def compare_scrap_rates(self) -> pd.DataFrame:
-        """Vergleicht Ausschussquoten zwischen Linien"""
+    def compare_scrap_rates(self, top: Optional[int] = None, min_output: Optional[int] = None) -> pd.DataFrame:
+        """
+        Vergleicht Ausschussquoten zwischen Linien (höchste zuerst).
+
+        Args:
+            top: nur die top Linien (Teilauswahl statt vollständiger Sortierung)
+            min_output: nur Linien mit mindestens dieser Gesamtstückzahl
+        """
         data = []
         for line in self.lines:
             data.append({
                 "Linie": line.name,
-                "Ausschussquote_%": round(line.avg_scrap_rate(), 2)
+                "Ausschussquote_%": round(line.avg_scrap_rate(), 2),
+                "Stückzahl": line.total_output()
             })
-        return pd.DataFrame(data).sort_values("Ausschussquote_%", ascending=False)
+        ranking = top_k(pd.DataFrame(data), "Ausschussquote_%", k=top,
+                        min_volume=min_output, volume_column="Stückzahl")
+        return ranking.drop(columns="Stückzahl")
+
+    def compare_energy_efficiency(self, top: Optional[int] = None, min_output: Optional[int] = None) -> pd.DataFrame:
+        """
+        Vergleicht Energieeffizienz zwischen Linien (höchster Verbrauch je Stück zuerst).
 
-    def compare_energy_efficiency(self) -> pd.DataFrame:
-        """Vergleicht Energieeffizienz zwischen Linien"""
+        Args:
+            top: nur die top Linien (Teilauswahl statt vollständiger Sortierung)
+            min_output: nur Linien mit mindestens dieser Gesamtstückzahl
+        """
         data = []
         for line in self.lines:
             data.append({
                 "Linie": line.name,
-                "kWh_pro_Stück": round(line.avg_energy_per_unit(), 3)
+                "kWh_pro_Stück": round(line.avg_energy_per_unit(), 3),
+                "Stückzahl": line.total_output()
             })
-        return pd.DataFrame(data).sort_values("kWh_pro_Stück", ascending=False)
+        ranking = top_k(pd.DataFrame(data), "kWh_pro_Stück", k=top,
+                        min_volume=min_output, volume_column="Stückzahl")
+        return ranking.drop(columns="Stückzahl")
 
     def get_best_performing_line(self) -> Optional[ProductionLine]:
         """Findet die Linie mit der besten Produktivität"""
@@ -258,33 +288,10 @@ st.divider()
 # =========================
 # Data Loading
 # =========================
-@st.cache_data
-def load_and_prepare_data():
-    """Lädt und bereitet Produktionsdaten vor"""
-    df = load_production_data().copy()
-
-    # Typkonvertierung
-    df["Datum"] = pd.to_datetime(df["Datum"], errors="coerce")
-
-    numeric_cols = [
-        "Stueckzahl", "Ausschuss",
-        "Energieverbrauch_kWh", "Stillstandszeit_Min"
-    ]
-
-    for col in numeric_cols:
-        df[col] = pd.to_numeric(df[col], errors="coerce")
+# Gecachte Loader liegen in services.page_data (gemeinsam mit dem Warm-up)
 
-    # Bereinigung
-    df = df.dropna(subset=[
-        "Datum", "Produktionslinie", "Schicht",
-        "Stueckzahl", "Ausschuss",
-        "Energieverbrauch_kWh", "Stillstandszeit_Min"
-    ])
-
-    return df
-
-
-df = load_and_prepare_data()
+# Filteroptionen aus dem Partitionsindex – ohne die Daten zu laden
+partitions = load_partition_index(version=version)
 
 # =========================
 # Interactive Filters
@@ -294,8 +301,8 @@ st.header("🔍 Filter")
 col1, col2, col3 = st.columns(3)
 
 with col1:
-    min_date = df["Datum"].min().date()
-    max_date = df["Datum"].max().date()
+    min_date = pd.to_datetime(partitions["min_datum"]).min().date()
+    max_date = pd.to_datetime(partitions["max_datum"]).max().date()
 
     date_range = st.date_input(
         "Zeitraum",
@@ -305,11 +312,19 @@ with col1:
     )
 
 with col2:
-    linien = sorted(df["Produktionslinie"].unique())
+    linien = sorted(partitions["Produktionslinie"].unique())
     linie = st.selectbox("Produktionslinie", linien)
 
+# Nur die Partitionen der gewählten Linie und Jahre laden
+with span("oop.load_and_prepare_data"):
+    df_auswahl = load_oop_data(
+        jahre=list(range(date_range[0].year, date_range[-1].year + 1)),
+        linien=[linie],
+        version=version
+    )
+
 with col3:
-    schichten = sorted(df["Schicht"].unique())
+    schichten = sorted(df_auswahl["Schicht"].unique())
     selected_shifts = st.multiselect(
         "Schicht",
         options=schichten,
@@ -317,11 +332,11 @@ with col3:
     )
 
 # Filter anwenden
-df_filtered = df[
-    (df["Datum"] >= pd.to_datetime(date_range[0])) &
-    (df["Datum"] <= pd.to_datetime(date_range[1])) &
-    (df["Produktionslinie"] == linie) &
-    (df["Schicht"].isin(selected_shifts))
+df_filtered = df_auswahl[
+    (df_auswahl["Datum"] >= pd.to_datetime(date_range[0])) &
+    (df_auswahl["Datum"] <= pd.to_datetime(date_range[1])) &
+    (df_auswahl["Produktionslinie"] == linie) &
+    (df_auswahl["Schicht"].isin(selected_shifts))
     ].copy()
 
 st.divider()
@@ -330,22 +345,23 @@ st.divider()
 # Create OOP Objects
 # =========================
 
-# ProductionRecords erstellen
-records = [
-    ProductionRecord(
-        datum=row["Datum"],
-        linie=row["Produktionslinie"],
-        schicht=row["Schicht"],
-        stueckzahl=int(row["Stueckzahl"]),
-        ausschuss=int(row["Ausschuss"]),
-        energie_kwh=float(row["Energieverbrauch_kWh"]),
-        stillstand_min=float(row["Stillstandszeit_Min"])
-    )
-    for _, row in df_filtered.iterrows()
-]
+with span("oop.records"):
+    # ProductionRecords erstellen
+    records = [
+        ProductionRecord(
+            datum=row["Datum"],
+            linie=row["Produktionslinie"],
+            schicht=row["Schicht"],
+            stueckzahl=int(row["Stueckzahl"]),
+            ausschuss=int(row["Ausschuss"]),
+            energie_kwh=float(row["Energieverbrauch_kWh"]),
+            stillstand_min=float(row["Stillstandszeit_Min"])
+        )
+        for _, row in df_filtered.iterrows()
+    ]
 
-# ProductionLine erstellen
-line_obj = ProductionLine(name=linie, records=records)
+    # ProductionLine erstellen
+    line_obj = ProductionLine(name=linie, records=records)
 
 # =========================
 # Results Display
@@ -384,7 +400,7 @@ else:
         st.metric(
             "Ausschussquote",
             f"{line_obj.avg_scrap_rate():.2f}%",
-            help="Durchschnittliche Ausschussquote"
+            help="Σ Ausschuss / Σ Stückzahl"
         )
 
     with col3:
@@ -398,9 +414,25 @@ else:
         st.metric(
             "Energieeffizienz",
             f"{line_obj.avg_energy_per_unit():.3f} kWh",
-            help="Durchschnittlicher Verbrauch pro Stück"
+            help="Σ Energieverbrauch / Σ Stückzahl"
         )
 
+    # OEE der Filterauswahl als Roll-up der gecachten Summentabelle (Quotient aus Summen, services.oee)
+    oee = load_oee_totals(
+        linie,
+        pd.to_datetime(date_range[0]),
+        pd.to_datetime(date_range[1]),
+        tuple(selected_shifts),
+        version=version
+    )
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("OEE", f"{oee['OEE_%']:.1f}%", help="Verfügbarkeit × Leistung × Qualität")
+    col2.metric("Verfügbarkeit", f"{oee['Verfuegbarkeit_%']:.1f}%",
+                help="Betriebsstunden / (Betriebsstunden + Stillstand)")
+    col3.metric("Leistung", f"{oee['Leistung_%']:.1f}%",
+                help="Stückzahl / (Betriebsstunden × Soll-Rate je Produkt/Modifikation)")
+    col4.metric("Qualität", f"{oee['Qualitaet_%']:.1f}%", help="Gutteile / Stückzahl")
+
 st.divider()
 
 # =========================
@@ -439,28 +471,31 @@ Hier wird die `ProductionAnalyzer`-Klasse verwendet, um mehrere Linien zu vergle
 Dies demonstriert das **Strategy Pattern** für wiederverwendbare Analyse-Logik.
 """)
 
-# Alle Linien analysieren
-all_lines = []
-for line_name in df["Produktionslinie"].unique():
-    df_line = df[df["Produktionslinie"] == line_name]
+with span("oop.cross_line"):
+    # Alle Linien analysieren (vollständiger Datensatz)
+    df = load_oop_data(version=version)
 
-    line_records = [
-        ProductionRecord(
-            datum=row["Datum"],
-            linie=row["Produktionslinie"],
-            schicht=row["Schicht"],
-            stueckzahl=int(row["Stueckzahl"]),
-            ausschuss=int(row["Ausschuss"]),
-            energie_kwh=float(row["Energieverbrauch_kWh"]),
-            stillstand_min=float(row["Stillstandszeit_Min"])
-        )
-        for _, row in df_line.iterrows()
-    ]
+    all_lines = []
+    for line_name in df["Produktionslinie"].unique():
+        df_line = df[df["Produktionslinie"] == line_name]
 
-    all_lines.append(ProductionLine(name=line_name, records=line_records))
+        line_records = [
+            ProductionRecord(
+                datum=row["Datum"],
+                linie=row["Produktionslinie"],
+                schicht=row["Schicht"],
+                stueckzahl=int(row["Stueckzahl"]),
+                ausschuss=int(row["Ausschuss"]),
+                energie_kwh=float(row["Energieverbrauch_kWh"]),
+                stillstand_min=float(row["Stillstandszeit_Min"])
+            )
+            for _, row in df_line.iterrows()
+        ]
 
-# Analyzer erstellen
-analyzer = ProductionAnalyzer(all_lines)
+        all_lines.append(ProductionLine(name=line_name, records=line_records))
+
+    # Analyzer erstellen
+    analyzer = ProductionAnalyzer(all_lines)
 
 col1, col2 = st.columns(2)
 
@@ -474,6 +509,18 @@ with col2:
     energy_comparison = analyzer.compare_energy_efficiency()
     st.dataframe(energy_comparison, use_container_width=True, hide_index=True)
 
+st.subheader("OEE-Vergleich")
+oee_lines = load_oee(by=("Produktionslinie",), version=version)
+st.dataframe(
+    oee_lines[["Produktionslinie", "OEE_%", "Verfuegbarkeit_%", "Leistung_%", "Qualitaet_%"]],
+    use_container_width=True,
+    hide_index=True,
+    column_config={
+        c: st.column_config.NumberColumn(format="%.1f")
+        for c in ["OEE_%", "Verfuegbarkeit_%", "Leistung_%", "Qualitaet_%"]
+    }
+)
+
 # Best/Worst Performers
 best_line = analyzer.get_best_performing_line()
 worst_line = analyzer.get_worst_performing_line()
@@ -490,6 +537,74 @@ with col2:
 
 st.divider()
 
+# =========================
+# Downtime Anomalies
+# =========================
+st.header("⏱️ Auffällige Stillstandszeiten")
+
+st.markdown(f"""
+Je Linie, Schicht und Fehlercode liegen **vorberechnete Histogramme** der Stillstandszeit
+über den gesamten Datenbestand vor. Median und MAD (Median der absoluten Abweichungen)
+ergeben sich aus den Histogrammen; auffällig ist ein Datensatz der Auswahl oben, dessen
+robuster z-Wert `{MAD_SCALE} · (x − Median) / MAD` die Schwelle überschreitet.
+""")
+
+col1, col2 = st.columns(2)
+
+with col1:
+    z_threshold = st.slider(
+        "Schwelle (robuster z-Wert)",
+        min_value=1.0,
+        max_value=6.0,
+        value=DEFAULT_THRESHOLD,
+        step=0.5
+    )
+
+with col2:
+    downtime_grouping = st.radio(
+        "Vergleichsgruppe",
+        ["Linie × Schicht", "Linie × Schicht × Fehlercode"],
+        horizontal=True
+    )
+
+downtime_by = ["Produktionslinie", "Schicht"]
+if downtime_grouping.endswith("Fehlercode"):
+    downtime_by.append("Fehlercode")
+
+with span("oop.downtime_anomalies"):
+    histograms = load_downtime_histograms(version=version)
+    downtime_stats = histograms.stats(downtime_by, z_threshold, linien=[linie])
+    error_stats = histograms.stats(["Fehlercode"], z_threshold, linien=[linie])
+    anomalies = histograms.flag(df_filtered, downtime_by, z_threshold)
+
+col1, col2 = st.columns(2)
+
+with col1:
+    st.subheader(f"Robuste Kennzahlen – {linie}")
+    st.dataframe(downtime_stats.round(1), use_container_width=True, hide_index=True)
+
+with col2:
+    st.subheader("Nach Fehlercode")
+    st.dataframe(error_stats.round(1), use_container_width=True, hide_index=True)
+
+st.metric(
+    "Auffällige Stillstände in der Auswahl",
+    f"{len(anomalies):,}",
+    help="Datensätze über der Schwelle ihrer Vergleichsgruppe"
+)
+
+if anomalies.empty:
+    st.info("Keine auffälligen Stillstandszeiten bei der gewählten Schwelle.")
+else:
+    top_anomalies = top_k(anomalies, "z_robust", k=50)
+    st.dataframe(
+        top_anomalies[["Datum", "Schicht", "Fehlercode", "Stillstandszeit_Min", "Median_Min", "z_robust"]],
+        use_container_width=True,
+        hide_index=True
+    )
+
+st.divider()
+
 # =========================
 # Code Example
 # =========================
@@ -538,11 +653,14 @@ class ProductionLine:
         '''Gesamter Output'''
         return sum(r.stueckzahl for r in self.records)
 
+    def total_scrap(self) -> int:
+        '''Gesamter Ausschuss'''
+        return sum(r.ausschuss for r in self.records)
+
     def avg_scrap_rate(self) -> float:
-        '''Durchschnittliche Ausschussquote'''
-        if not self.records:
-            return 0.0
-        return sum(r.scrap_rate() for r in self.records) / len(self.records)
+        '''Ausschussquote als Quotient der Summen (nicht Mittel der Quoten)'''
+        output = self.total_output()
+        return self.total_scrap() / output * 100 if output else 0.0
 
 
 # Verwendung
@@ -598,3 +716,5 @@ st.markdown("""
 
 **📊 Technologie-Stack:** Python | Dataclasses | Type Hints | SOLID Principles | OOP Design Patterns
 """)
+
+render_timing_panel()
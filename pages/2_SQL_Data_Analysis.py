@@ -15,7 +15,18 @@ if str(ROOT_DIR) not in sys.path:
 
 import streamlit as st
 import pandas as pd
-from services.data_loader import load_production_data
+from services.costs import COST_KPIS
+from services.olap import DRILL_PATH, MEASURES, RATIOS, ROWS
+from services.oee import FACTORS
+from services.page_data import (
+    load_cost_attribution, load_ideal_rates, load_oee, load_olap_cube, load_sketch_cube,
+    load_sql_data, load_star_schema
+)
+from services.query import Measure, QuerySpec, Ratio, execute
+from services.query_cache import QUERY_CACHE
+from services.refresh import current_snapshot
+from services.timing import begin_page, render_timing_panel, span
+from services.validation import describe_mask
 
 # =========================
 # Page Configuration
@@ -25,6 +36,11 @@ st.set_page_config(
     page_icon="🗄️",
     layout="wide"
 )
+begin_page("sql")
+
+# Datenstand für den ganzen Seitenlauf festhalten (Aktualisierung im Hintergrund)
+snapshot = current_snapshot()
+version = snapshot.version
 
 # =========================
 # Header
@@ -45,19 +61,10 @@ st.divider()
 # =========================
 # Data Loading & Validation
 # =========================
-@st.cache_data
-def load_and_validate_data():
-    """Lädt und validiert Produktionsdaten"""
-    df = load_production_data().copy()
-
-    # Datum konvertieren
-    if "Datum" in df.columns:
-        df["Datum"] = pd.to_datetime(df["Datum"], errors="coerce")
-
-    return df
-
-
-df_raw = load_and_validate_data()
+# Gecachte Loader liegen in services.page_data (gemeinsam mit dem Warm-up)
+with span("sql.load_and_validate_data"):
+    validation = load_sql_data(version=version)
+df_raw = validation.clean
 
 # Spalten-Validierung
 required_cols = [
@@ -74,6 +81,15 @@ if missing:
     st.error(f"⚠️ Fehlende Spalten im CSV: {', '.join(missing)}")
     st.stop()
 
+# Datenqualität
+with st.expander(f"🧪 Datenqualität – {validation.quarantined_rows:,} Zeilen in Quarantäne"):
+    st.dataframe(validation.counts, use_container_width=True, hide_index=True)
+
+    if validation.quarantined_rows:
+        quarantine = validation.quarantine.head(100).copy()
+        quarantine["Verstöße"] = quarantine["Verstoss_Maske"].map(describe_mask)
+        st.dataframe(quarantine, use_container_width=True, hide_index=True)
+
 # =========================
 # Relational Model Explanation
 # =========================
@@ -98,66 +114,16 @@ st.divider()
 # =========================
 st.header("📊 Dimensionstabellen")
 
-# Dimension: Datum
-dim_datum = (
-    df_raw[["Datum"]]
-    .dropna()
-    .drop_duplicates()
-    .sort_values("Datum")
-    .reset_index(drop=True)
-)
-dim_datum["datum_id"] = dim_datum.index + 1
-dim_datum["jahr"] = dim_datum["Datum"].dt.year
-dim_datum["monat"] = dim_datum["Datum"].dt.month
-dim_datum["tag"] = dim_datum["Datum"].dt.day
-
-# Dimension: Unternehmen
-dim_unternehmen = (
-    df_raw[["Unternehmen"]]
-    .drop_duplicates()
-    .reset_index(drop=True)
-)
-dim_unternehmen["unternehmen_id"] = dim_unternehmen.index + 1
-
-# Dimension: Produkt
-dim_produkt = (
-    df_raw[["Produkt", "Modifikation"]]
-    .drop_duplicates()
-    .reset_index(drop=True)
-)
-dim_produkt["produkt_id"] = dim_produkt.index + 1
-
-# Dimension: Produktionslinie
-dim_linie = (
-    df_raw[["Produktionslinie"]]
-    .drop_duplicates()
-    .reset_index(drop=True)
-)
-dim_linie["linie_id"] = dim_linie.index + 1
-
-# Dimension: Schicht
-dim_schicht = (
-    df_raw[["Schicht"]]
-    .drop_duplicates()
-    .reset_index(drop=True)
-)
-dim_schicht["schicht_id"] = dim_schicht.index + 1
-
-# Dimension: Software
-dim_software = (
-    df_raw[["Softwareversion", "Firmwareversion"]]
-    .drop_duplicates()
-    .reset_index(drop=True)
-)
-dim_software["software_id"] = dim_software.index + 1
-
-# Dimension: Status
-dim_status = (
-    df_raw[["Status", "Fehlercode"]]
-    .drop_duplicates()
-    .reset_index(drop=True)
-)
-dim_status["status_id"] = dim_status.index + 1
+with span("sql.dimensions"):
+    # Dimensionen & Faktentabelle (gecacht, siehe services.star_schema)
+    schema = load_star_schema(version=version)
+    dim_datum = schema.dim_datum
+    dim_unternehmen = schema.dim_unternehmen
+    dim_produkt = schema.dim_produkt
+    dim_linie = schema.dim_linie
+    dim_schicht = schema.dim_schicht
+    dim_software = schema.dim_software
+    dim_status = schema.dim_status
 
 # Dimensionstabellen anzeigen
 with st.expander("📅 dim_datum"):
@@ -193,30 +159,9 @@ Die Faktentabelle enthält nur **Messwerte** und **Foreign Keys** zu den Dimensi
 Dies entspricht dem Prinzip der **Normalisierung** in relationalen Datenbanken.
 """)
 
-# JOINs durchführen
-fact = (
-    df_raw
-    .merge(dim_datum[["Datum", "datum_id"]], on="Datum", how="left")
-    .merge(dim_unternehmen[["Unternehmen", "unternehmen_id"]], on="Unternehmen", how="left")
-    .merge(dim_produkt[["Produkt", "Modifikation", "produkt_id"]], on=["Produkt", "Modifikation"], how="left")
-    .merge(dim_linie[["Produktionslinie", "linie_id"]], on="Produktionslinie", how="left")
-    .merge(dim_schicht[["Schicht", "schicht_id"]], on="Schicht", how="left")
-    .merge(dim_software[["Softwareversion", "Firmwareversion", "software_id"]],
-           on=["Softwareversion", "Firmwareversion"], how="left")
-    .merge(dim_status[["Status", "Fehlercode", "status_id"]], on=["Status", "Fehlercode"], how="left")
-)
-
-# Faktentabelle mit nur IDs und Messwerten
-fact_produktion = fact[[
-    "datum_id", "unternehmen_id", "produkt_id", "linie_id", "schicht_id",
-    "software_id", "status_id", "Auftragsnummer",
-    "Stueckzahl", "Ausschuss", "Betriebsstunden", "Stillstandszeit_Min",
-    "Materialkosten", "Energieverbrauch_kWh", "Mitarbeiter_Produktion",
-    "MaxTemperatur", "Durchschnittstemperatur", "EndOfLine_Test"
-]].copy()
-
-# Primary Key hinzufügen
-fact_produktion.insert(0, "produktion_id", range(1, len(fact_produktion) + 1))
+with span("sql.fact_table"):
+    # JOINs auf die Dimensionen; nur IDs und Messwerte + Primary Key
+    fact_produktion = schema.fact_produktion
 
 st.dataframe(fact_produktion.head(100), use_container_width=True)
 
@@ -236,6 +181,9 @@ st.divider()
 # =========================
 st.header("📊 SQL-ähnliche Abfragen")
 
+# Ergebnisse werden je normalisierter Abfrage und Datenstand gecacht (services.query_cache)
+dataset = snapshot.fingerprint
+
 st.markdown("""
 Die folgenden Analysen simulieren typische **SQL-Queries** mit Pandas:
 - `JOIN` - Verknüpfung von Fakten- und Dimensionstabellen
@@ -244,52 +192,40 @@ Die folgenden Analysen simulieren typische **SQL-Queries** mit Pandas:
 - `ORDER BY` - Sortierung der Ergebnisse
 """)
 
+# Gemeinsame Kennzahl aller Abfragen: SUM(Ausschuss) * 100 / SUM(Stueckzahl)
+AUSSCHUSSQUOTE = Ratio("ausschussquote_prozent", numerator="ausschuss", denominator="stueckzahl")
+STUECKZAHL = Measure("Stueckzahl", "stueckzahl")
+AUSSCHUSS = Measure("Ausschuss", "ausschuss")
+
 # =========================
 # Query 1: KPIs by Line
 # =========================
 st.subheader("Query 1: KPIs nach Produktionslinie")
 
-with st.expander("🔍 SQL-Äquivalent anzeigen"):
-    st.code("""
-SELECT 
-    l.Produktionslinie,
-    SUM(f.Stueckzahl) as stueckzahl,
-    SUM(f.Ausschuss) as ausschuss,
-    SUM(f.Stillstandszeit_Min) as stillstand_min,
-    SUM(f.Energieverbrauch_kWh) as energie_kwh,
-    SUM(f.Materialkosten) as materialkosten,
-    ROUND(SUM(f.Ausschuss) * 100.0 / SUM(f.Stueckzahl), 2) as ausschussquote_prozent
-FROM fact_produktion f
-JOIN dim_produktionslinie l ON f.linie_id = l.linie_id
-GROUP BY l.Produktionslinie
-ORDER BY ausschussquote_prozent DESC;
-    """, language="sql")
-
-# Pandas-Implementierung
-kpi_linie = (
-    fact_produktion
-    .merge(dim_linie, on="linie_id")
-    .groupby("Produktionslinie", as_index=False)
-    .agg({
-        "Stueckzahl": "sum",
-        "Ausschuss": "sum",
-        "Stillstandszeit_Min": "sum",
-        "Energieverbrauch_kWh": "sum",
-        "Materialkosten": "sum"
-    })
+QUERY_LINE = QuerySpec(
+    dimension="dim_produktionslinie",
+    group_by=("Produktionslinie",),
+    measures=(
+        STUECKZAHL,
+        AUSSCHUSS,
+        Measure("Stillstandszeit_Min", "stillstand_min"),
+        Measure("Energieverbrauch_kWh", "energie_kwh"),
+        Measure("Materialkosten", "materialkosten"),
+    ),
+    ratios=(AUSSCHUSSQUOTE,),
+    order_by=(("ausschussquote_prozent", False),)
 )
+SQL_LINE = QUERY_LINE.to_sql()
 
-kpi_linie.columns = [
-    "Produktionslinie", "stueckzahl", "ausschuss",
-    "stillstand_min", "energie_kwh", "materialkosten"
-]
+with st.expander("🔍 SQL-Äquivalent anzeigen"):
+    st.code(SQL_LINE, language="sql")
 
-kpi_linie["ausschussquote_prozent"] = (
-        kpi_linie["ausschuss"] * 100.0 / kpi_linie["stueckzahl"].replace(0, pd.NA)
-).round(2)
+# Pandas-Implementierung: GROUP BY auf linie_id, Labels erst am Ergebnis (services.query)
+with span("sql.query1_line"):
+    kpi_linie = QUERY_CACHE.cached("line", SQL_LINE, dataset, lambda: execute(QUERY_LINE, schema))
 
 st.dataframe(
-    kpi_linie.sort_values("ausschussquote_prozent", ascending=False),
+    kpi_linie,
     use_container_width=True,
     hide_index=True
 )
@@ -301,40 +237,23 @@ st.divider()
 # =========================
 st.subheader("Query 2: KPIs nach Schicht")
 
-with st.expander("🔍 SQL-Äquivalent anzeigen"):
-    st.code("""
-SELECT 
-    s.Schicht,
-    SUM(f.Stueckzahl) as stueckzahl,
-    SUM(f.Ausschuss) as ausschuss,
-    SUM(f.Stillstandszeit_Min) as stillstand_min,
-    ROUND(SUM(f.Ausschuss) * 100.0 / SUM(f.Stueckzahl), 2) as ausschussquote_prozent
-FROM fact_produktion f
-JOIN dim_schicht s ON f.schicht_id = s.schicht_id
-GROUP BY s.Schicht
-ORDER BY ausschussquote_prozent DESC;
-    """, language="sql")
-
-# Pandas-Implementierung
-kpi_schicht = (
-    fact_produktion
-    .merge(dim_schicht, on="schicht_id")
-    .groupby("Schicht", as_index=False)
-    .agg({
-        "Stueckzahl": "sum",
-        "Ausschuss": "sum",
-        "Stillstandszeit_Min": "sum"
-    })
+QUERY_SHIFT = QuerySpec(
+    dimension="dim_schicht",
+    group_by=("Schicht",),
+    measures=(STUECKZAHL, AUSSCHUSS, Measure("Stillstandszeit_Min", "stillstand_min")),
+    ratios=(AUSSCHUSSQUOTE,),
+    order_by=(("ausschussquote_prozent", False),)
 )
+SQL_SHIFT = QUERY_SHIFT.to_sql()
 
-kpi_schicht.columns = ["Schicht", "stueckzahl", "ausschuss", "stillstand_min"]
+with st.expander("🔍 SQL-Äquivalent anzeigen"):
+    st.code(SQL_SHIFT, language="sql")
 
-kpi_schicht["ausschussquote_prozent"] = (
-        kpi_schicht["ausschuss"] * 100.0 / kpi_schicht["stueckzahl"].replace(0, pd.NA)
-).round(2)
+with span("sql.query2_shift"):
+    kpi_schicht = QUERY_CACHE.cached("shift", SQL_SHIFT, dataset, lambda: execute(QUERY_SHIFT, schema))
 
 st.dataframe(
-    kpi_schicht.sort_values("ausschussquote_prozent", ascending=False),
+    kpi_schicht,
     use_container_width=True,
     hide_index=True
 )
@@ -346,40 +265,33 @@ st.divider()
 # =========================
 st.subheader("Query 3: Top 15 Produkte nach Ausschussquote")
 
-with st.expander("🔍 SQL-Äquivalent anzeigen"):
-    st.code("""
-SELECT 
-    p.Produkt,
-    p.Modifikation,
-    SUM(f.Stueckzahl) as stueckzahl,
-    SUM(f.Ausschuss) as ausschuss,
-    ROUND(SUM(f.Ausschuss) * 100.0 / SUM(f.Stueckzahl), 2) as ausschussquote_prozent
-FROM fact_produktion f
-JOIN dim_produkt p ON f.produkt_id = p.produkt_id
-GROUP BY p.Produkt, p.Modifikation
-ORDER BY ausschussquote_prozent DESC
-LIMIT 15;
-    """, language="sql")
-
-# Pandas-Implementierung
-kpi_produkt = (
-    fact_produktion
-    .merge(dim_produkt, on="produkt_id")
-    .groupby(["Produkt", "Modifikation"], as_index=False)
-    .agg({
-        "Stueckzahl": "sum",
-        "Ausschuss": "sum"
-    })
+# Kleinstchargen mit zufällig hoher Quote aus der Rangliste heraushalten
+min_stueckzahl = st.number_input(
+    "Mindeststückzahl je Produkt",
+    min_value=0,
+    value=0,
+    step=1000
 )
 
-kpi_produkt.columns = ["Produkt", "Modifikation", "stueckzahl", "ausschuss"]
+QUERY_PRODUCTS = QuerySpec(
+    dimension="dim_produkt",
+    group_by=("Produkt", "Modifikation"),
+    measures=(STUECKZAHL, AUSSCHUSS),
+    ratios=(AUSSCHUSSQUOTE,),
+    order_by=(("ausschussquote_prozent", False),),
+    limit=15,
+    having=(("stueckzahl", min_stueckzahl),) if min_stueckzahl else ()
+)
+SQL_PRODUCTS = QUERY_PRODUCTS.to_sql()
+
+with st.expander("🔍 SQL-Äquivalent anzeigen"):
+    st.code(SQL_PRODUCTS, language="sql")
 
-kpi_produkt["ausschussquote_prozent"] = (
-        kpi_produkt["ausschuss"] * 100.0 / kpi_produkt["stueckzahl"].replace(0, pd.NA)
-).round(2)
+with span("sql.query3_products"):
+    kpi_produkt = QUERY_CACHE.cached("products", SQL_PRODUCTS, dataset, lambda: execute(QUERY_PRODUCTS, schema))
 
 st.dataframe(
-    kpi_produkt.sort_values("ausschussquote_prozent", ascending=False).head(15),
+    kpi_produkt,
     use_container_width=True,
     hide_index=True
 )
@@ -391,38 +303,28 @@ st.divider()
 # =========================
 st.subheader("Query 4: Monatlicher Trend")
 
-with st.expander("🔍 SQL-Äquivalent anzeigen"):
-    st.code("""
-SELECT 
-    d.jahr,
-    d.monat,
-    SUM(f.Stueckzahl) as stueckzahl,
-    SUM(f.Ausschuss) as ausschuss,
-    ROUND(SUM(f.Ausschuss) * 100.0 / SUM(f.Stueckzahl), 2) as ausschussquote_prozent
-FROM fact_produktion f
-JOIN dim_datum d ON f.datum_id = d.datum_id
-GROUP BY d.jahr, d.monat
-ORDER BY d.jahr, d.monat;
-    """, language="sql")
-
-# Pandas-Implementierung
-trend = (
-    fact_produktion
-    .merge(dim_datum, on="datum_id")
-    .groupby(["jahr", "monat"], as_index=False)
-    .agg({
-        "Stueckzahl": "sum",
-        "Ausschuss": "sum"
-    })
+QUERY_TREND = QuerySpec(
+    dimension="dim_datum",
+    group_by=("jahr", "monat"),
+    measures=(STUECKZAHL, AUSSCHUSS),
+    ratios=(AUSSCHUSSQUOTE,),
+    order_by=(("jahr", True), ("monat", True))
 )
+SQL_TREND = QUERY_TREND.to_sql()
+
+with st.expander("🔍 SQL-Äquivalent anzeigen"):
+    st.code(SQL_TREND, language="sql")
+
 
-trend.columns = ["jahr", "monat", "stueckzahl", "ausschuss"]
+def query_trend() -> pd.DataFrame:
+    # dim_datum ist feiner als (jahr, monat): der Planer fasst die Tage am Ergebnis zusammen
+    trend = execute(QUERY_TREND, schema)
+    trend["periode"] = trend["jahr"].astype(str) + "-" + trend["monat"].astype(str).str.zfill(2)
+    return trend
 
-trend["ausschussquote_prozent"] = (
-        trend["ausschuss"] * 100.0 / trend["stueckzahl"].replace(0, pd.NA)
-).round(2)
 
-trend["periode"] = trend["jahr"].astype(str) + "-" + trend["monat"].astype(str).str.zfill(2)
+with span("sql.query4_trend"):
+    trend = QUERY_CACHE.cached("trend", SQL_TREND, dataset, query_trend)
 
 st.dataframe(
     trend[["periode", "stueckzahl", "ausschuss", "ausschussquote_prozent"]],
@@ -432,6 +334,211 @@ st.dataframe(
 
 st.divider()
 
+# =========================
+# OEE by Line and Shift
+# =========================
+st.subheader("OEE nach Produktionslinie und Schicht")
+
+st.markdown("""
+OEE = Verfügbarkeit × Leistung × Qualität, jeweils als Quotient aus Summen
+(z. B. `SUM(Betriebsstunden) / SUM(Betriebsstunden + Stillstandszeit_Min / 60)`).
+Die Leistung bezieht sich auf die Soll-Rate je Produkt/Modifikation.
+""")
+
+with span("sql.oee"):
+    rates = load_ideal_rates(version=version)
+    oee = load_oee(by=("Produktionslinie", "Schicht"), version=version)
+
+st.dataframe(
+    oee[["Produktionslinie", "Schicht", "OEE_%", *FACTORS]],
+    use_container_width=True,
+    hide_index=True,
+    column_config={c: st.column_config.NumberColumn(format="%.1f") for c in ["OEE_%", *FACTORS]}
+)
+
+with st.expander("Soll-Raten je Produkt/Modifikation (Stück/h)"):
+    st.dataframe(rates.as_frame(), use_container_width=True, hide_index=True)
+
+st.divider()
+
+# =========================
+# Cost Attribution per Product Variant
+# =========================
+st.subheader("💶 Kostenzuordnung je Produktvariante")
+
+st.markdown("""
+Welche Produkte verursachen die höchsten Materialkosten? Bezugsgröße ist das **Gutteil**:
+`SUM(Materialkosten) / SUM(Stueckzahl - Ausschuss)` – Ausschuss verursacht Kosten, trägt sie
+aber nicht. Grundlage ist eine Summentabelle je Produkt × Modifikation × Linie × Monat;
+jede Gruppierung und jeder Filter ist ein Roll-up dieser Tabelle.
+""")
+
+with span("sql.cost_attribution"):
+    costs = load_cost_attribution(version=version)
+
+# Gruppierung -> Spalten der Rangliste
+COST_GROUPINGS = {
+    "Variante": ["Produkt", "Modifikation"],
+    "Variante × Linie": ["Produkt", "Modifikation", "Produktionslinie"],
+    "Variante × Linie × Monat": ["Produkt", "Modifikation", "Produktionslinie", "Monat"],
+}
+
+col1, col2, col3 = st.columns(3)
+with col1:
+    cost_metric = st.selectbox("Kennzahl", COST_KPIS[:2], key="cost_metric")
+    cost_grouping = st.selectbox("Gruppierung", list(COST_GROUPINGS), key="cost_grouping")
+with col2:
+    cost_linien = sorted(costs.table["Produktionslinie"].unique())
+    cost_linie = st.selectbox("Linie", ["Alle", *cost_linien], key="cost_linie")
+    cost_jahre = sorted({int(m[:4]) for m in costs.table["Monat"].unique()})
+    cost_jahr = st.selectbox("Jahr", ["Alle", *cost_jahre], key="cost_jahr")
+with col3:
+    cost_min_units = st.number_input("Mindest-Gutteile", min_value=0, value=100, step=100, key="cost_min_units")
+    cost_top_n = st.slider("Top-N", min_value=5, max_value=50, value=15, key="cost_top_n")
+
+with span("sql.cost_ranking"):
+    cost_ranking = costs.ranking(
+        cost_metric,
+        by=COST_GROUPINGS[cost_grouping],
+        k=cost_top_n,
+        min_good_units=cost_min_units,
+        linie=None if cost_linie == "Alle" else cost_linie,
+        jahr=None if cost_jahr == "Alle" else cost_jahr
+    )
+
+st.caption(
+    f"{costs.variants:,} Varianten · {len(costs):,} Zellen · "
+    "Index 100 = Wert der gesamten Auswahl · Kostenanteil bezogen auf die Materialkosten der Auswahl"
+)
+st.dataframe(
+    cost_ranking[["Rang", *COST_GROUPINGS[cost_grouping], "Gutteile", "Materialkosten",
+                  *COST_KPIS, "Index", "Kostenanteil_%"]],
+    use_container_width=True,
+    hide_index=True,
+    column_config={
+        "Materialkosten": st.column_config.NumberColumn(format="%.0f €"),
+        "Materialkosten_pro_Gutteil": st.column_config.NumberColumn(format="%.2f €"),
+        "kWh_pro_Gutteil": st.column_config.NumberColumn(format="%.3f"),
+        "Ausschussquote_%": st.column_config.NumberColumn(format="%.2f"),
+    }
+)
+
+st.divider()
+
+# =========================
+# OLAP: Drill-down, Slice & Dice, Pivot
+# =========================
+st.header("🧊 OLAP-Analyse")
+st.markdown("""
+Der OLAP-Würfel hält **Teilaggregate in mehreren Körnungen** vor
+(Unternehmen → Linie → Schicht → Produkt → Tag, zusätzlich Monat und Jahr).
+Jede Abfrage wird aus dem kleinsten passenden Teilaggregat beantwortet,
+nicht aus der Faktentabelle:
+- `DRILL-DOWN / ROLL-UP` - feinere bzw. gröbere Ebene im Drillpfad
+- `SLICE` - Schnitt auf einen Wert (z. B. ein Jahr)
+- `DICE` - Auswahl mehrerer Werte je Dimension
+- `PIVOT` - Kreuztabelle zweier Ebenen
+""")
+
+# Feine Drill-Ebenen (Produkt, Tag) können sehr viele Zellen liefern
+OLAP_MAX_ROWS = 5000
+
+with span("sql.olap_cube"):
+    cube = load_olap_cube(version=version)
+
+col1, col2, col3 = st.columns(3)
+
+with col1:
+    drill_level = st.select_slider(
+        "Drill-down bis",
+        options=list(DRILL_PATH),
+        value="Produktionslinie"
+    )
+
+with col2:
+    jahr_options = ["Alle"] + [int(j) for j in cube.levels["Jahr"].labels]
+    olap_jahr = st.selectbox("Slice: Jahr", jahr_options, index=len(jahr_options) - 1)
+
+with col3:
+    alle_schichten = list(cube.levels["Schicht"].labels)
+    olap_schichten = st.multiselect("Dice: Schicht", alle_schichten, default=alle_schichten)
+
+view = cube.view()
+for level in DRILL_PATH[:DRILL_PATH.index(drill_level) + 1]:
+    view = view.drill_down(level)
+if olap_jahr != "Alle":
+    view = view.slice("Jahr", olap_jahr)
+if set(olap_schichten) != set(alle_schichten):
+    view = view.dice(Schicht=olap_schichten)
+
+with span("sql.olap_query"):
+    olap_result = view.result()
+
+st.caption(
+    f"Beantwortet aus dem Teilaggregat {' × '.join(view.source().grain)} "
+    f"({len(view.source()):,} Zellen) · {len(olap_result):,} Ergebniszeilen"
+)
+st.dataframe(
+    olap_result.head(OLAP_MAX_ROWS),
+    use_container_width=True,
+    hide_index=True
+)
+if len(olap_result) > OLAP_MAX_ROWS:
+    st.caption(f"Anzeige auf {OLAP_MAX_ROWS:,} Zeilen begrenzt – für Details per Slice/Dice eingrenzen.")
+
+st.subheader("Pivot")
+pivot_levels = ["Produktionslinie", "Schicht", "Unternehmen", "Jahr", "Monat"]
+col1, col2, col3 = st.columns(3)
+with col1:
+    pivot_rows = st.selectbox("Zeilen", pivot_levels, index=0)
+with col2:
+    pivot_columns = st.selectbox("Spalten", [lv for lv in pivot_levels if lv != pivot_rows], index=0)
+with col3:
+    pivot_measures = [ROWS, *MEASURES.values(), *RATIOS]
+    pivot_measure = st.selectbox("Kennzahl", pivot_measures, index=pivot_measures.index("Ausschussquote_%"))
+
+with span("sql.olap_pivot"):
+    pivot = view.pivot(pivot_rows, pivot_columns, pivot_measure)
+
+st.dataframe(pivot, use_container_width=True)
+
+st.subheader("Distinct Counts & Perzentile (Sketches)")
+st.markdown("""
+Je Zelle **Linie × Schicht × Monat** liegen mergebare Sketches vor: HyperLogLog für die
+Anzahl verschiedener Auftragsnummern, logarithmische Buckets für Perzentile der
+Stillstandszeit. Roll-ups führen die Sketches der Zellen zusammen – Näherungswerte
+(≈ 1.6 % Standardfehler bzw. höchstens 1 % relativer Fehler gegenüber dem exakten Perzentil),
+ohne die Rohdaten erneut zu lesen.
+""")
+
+sketch_levels = ["Produktionslinie", "Schicht", "Jahr", "Monat"]
+sketch_by = st.multiselect("Gruppieren nach", sketch_levels, default=["Produktionslinie"])
+
+# Filter aus Slice/Dice oben übernehmen
+sketch_filters = {}
+if olap_jahr != "Alle":
+    sketch_filters["Jahr"] = [olap_jahr]
+if set(olap_schichten) != set(alle_schichten):
+    sketch_filters["Schicht"] = olap_schichten
+
+with span("sql.sketch_query"):
+    sketch_cube = load_sketch_cube(version=version)
+    distinct = sketch_cube.distinct_count("Auftragsnummer", by=sketch_by, filters=sketch_filters)
+    percentiles = sketch_cube.quantile("Stillstandszeit_Min", (0.5, 0.95), by=sketch_by, filters=sketch_filters)
+    sketch_result = distinct.merge(percentiles, on=sketch_by) if sketch_by else pd.concat([distinct, percentiles], axis=1)
+
+st.dataframe(
+    sketch_result.rename(columns={
+        "Auftragsnummer_distinct": "≈ Aufträge (distinct)",
+        "Stillstandszeit_Min_p50": "≈ Stillstand p50 (Min)",
+        "Stillstandszeit_Min_p95": "≈ Stillstand p95 (Min)",
+    }).round(1),
+    use_container_width=True,
+    hide_index=True
+)
+
+st.divider()
+
 # =========================
 # Summary
 # =========================
@@ -444,11 +551,12 @@ Diese Seite demonstriert:
 ✅ **SQL-ähnliche Queries** mit Pandas (JOIN, GROUP BY, AGGREGATE)  
 ✅ **Star Schema** - bewährtes Pattern für Data Warehousing  
 ✅ **Strukturierte Analyse** - wiederholbar und skalierbar  
+✅ **Kostenzuordnung** - Materialkosten und Energie je Gutteil und Produktvariante  
+✅ **OLAP-Würfel** - Drill-down, Slice & Dice und Pivot auf vorberechneten Teilaggregaten  
 
 **Nächste Schritte:**
 - Implementierung in echter SQL-Datenbank (PostgreSQL, MySQL)
 - ETL-Pipeline für automatisierte Datenintegration
-- OLAP-Cubes für multidimensionale Analysen
 """)
 
 st.divider()
@@ -462,3 +570,5 @@ st.markdown("""
 
 **📊 Technologie-Stack:** Python | Pandas | SQL-Logik | Relationale Datenmodellierung
 """)
+
+render_timing_panel()
@@ -12,7 +12,16 @@ import plotly.graph_objects as go
 import plotly.express as px
 from plotly.subplots import make_subplots
 from datetime import datetime
-from services.data_loader import load_production_data
+from typing import Optional
+from services.data_loader import load_partition_index
+from services.live_feed import get_feed, live_interval
+from services.page_data import (
+    load_error_index, load_kpi_aggregates, load_kpi_data, load_period_cube, load_rolling_kpis
+)
+from services.period_compare import MODES
+from services.refresh import current_snapshot
+from services.rolling_kpis import RollingKpis
+from services.timing import begin_page, render_timing_panel, span
 
 # =========================
 # Page Configuration
@@ -23,6 +32,10 @@ st.set_page_config(
     layout="wide",
     initial_sidebar_state="collapsed"
 )
+begin_page("kpi")
+
+# Pin the dataset version for the whole run (refreshes happen in the background)
+version = current_snapshot().version
 
 # =========================
 # Grafana-Style CSS
@@ -235,52 +248,15 @@ st.markdown("""
 # =========================
 # Data Loading
 # =========================
-@st.cache_data
-def load_and_prepare_data():
-    """Load and prepare production data"""
-    df = load_production_data().copy()
-
-    # Convert dates
-    df["Datum"] = pd.to_datetime(df["Datum"], errors="coerce")
-
-    # Convert numeric columns
-    numeric_cols = [
-        "Stueckzahl", "Ausschuss", "Betriebsstunden",
-        "Stillstandszeit_Min", "Materialkosten",
-        "Energieverbrauch_kWh", "Mitarbeiter_Produktion",
-        "MaxTemperatur", "Durchschnittstemperatur"
-    ]
-
-    for col in numeric_cols:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-
-    # Derived columns
-    df["Jahr"] = df["Datum"].dt.year
-    df["Monat"] = df["Datum"].dt.month
-    df["Jahr_Monat"] = df["Datum"].dt.to_period("M").astype(str)
-    df["Ausschussquote_%"] = (df["Ausschuss"] / df["Stueckzahl"] * 100).fillna(0)
-    df["Gutteile"] = df["Stueckzahl"] - df["Ausschuss"]
-    df["Energie_pro_Stueck"] = (df["Energieverbrauch_kWh"] / df["Stueckzahl"]).fillna(0)
-    df["Verfuegbarkeit_%"] = ((df["Betriebsstunden"] /
-        (df["Betriebsstunden"] + df["Stillstandszeit_Min"]/60)) * 100).fillna(0)
-
-    return df
+# Cached loaders live in services.page_data (shared with the warm-up worker)
 
-with st.spinner("⏳ Loading production data..."):
-    df = load_and_prepare_data()
+# Filter options come from the partition index, so no data is read for them
+partitions = load_partition_index(version=version)
 
 # =========================
 # Header
 # =========================
-st.markdown("""
-<div class='dashboard-header'>
-    <div class='dashboard-title'>📊 Production Monitoring Dashboard</div>
-    <div class='dashboard-subtitle'>
-        Real-time production metrics and analytics | Last updated: {} | {} records
-    </div>
-</div>
-""".format(datetime.now().strftime("%Y-%m-%d %H:%M:%S"), len(df)), unsafe_allow_html=True)
+header = st.empty()
 
 # =========================
 # Time Range & Filters
@@ -288,28 +264,147 @@ st.markdown("""
 col1, col2, col3, col4 = st.columns([2, 2, 2, 6])
 
 with col1:
-    jahre = sorted(df["Jahr"].dropna().unique())
+    jahre = sorted(int(j) for j in partitions["Jahr"].unique())
     selected_jahr = st.selectbox("📅 Year", jahre, index=len(jahre)-1)
 
 with col2:
-    linien = sorted(df["Produktionslinie"].dropna().unique())
+    linien = sorted(partitions["Produktionslinie"].unique())
     selected_linie = st.selectbox("🏭 Line", ["All"] + linien)
 
+# Load only the partitions the year/line filters need
+with st.spinner("⏳ Loading production data..."), span("kpi.load_and_prepare_data"):
+    df = load_kpi_data(
+        jahre=[selected_jahr],
+        linien=None if selected_linie == "All" else [selected_linie],
+        version=version
+    )
+
+header.markdown("""
+<div class='dashboard-header'>
+    <div class='dashboard-title'>📊 Production Monitoring Dashboard</div>
+    <div class='dashboard-subtitle'>
+        Real-time production metrics and analytics | Last updated: {} | {:,} records in selection
+        ({:,} in dataset)
+    </div>
+</div>
+""".format(
+    datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    len(df),
+    # Total from the partition index, since only the selected partitions are loaded
+    int(partitions["rows"].sum())
+), unsafe_allow_html=True)
+
 with col3:
     schichten = sorted(df["Schicht"].dropna().unique())
     selected_schicht = st.selectbox("🕐 Shift", ["All"] + schichten)
 
-# Apply filters
-df_filtered = df[df["Jahr"] == selected_jahr].copy()
-
-if selected_linie != "All":
-    df_filtered = df_filtered[df_filtered["Produktionslinie"] == selected_linie]
+# Live mode needs a configured feed (PORTFOLIO_LIVE_SOURCE, see services.live_feed)
+feed = get_feed()
+with col4:
+    compare_col, live_col = st.columns([3, 1])
+    compare_mode = compare_col.radio(
+        "↔️ Compare", list(MODES), horizontal=True,
+        format_func=lambda m: f"{m} ({MODES[m]})",
+        help="Deltas on the KPI cards: year-over-year, month-over-month or shift-over-shift"
+    )
+    live_mode = live_col.toggle(
+        "🔴 Live", value=False, disabled=feed is None,
+        help="Incremental KPIs from the MES feed" if feed is not None
+        else "Set PORTFOLIO_LIVE_SOURCE to a CSV file or tcp://host:port"
+    )
 
-if selected_schicht != "All":
-    df_filtered = df_filtered[df_filtered["Schicht"] == selected_schicht]
+# Apply filters & aggregate (cached per filter combination)
+with span("kpi.aggregates"):
+    agg = load_kpi_aggregates(selected_jahr, selected_linie, selected_schicht, version=version)
 
 st.markdown("<br>", unsafe_allow_html=True)
 
+# =========================
+# Rolling Windows
+# =========================
+def render_rolling_windows(rolling: RollingKpis, linie: str, schicht: str) -> None:
+    """Window sums are maintained incrementally, so this is a constant-time read."""
+    as_of = rolling.as_of.strftime("%Y-%m-%d %H:%M") if rolling.as_of is not None else "–"
+    st.markdown(
+        f"<div class='panel-title'>⏱️ Rolling Windows (as of shift starting {as_of})</div>",
+        unsafe_allow_html=True
+    )
+    st.dataframe(
+        rolling.as_frame(linie, schicht),
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "Stückzahl": st.column_config.NumberColumn(format="%.0f"),
+            "Ausschussquote_%": st.column_config.NumberColumn(format="%.2f"),
+            "Verfügbarkeit_%": st.column_config.NumberColumn(format="%.1f"),
+            "kWh_pro_Stück": st.column_config.NumberColumn(format="%.3f"),
+        }
+    )
+
+
+# =========================
+# Live Feed
+# =========================
+@st.fragment(run_every=live_interval())
+def render_live_kpis(linie: str, schicht: str) -> None:
+    """Reruns on its own timer; only rows received since the last run are processed."""
+    with span("kpi.live"):
+        feed.poll()
+        sums = feed.kpis.totals(linie, schicht)
+
+    updated = feed.updated.strftime("%H:%M:%S") if feed.updated else "–"
+    st.markdown(
+        f"### 🔴 Live Feed <span style='font-size: 0.8rem; color: #8e8e8e;'>"
+        f"{feed.source} | {sums.rows:,} records | last row {updated}</span>",
+        unsafe_allow_html=True
+    )
+
+    cols = st.columns(5)
+    cards = [
+        ("Scrap Rate", f"{sums.avg_scrap_rate:.2f}%", "running mean"),
+        ("Total Output", f"{sums.output:,.0f}", "units since start"),
+        ("Availability", f"{sums.avg_availability:.1f}%", "run / planned hours"),
+        ("Good Parts", f"{sums.output - sums.scrap:,.0f}", "units since start"),
+        ("Energy Consumption", f"{sums.energy:,.0f}", "kWh since start"),
+    ]
+    for col, (label, value, trend) in zip(cols, cards):
+        col.markdown(f"""
+        <div class='metric-card'>
+            <div class='metric-label'>{label}</div>
+            <div class='metric-value'>{value}</div>
+            <div class='metric-trend'>{trend}</div>
+        </div>
+        """, unsafe_allow_html=True)
+
+    recent = feed.kpis.recent
+    if linie != "All" and not recent.empty:
+        recent = recent[recent["Produktionslinie"] == linie]
+    if schicht != "All" and not recent.empty:
+        recent = recent[recent["Schicht"] == schicht]
+    if not recent.empty:
+        fig = go.Figure(go.Scatter(
+            x=recent.index, y=recent["Stueckzahl"], mode="lines",
+            line=dict(color='#3274d9', width=2), fill='tozeroy',
+            fillcolor='rgba(50, 116, 217, 0.1)', name="Output"
+        ))
+        fig.update_layout(
+            plot_bgcolor='#0b0c0e',
+            paper_bgcolor='#1a1d23',
+            font=dict(color='#d8d9da', size=11),
+            xaxis=dict(showgrid=False, title="latest records"),
+            yaxis=dict(showgrid=True, gridcolor='#2d3035', zeroline=False),
+            margin=dict(l=10, r=10, t=10, b=10),
+            height=200
+        )
+        st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
+
+    render_rolling_windows(feed.rolling, linie, schicht)
+
+
+if live_mode:
+    render_live_kpis(selected_linie, selected_schicht)
+    st.markdown("<br>", unsafe_allow_html=True)
+
 # =========================
 # KPI Metrics (Top Row)
 # =========================
@@ -317,27 +412,46 @@ st.markdown("### 📈 Key Performance Indicators")
 
 col1, col2, col3, col4, col5 = st.columns(5)
 
-total_output = df_filtered["Stueckzahl"].sum()
-total_scrap = df_filtered["Ausschuss"].sum()
-avg_scrap_rate = df_filtered["Ausschussquote_%"].mean()
-avg_availability = df_filtered["Verfuegbarkeit_%"].mean()
-total_energy = df_filtered["Energieverbrauch_kWh"].sum()
+with span("kpi.metrics"):
+    total_output = agg.total_output
+    total_scrap = agg.total_scrap
+    avg_scrap_rate = agg.avg_scrap_rate
+    avg_availability = agg.avg_availability
+    total_energy = agg.total_energy
+
+    # Prior-period deltas under the same filters (constant-time lookups in the period cube)
+    comparison = load_period_cube(version=version).compare(
+        compare_mode, selected_jahr, selected_linie, selected_schicht
+    )
+
+
+def trend(metric: str, relative: bool, higher_is_better: Optional[bool], unit: str) -> str:
+    """Trend line of a KPI card; green/red marks a favourable/unfavourable change."""
+    delta = comparison.delta(metric, relative=relative)
+    if delta is None:
+        return f"<div class='metric-trend'>no prior period ({MODES[compare_mode]})</div>"
+    if compare_mode == "YoY":
+        # The card shows the whole year, so the delta is all the line needs
+        text = f"{'↓' if delta < 0 else '↑'} {abs(delta):.2f}{unit} {comparison.label}"
+    else:
+        current = getattr(comparison.current, metric)
+        current_text = f"{current:.2f}%" if unit == "pp" else f"{current:,.0f}"
+        text = f"{comparison.label}: {current_text} ({'↓' if delta < 0 else '↑'} {abs(delta):.2f}{unit})"
+    trend_class = (
+        "" if higher_is_better is None or delta == 0
+        else "trend-up" if (delta > 0) == higher_is_better else "trend-down"
+    )
+    return f"<div class='metric-trend {trend_class}'>{text}</div>"
 
-# Calculate trends
-prev_year = df[df["Jahr"] == selected_jahr - 1] if selected_jahr > df["Jahr"].min() else df_filtered
-prev_scrap_rate = prev_year["Ausschussquote_%"].mean() if len(prev_year) > 0 else avg_scrap_rate
-scrap_trend = avg_scrap_rate - prev_scrap_rate
 
 with col1:
     status_class = "critical" if avg_scrap_rate > 5 else "warning" if avg_scrap_rate > 3 else ""
-    trend_class = "trend-down" if scrap_trend < 0 else "trend-up"
-    trend_icon = "↓" if scrap_trend < 0 else "↑"
 
     st.markdown(f"""
     <div class='metric-card'>
         <div class='metric-label'>Scrap Rate</div>
         <div class='metric-value {status_class}'>{avg_scrap_rate:.2f}%</div>
-        <div class='metric-trend {trend_class}'>{trend_icon} {abs(scrap_trend):.2f}% vs prev year</div>
+        {trend("avg_scrap_rate", False, False, "pp")}
     </div>
     """, unsafe_allow_html=True)
 
@@ -346,7 +460,7 @@ with col2:
     <div class='metric-card'>
         <div class='metric-label'>Total Output</div>
         <div class='metric-value'>{total_output:,.0f}</div>
-        <div class='metric-trend'>units produced</div>
+        {trend("output", True, True, "%")}
     </div>
     """, unsafe_allow_html=True)
 
@@ -356,7 +470,7 @@ with col3:
     <div class='metric-card'>
         <div class='metric-label'>Availability</div>
         <div class='metric-value {status_class}'>{avg_availability:.1f}%</div>
-        <div class='metric-trend'>average uptime</div>
+        {trend("avg_availability", False, True, "pp")}
     </div>
     """, unsafe_allow_html=True)
 
@@ -365,7 +479,7 @@ with col4:
     <div class='metric-card'>
         <div class='metric-label'>Good Parts</div>
         <div class='metric-value'>{total_output - total_scrap:,.0f}</div>
-        <div class='metric-trend'>{((total_output - total_scrap) / total_output * 100):.1f}% quality</div>
+        {trend("good_parts", True, True, "%")}
     </div>
     """, unsafe_allow_html=True)
 
@@ -374,24 +488,85 @@ with col5:
     <div class='metric-card'>
         <div class='metric-label'>Energy Consumption</div>
         <div class='metric-value'>{total_energy:,.0f}</div>
-        <div class='metric-trend'>kWh total</div>
+        {trend("energy", True, None, "%")}
     </div>
     """, unsafe_allow_html=True)
 
 st.markdown("<br>", unsafe_allow_html=True)
 
+# =========================
+# OEE (Availability × Performance × Quality)
+# =========================
+# Ratio of sums over the filtered rows (services.oee); performance against the ideal rate per variant
+col1, col2 = st.columns([2, 3])
+
+with col1:
+    st.markdown("<div class='panel-title'>🏁 OEE</div>", unsafe_allow_html=True)
+    oee_cards = [
+        ("OEE", agg.oee["OEE_%"]),
+        ("Availability", agg.oee["Verfuegbarkeit_%"]),
+        ("Performance", agg.oee["Leistung_%"]),
+        ("Quality", agg.oee["Qualitaet_%"]),
+    ]
+    for col, (label, value) in zip(st.columns(2) * 2, oee_cards):
+        col.markdown(f"""
+        <div class='metric-card' style='margin-bottom: 1rem;'>
+            <div class='metric-label'>{label}</div>
+            <div class='metric-value'>{value:.1f}%</div>
+        </div>
+        """, unsafe_allow_html=True)
+
+with col2, span("kpi.chart.oee_lines"):
+    st.markdown("<div class='panel-title'>🏭 OEE by Line</div>", unsafe_allow_html=True)
+
+    line_oee = agg.line_oee
+
+    fig = go.Figure()
+    for column, name, color in [
+        ("Verfuegbarkeit_%", "Availability", '#3274d9'),
+        ("Leistung_%", "Performance", '#ff9800'),
+        ("Qualitaet_%", "Quality", '#52c41a'),
+        ("OEE_%", "OEE", '#f5222d'),
+    ]:
+        fig.add_trace(go.Bar(
+            x=line_oee["Produktionslinie"],
+            y=line_oee[column],
+            name=name,
+            marker_color=color,
+            hovertemplate=f'<b>%{{x}}</b><br>{name}: %{{y:.1f}}%<extra></extra>'
+        ))
+
+    fig.update_layout(
+        plot_bgcolor='#0b0c0e',
+        paper_bgcolor='#1a1d23',
+        font=dict(color='#d8d9da', size=11),
+        barmode='group',
+        xaxis=dict(showgrid=False, zeroline=False),
+        yaxis=dict(showgrid=True, gridcolor='#2d3035', zeroline=False, title="%", range=[0, 105]),
+        margin=dict(l=10, r=10, t=10, b=10),
+        height=300,
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+
+    st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
+
+st.markdown("<br>", unsafe_allow_html=True)
+
+# Latest shift / 24h / 7d / 30d at the end of the history (the live view shows its own)
+if not live_mode:
+    with span("kpi.rolling_windows"):
+        render_rolling_windows(load_rolling_kpis(version=version), selected_linie, selected_schicht)
+    st.markdown("<br>", unsafe_allow_html=True)
+
 # =========================
 # Main Charts Row 1
 # =========================
 col1, col2 = st.columns(2)
 
-with col1:
+with col1, span("kpi.chart.production_trend"):
     st.markdown("<div class='panel-title'>📈 Production Trend (Monthly)</div>", unsafe_allow_html=True)
 
-    monthly = df_filtered.groupby("Jahr_Monat").agg({
-        "Stueckzahl": "sum",
-        "Gutteile": "sum"
-    }).reset_index()
+    monthly = agg.monthly
 
     fig = go.Figure()
 
@@ -441,10 +616,10 @@ with col1:
 
     st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
 
-with col2:
+with col2, span("kpi.chart.scrap_trend"):
     st.markdown("<div class='panel-title'>📉 Scrap Rate Trend</div>", unsafe_allow_html=True)
 
-    scrap_monthly = df_filtered.groupby("Jahr_Monat")["Ausschussquote_%"].mean().reset_index()
+    scrap_monthly = agg.scrap_monthly
 
     fig = go.Figure()
 
@@ -486,13 +661,10 @@ st.markdown("<br>", unsafe_allow_html=True)
 # =========================
 col1, col2 = st.columns(2)
 
-with col1:
+with col1, span("kpi.chart.lines_comparison"):
     st.markdown("<div class='panel-title'>🏭 Production Lines Comparison</div>", unsafe_allow_html=True)
 
-    line_kpi = df_filtered.groupby("Produktionslinie").agg({
-        "Stueckzahl": "sum",
-        "Ausschussquote_%": "mean"
-    }).reset_index()
+    line_kpi = agg.line_kpi
 
     fig = go.Figure()
 
@@ -526,14 +698,10 @@ with col1:
 
     st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
 
-with col2:
+with col2, span("kpi.chart.shift_performance"):
     st.markdown("<div class='panel-title'>🕐 Shift Performance</div>", unsafe_allow_html=True)
 
-    shift_kpi = df_filtered.groupby("Schicht").agg({
-        "Stueckzahl": "sum",
-        "Ausschussquote_%": "mean",
-        "Verfuegbarkeit_%": "mean"
-    }).reset_index()
+    shift_kpi = agg.shift_kpi
 
     fig = make_subplots(specs=[[{"secondary_y": True}]])
 
@@ -581,6 +749,88 @@ with col2:
 
 st.markdown("<br>", unsafe_allow_html=True)
 
+# =========================
+# Error Code Pareto
+# =========================
+# Postings per error code/line/shift/year: filters and drill-through are set intersections
+PARETO_METRICS = {"Anzahl": "Count", "Ausschuss": "Scrap", "Stillstand_Min": "Downtime (min)"}
+
+with span("kpi.error_index"):
+    error_index = load_error_index(version=version)
+
+st.markdown("### 🧯 Error Code Pareto")
+pareto_metric = st.radio(
+    "Pareto by", list(PARETO_METRICS), horizontal=True,
+    format_func=PARETO_METRICS.get, key="pareto_metric"
+)
+error_filters = dict(
+    jahr=selected_jahr,
+    linie=None if selected_linie == "All" else selected_linie,
+    schicht=None if selected_schicht == "All" else selected_schicht
+)
+pareto = error_index.pareto(pareto_metric, **error_filters)
+
+col1, col2 = st.columns([3, 2])
+
+with col1, span("kpi.chart.error_pareto"):
+    st.markdown("<div class='panel-title'>📉 Pareto (A = codes up to 80% cumulative)</div>",
+                unsafe_allow_html=True)
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    fig.add_trace(
+        go.Bar(
+            x=pareto["Fehlercode"],
+            y=pareto[pareto_metric],
+            name=PARETO_METRICS[pareto_metric],
+            marker_color=['#f5222d' if c == "A" else '#ff9800' if c == "B" else '#3274d9'
+                          for c in pareto["Klasse"]],
+            hovertemplate='<b>%{x}</b><br>%{y:,.0f}<extra></extra>'
+        ),
+        secondary_y=False
+    )
+    fig.add_trace(
+        go.Scatter(
+            x=pareto["Fehlercode"],
+            y=pareto["Kumuliert_%"],
+            name="Cumulative %",
+            line=dict(color='#52c41a', width=3),
+            mode='lines+markers',
+            hovertemplate='<b>%{x}</b><br>Cumulative: %{y:.1f}%<extra></extra>'
+        ),
+        secondary_y=True
+    )
+    fig.add_hline(y=80, line_dash="dash", line_color="#ff9800", secondary_y=True)
+    fig.update_layout(
+        plot_bgcolor='#0b0c0e',
+        paper_bgcolor='#1a1d23',
+        font=dict(color='#d8d9da', size=11),
+        xaxis=dict(showgrid=False, zeroline=False),
+        margin=dict(l=10, r=10, t=10, b=10),
+        height=300,
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+    fig.update_yaxes(title_text=PARETO_METRICS[pareto_metric], showgrid=True,
+                     gridcolor='#2d3035', secondary_y=False)
+    fig.update_yaxes(title_text="Cumulative (%)", range=[0, 105], showgrid=False, secondary_y=True)
+    st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
+
+with col2:
+    st.markdown("<div class='panel-title'>🏭 Error Codes × Lines</div>", unsafe_allow_html=True)
+    st.dataframe(
+        error_index.matrix("Produktionslinie", pareto_metric, **error_filters),
+        use_container_width=True,
+        column_config={c: st.column_config.NumberColumn(format="%.0f") for c in linien}
+    )
+    st.dataframe(pareto, use_container_width=True, hide_index=True)
+
+# Drill-through to the underlying orders
+if not pareto.empty:
+    drill_code = st.selectbox("🔎 Drill-through: orders for error code", pareto["Fehlercode"].tolist())
+    orders = error_index.orders(drill_code, **error_filters)
+    st.caption(f"{len(orders):,} orders with {drill_code} in the current selection")
+    st.dataframe(orders, use_container_width=True, hide_index=True, height=300)
+
+st.markdown("<br>", unsafe_allow_html=True)
+
 # =========================
 # Alerts & Status
 # =========================
@@ -843,7 +1093,9 @@ st.markdown("""
 <div style='text-align: center; color: #6c757d; padding: 2rem; border-top: 1px solid #2d3035;'>
     <p style='margin: 0;'><strong>Production Monitoring Dashboard v2.0</strong></p>
     <p style='margin: 0.5rem 0 0 0; font-size: 0.85rem;'>
-        Powered by Streamlit & Plotly | Data refresh rate: Real-time
+        Powered by Streamlit & Plotly | Data refresh rate: {}
     </p>
 </div>
-""", unsafe_allow_html=True)
+""".format(f"live every {live_interval():g}s" if live_mode else "snapshot"), unsafe_allow_html=True)
+
+render_timing_panel()
@@ -0,0 +1,156 @@
+"""
+Versteckter Admin-Bereich (Diagnose) für app.py.
+
+Sichtbar mit PORTFOLIO_ADMIN=1 oder mit dem Query-Parameter
+?admin=<Token>, sofern PORTFOLIO_ADMIN_TOKEN gesetzt ist (ohne Token ist
+der Bereich per URL nicht erreichbar).
+"""
+
+import hmac
+import os
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from services.memory import (
+    cache_columns, cache_report, loader_cache_report, session_report, streamlit_cache_report
+)
+from services.profiling import MAX_PROFILES, PROFILE_DIR, flame_tree, list_profiles, top_functions
+from services.refresh import current_snapshot, previous_snapshot, refresh_interval, request_refresh
+
+
+def admin_requested() -> bool:
+    """True bei PORTFOLIO_ADMIN=1 oder Query-Parameter ?admin=<PORTFOLIO_ADMIN_TOKEN>."""
+    if os.environ.get("PORTFOLIO_ADMIN", "0") == "1":
+        return True
+    token = os.environ.get("PORTFOLIO_ADMIN_TOKEN", "")
+    given = st.query_params.get("admin", "")
+    # Vergleich in konstanter Zeit; ohne konfiguriertes Token kein Zugang per URL
+    return bool(token) and hmac.compare_digest(given.encode("utf-8"), token.encode("utf-8"))
+
+
+def _render_profiles() -> None:
+    st.caption(
+        "Profil eines Seitenlaufs aufnehmen: Seite mit ?profile=1&admin=<Token> aufrufen "
+        f"(oder PORTFOLIO_PROFILE=1). Ablage: {PROFILE_DIR}, höchstens {MAX_PROFILES} Dateien"
+    )
+
+    profiles = list_profiles()
+    if profiles.empty:
+        st.info("Noch keine Profile vorhanden.")
+        return
+
+    st.dataframe(profiles, use_container_width=True, hide_index=True)
+
+    datei = st.selectbox("Profil", profiles["Datei"], key="admin_profile")
+    path = PROFILE_DIR / datei
+
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        sort = st.radio(
+            "Sortierung", ["cumulative", "tottime"],
+            format_func=lambda s: "Gesamtzeit" if s == "cumulative" else "Eigenzeit",
+            key="admin_profile_sort"
+        )
+        n = st.number_input("Top-N", min_value=5, max_value=200, value=30, step=5, key="admin_profile_n")
+    with col2:
+        st.dataframe(top_functions(path, n=int(n), sort=sort), use_container_width=True, hide_index=True)
+
+    tree = flame_tree(path)
+    fig = px.icicle(
+        tree, ids="id", parents="parent", names="label", values="value",
+        branchvalues="total"
+    )
+    fig.update_traces(root_color="lightgrey", tiling_orientation="v")
+    fig.update_layout(height=600, margin=dict(t=10, l=10, r=10, b=10))
+    st.plotly_chart(fig, use_container_width=True)
+
+    with open(path, "rb") as f:
+        st.download_button("📥 .prof herunterladen", f, file_name=datei, key="admin_profile_download")
+
+
+def _mb(df, column: str = "Bytes"):
+    """Bytes-Spalte für die Anzeige in MB umrechnen."""
+    return df.assign(**{column: (df[column] / 1024**2).round(3)}).rename(columns={column: "MB"})
+
+
+def _render_memory() -> None:
+    caches = cache_report()
+    loader = loader_cache_report()
+    sessions = session_report()
+
+    session_total = sessions.loc[sessions["Schluessel"] == "(gesamt)", "Bytes"].sum()
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Gecachte Ergebnisse", f"{caches['Bytes'].sum() / 1024**2:,.1f} MB",
+                f"{len(caches)} Einträge", delta_color="off")
+    col2.metric("Loader-Spalten-Cache", f"{loader['Bytes'].sum() / 1024**2:,.1f} MB",
+                f"{len(loader)} Spalten", delta_color="off")
+    col3.metric("Session State", f"{session_total / 1024**2:,.1f} MB",
+                f"{sessions['Session'].nunique()} Sessions", delta_color="off")
+
+    st.markdown("#### Gecachte Ergebnisse (beim Berechnen erfasst)")
+    if caches.empty:
+        st.info("Noch keine gecachten Ergebnisse erfasst.")
+    else:
+        st.dataframe(_mb(caches), use_container_width=True, hide_index=True)
+        labels = [f"{r.Funktion}({r.Argumente})" for r in caches.itertuples()]
+        selected = st.selectbox("Spalten je Eintrag", range(len(labels)),
+                                format_func=lambda i: labels[i], key="admin_memory_entry")
+        entry = caches.iloc[selected]
+        st.dataframe(_mb(cache_columns(entry["Funktion"], entry["Argumente"])),
+                     use_container_width=True, hide_index=True)
+
+    st.markdown("#### Streamlit-Cache (serialisiert)")
+    st.dataframe(_mb(streamlit_cache_report()), use_container_width=True, hide_index=True)
+
+    st.markdown("#### Loader-Spalten-Cache")
+    st.dataframe(_mb(loader), use_container_width=True, hide_index=True)
+
+    st.markdown("#### Session State")
+    st.dataframe(_mb(sessions), use_container_width=True, hide_index=True)
+
+
+def _render_snapshots() -> None:
+    current = current_snapshot()
+    previous = previous_snapshot()
+
+    col1, col2 = st.columns(2)
+    col1.metric("Aktueller Datenstand", f"Version {current.version}",
+                current.created.strftime("%d.%m.%Y %H:%M:%S"), delta_color="off")
+    if previous is not None:
+        col2.metric("Vorheriger Datenstand", f"Version {previous.version}",
+                    previous.created.strftime("%d.%m.%Y %H:%M:%S"), delta_color="off")
+
+    interval = refresh_interval()
+    st.caption(
+        f"Prüfung auf geänderte Quelldateien alle {interval:g}s (PORTFOLIO_REFRESH_INTERVAL)."
+        if interval > 0 else "Automatische Aktualisierung ist deaktiviert (PORTFOLIO_REFRESH_INTERVAL=0)."
+    )
+    st.dataframe(
+        pd.DataFrame(
+            [{"Datei": path, "Geaendert": pd.Timestamp(mtime_ns, unit="ns"), "Bytes": size}
+             for path, (mtime_ns, size) in current.signatures.items()]
+        ),
+        use_container_width=True, hide_index=True
+    )
+
+    if st.button("🔄 Jetzt neu laden", key="admin_refresh", disabled=interval <= 0):
+        # Baut im Refresher-Thread auf; Seiten nutzen bis zum Tausch den bisherigen Stand
+        request_refresh()
+        st.info("Aktualisierung angestoßen – der neue Stand wird nach dem Aufbau aktiv.")
+
+
+def render_admin_section() -> None:
+    """Diagnose-Werkzeuge: aufgenommene Profile, Speicherbericht und Datenstand."""
+    st.markdown("---")
+    st.markdown("## 🛠️ Admin")
+
+    tab_profiles, tab_memory, tab_data = st.tabs(["⏱️ Profile", "🧠 Speicher", "🔄 Datenstand"])
+    with tab_profiles:
+        _render_profiles()
+    with tab_memory:
+        _render_memory()
+    with tab_data:
+        _render_snapshots()
@@ -0,0 +1,96 @@
+"""
+Kostenzuordnung je Produktvariante: Materialkosten und Energie je Gutteil.
+
+Grundlage ist eine Summentabelle je Produkt × Modifikation × Linie × Monat
+(services.kpis.sum_table, ein bincount-Durchlauf). Jede Sicht – je
+Variante, je Variante und Linie, mit Linien- oder Jahresfilter – ist ein
+rollup dieser Tabelle; die Kennzahlen entstehen erst danach als Quotient
+der Summen. Bezugsgröße sind Gutteile: Ausschuss verursacht Kosten, trägt
+sie aber nicht, sodass Varianten mit hohem Ausschuss teurer erscheinen.
+"""
+
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from services.kpis import add_kpis, rollup, sum_table
+from services.ranking import top_k
+
+# Feinste Körnung der Summentabelle
+GRAIN = ["Produkt", "Modifikation", "Produktionslinie", "Monat"]
+VARIANT = ["Produkt", "Modifikation"]
+
+COST_SUMS = ["Datensaetze", "Stueckzahl", "Ausschuss", "Gutteile", "Materialkosten", "Energieverbrauch_kWh"]
+
+# Kennzahlen der Rangliste (Definitionen in services.kpis.KPIS)
+COST_KPIS = ("Materialkosten_pro_Gutteil", "kWh_pro_Gutteil", "Ausschussquote_%")
+
+
+class CostAttribution:
+    """Materialkosten und Energie je Gutteil über beliebige Gruppierungen der Körnung GRAIN."""
+
+    def __init__(self, df: pd.DataFrame):
+        # Monat als Ganzzahl gruppieren, Beschriftung erst an der kompakten Tabelle
+        df = df.assign(Monat=df["Datum"].dt.year * 100 + df["Datum"].dt.month)
+        table = sum_table(df, GRAIN, COST_SUMS)
+        monat = table["Monat"].astype("int64")
+        table["Monat"] = (monat // 100).astype(str) + "-" + (monat % 100).astype(str).str.zfill(2)
+        self.table = table
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    @property
+    def variants(self) -> int:
+        return len(self.table[VARIANT].drop_duplicates())
+
+    def _filtered(self, linie: Optional[str], jahr: Optional[int]) -> pd.DataFrame:
+        table = self.table
+        if linie is not None:
+            table = table[table["Produktionslinie"] == linie]
+        if jahr is not None:
+            table = table[table["Monat"].str.startswith(f"{jahr}-")]
+        return table
+
+    def view(
+        self,
+        by: Sequence[str] = VARIANT,
+        linie: Optional[str] = None,
+        jahr: Optional[int] = None
+    ) -> pd.DataFrame:
+        """Summen und Kosten je Gruppe (by ⊆ GRAIN) für eine Linie/ein Jahr (None = alle)."""
+        return rollup(self._filtered(linie, jahr), list(by), COST_KPIS)
+
+    def ranking(
+        self,
+        metric: str = "Materialkosten_pro_Gutteil",
+        by: Sequence[str] = VARIANT,
+        k: Optional[int] = None,
+        min_good_units: Optional[float] = None,
+        linie: Optional[str] = None,
+        jahr: Optional[int] = None,
+        ascending: bool = False
+    ) -> pd.DataFrame:
+        """
+        Rangliste nach metric (teuerste zuerst) mit Vergleich zum Gesamtwert.
+
+        Returns:
+            pd.DataFrame: Rang, by-Spalten, Summen, COST_KPIS sowie
+            Index (metric relativ zum Gesamtwert der Auswahl, 100 = Durchschnitt)
+            und Kostenanteil_% (Anteil an den Materialkosten der Auswahl)
+        """
+        if metric not in COST_KPIS:
+            raise ValueError(f"Unbekannte Kennzahl {metric!r} (erlaubt: {', '.join(COST_KPIS)})")
+        table = self._filtered(linie, jahr)
+        overall = add_kpis(rollup(table, []), [metric])[metric].iloc[0]
+        view = rollup(table, list(by), COST_KPIS)
+
+        ranked = top_k(view, metric, k=k, ascending=ascending,
+                       min_volume=min_good_units, volume_column="Gutteile").reset_index(drop=True)
+        total_cost = table["Materialkosten"].sum()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ranked["Index"] = (ranked[metric] / overall * 100).round(1)
+            ranked["Kostenanteil_%"] = (ranked["Materialkosten"] / total_cost * 100).round(2)
+        ranked.insert(0, "Rang", np.arange(1, len(ranked) + 1))
+        return ranked
@@ -1,21 +1,406 @@
-import pandas as pd
-import streamlit as st
+import glob
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
 from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from services.metrics import cache_data
+from services.partition_store import MANIFEST_NAME, is_partitioned, prune_partitions, read_manifest
+from services.timing import span
+
+BASE_PATH = Path(__file__).resolve().parent.parent
+
+# Datenquelle per Umgebungsvariable überschreibbar (z. B. für Benchmarks)
+DEFAULT_DATA_PATH = Path(os.environ.get(
+    "PORTFOLIO_DATA_PATH", BASE_PATH / "data" / "produktionsdaten_premium_5Jahre.csv"
+))
+PARTITION_ROOT = Path(os.environ.get(
+    "PORTFOLIO_PARTITION_ROOT", BASE_PATH / "data" / "partitioned"
+))
+
+# Textspalten mit wenigen Ausprägungen – werden auf allen Lesepfaden als Kategorie geführt
+CATEGORICAL_COLS = [
+    "Unternehmen", "Produkt", "Modifikation", "Produktionslinie", "Schicht",
+    "Softwareversion", "Firmwareversion", "EndOfLine_Test", "Status", "Fehlercode"
+]
+
+# Spalten-Cache pro Dateiversion: (Pfad, (mtime_ns, size)) -> (Spaltenliste, {Spalte: Series})
+# Jede Spalte wird nur einmal gelesen und von allen Pages gemeinsam genutzt.
+_column_cache: Dict[Tuple[str, Tuple[int, int]], Tuple[List[str], Dict[str, pd.Series]]] = {}
+_cache_lock = threading.Lock()
+
+# Zuletzt zusammengesetzte Frames: (Signaturen, Spalten) -> DataFrame
+# Wiederholte Anfragen derselben Auswahl sparen das erneute Zusammensetzen/Verbinden.
+_frame_cache: "OrderedDict[Tuple, pd.DataFrame]" = OrderedDict()
+MAX_FRAMES = 8
+
+# Dateiversionen, die ein Datenstand (services.refresh) noch benötigt –
+# sie bleiben neben der aktuellen Version im Cache (Double Buffering)
+_retained: Set[Tuple[str, Tuple[int, int]]] = set()
+
+# Fest vorgegebene Dateiversionen für den laufenden Thread: {Pfad: (mtime_ns, size)}
+_pinned: ContextVar[Optional[Dict[str, Tuple[int, int]]]] = ContextVar("pinned_signatures", default=None)
+
+
+class SourceChangedError(RuntimeError):
+    """Eine Datei entspricht beim Lesen nicht mehr der angeforderten (fest vorgegebenen) Version."""
+
+
+def clear_column_cache() -> None:
+    """Leert den Spalten-Cache (z. B. für Benchmarks oder nach Datenänderungen)."""
+    with _cache_lock:
+        _column_cache.clear()
+        _frame_cache.clear()
+
+
+def retain_signatures(signatures: Iterable[Tuple[str, Tuple[int, int]]]) -> None:
+    """
+    Legt fest, welche Dateiversionen im Cache bleiben; alle anderen
+    älteren Versionen werden sofort freigegeben.
+    """
+    keep = set(signatures)
+    with _cache_lock:
+        _retained.clear()
+        _retained.update(keep)
+        for path, sig in list(_column_cache):
+            if (path, sig) not in keep and _is_stale(path, sig):
+                del _column_cache[(path, sig)]
+        _drop_frames()
+
+
+def _is_stale(path: str, sig: Tuple[int, int]) -> bool:
+    try:
+        return _file_signature(Path(path)) != sig
+    except OSError:
+        return True
+
+
+@contextmanager
+def pin_signatures(signatures: Optional[Dict[str, Tuple[int, int]]]) -> Iterator[None]:
+    """
+    Liest im Block die angegebenen Dateiversionen aus dem Cache statt
+    der Signatur der Datei auf der Platte (konsistenter Datenstand,
+    auch wenn die Datei zwischenzeitlich ersetzt wurde).
+    """
+    token = _pinned.set(signatures)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+def column_cache_columns() -> List[Tuple[str, str, pd.Series]]:
+    """Alle gecachten Spalten als (Datei, Spalte, Series)."""
+    with _cache_lock:
+        return [
+            (path, name, series)
+            for (path, _), entry in _column_cache.items()
+            for name, series in entry[1].items()
+        ]
+
+
+def column_cache_stats() -> Dict[str, Tuple[int, int]]:
+    """Zeilen und Speicherbedarf (Bytes) der gecachten Spalten je Datei."""
+    stats: Dict[str, Tuple[int, int]] = {}
+    for path, _, series in column_cache_columns():
+        rows, size = stats.get(path, (0, 0))
+        stats[path] = (max(rows, len(series)), size + int(series.memory_usage(index=False, deep=True)))
+    return stats
 
 
-@st.cache_data
-def load_production_data() -> pd.DataFrame:
+def _read_partition(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Liest eine Partitionsdatei bzw. ausgewählte Spalten daraus
+    (läuft ggf. in einem Worker-Thread).
+    """
+    df = pd.read_csv(path, usecols=columns, dtype={col: "category" for col in CATEGORICAL_COLS})
+    if "Datum" in df.columns:
+        df["Datum"] = pd.to_datetime(df["Datum"])
+    return df
+
+
+def _resolve_sources(source: Union[str, Path]) -> List[Path]:
+    """
+    Löst eine Datei, einen Ordner oder ein Glob-Muster in CSV-Dateien auf.
+    """
+    path = Path(source)
+    if path.is_dir():
+        # Dateien mit "_" (z. B. _manifest.csv) sind Metadaten, keine Partitionen
+        files = sorted(p for p in path.rglob("*.csv") if not p.name.startswith("_"))
+    elif glob.has_magic(str(source)):
+        files = sorted(Path(p) for p in glob.glob(str(source), recursive=True))
+    else:
+        files = [path]
+
+    if not files:
+        raise FileNotFoundError(f"Keine CSV-Dateien gefunden: {source}")
+    return files
+
+
+def _file_signature(path: Path) -> Tuple[int, int]:
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _check_version(path: str, sig: Tuple[int, int]) -> None:
+    """
+    Stellt sicher, dass die Datei auf der Platte der Version sig entspricht –
+    sonst würden Daten einer neueren Datei unter der Signatur eines älteren
+    Datenstands im Cache landen.
+    """
+    try:
+        current = _file_signature(Path(path))
+    except OSError as exc:
+        raise SourceChangedError(f"{path}: Datei nicht mehr lesbar ({exc})") from exc
+    if current != sig:
+        raise SourceChangedError(f"{path}: Datei wurde seit dem Datenstand geändert")
+
+
+def _signature(path: Union[str, Path]) -> Tuple[int, int]:
+    """Signatur einer Datei – bzw. die im Thread fest vorgegebene Version."""
+    pinned = _pinned.get()
+    if pinned is not None and str(path) in pinned:
+        return pinned[str(path)]
+    return _file_signature(Path(path))
+
+
+def source_signatures() -> Dict[str, Tuple[int, int]]:
+    """
+    Signaturen aller Standard-Datenquellen der Pages: Gesamtdatei und
+    (falls vorhanden) Manifest und Partitionsdateien.
+    """
+    signatures = {str(DEFAULT_DATA_PATH): _file_signature(DEFAULT_DATA_PATH)}
+    if is_partitioned(PARTITION_ROOT):
+        manifest_path = PARTITION_ROOT / MANIFEST_NAME
+        if manifest_path.exists():
+            signatures[str(manifest_path)] = _file_signature(manifest_path)
+        for path in read_manifest(PARTITION_ROOT)["path"]:
+            signatures[path] = _file_signature(Path(path))
+    return signatures
+
+
+def preload_sources() -> None:
+    """
+    Lädt alle Spalten der Standard-Datenquellen in den Cache – danach
+    bedient der Cache jede Spaltenauswahl dieses Datenstands ohne Dateizugriff.
+    """
+    load_production_data()
+    if is_partitioned(PARTITION_ROOT):
+        manifest = read_manifest(PARTITION_ROOT)
+        load_production_data(jahre=sorted(int(j) for j in manifest["Jahr"].unique()))
+
+
+def _concat_partitions(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Verbindet Partitionen und vereinheitlicht dabei die Kategorien,
+    damit die kategorialen Spalten nicht zu object-Spalten werden.
+    """
+    if len(frames) == 1:
+        return frames[0]
+
+    df = pd.concat(frames, ignore_index=True)
+    for col in CATEGORICAL_COLS:
+        if col in df.columns and isinstance(frames[0][col].dtype, pd.CategoricalDtype):
+            df[col] = union_categoricals([f[col] for f in frames], ignore_order=True)
+    return df
+
+
+def _empty_frame(columns: Optional[List[str]], header_path: Optional[str] = None) -> pd.DataFrame:
+    """
+    Leeres Ergebnis mit den angeforderten Spalten – ohne columns mit dem
+    Dateikopf von header_path (nur die Kopfzeile wird gelesen).
+    """
+    if columns is None:
+        columns = list(pd.read_csv(header_path, nrows=0).columns) if header_path is not None else []
+    dtypes = {"Datum": "datetime64[us]", **{col: "category" for col in CATEGORICAL_COLS}}
+    return pd.DataFrame({col: pd.Series(dtype=dtypes.get(col, "object")) for col in columns})
+
+
+def _drop_frames() -> None:
+    """Verwirft zusammengesetzte Frames, deren Dateiversionen nicht mehr im Spalten-Cache liegen."""
+    for key in list(_frame_cache):
+        signatures, _ = key
+        if any(signature not in _column_cache for signature in signatures):
+            del _frame_cache[key]
+
+
+def _load_columns(
+    signatures: Tuple[Tuple[str, Tuple[int, int]], ...],
+    columns: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """
+    Lädt die angeforderten Spalten aller Dateien. Gelesen wird nur, was für
+    eine Datei noch nicht (oder in einer älteren Version) im Cache liegt –
+    bei mehreren Dateien parallel über einen Thread-Pool (der C-Parser von
+    pandas gibt den GIL frei; ein Prozess-Pool per fork wäre im
+    mehrfädigen Streamlit-Server nicht sicher).
+
+    Raises:
+        SourceChangedError: eine fehlende Spalte müsste gelesen werden, die
+            Datei entspricht aber nicht mehr der Signatur (z. B. eines älteren
+            Datenstands); es wird nichts gecacht
+    """
+    frame_key = (signatures, None if columns is None else tuple(columns))
+    with _cache_lock:
+        if frame_key in _frame_cache:
+            _frame_cache.move_to_end(frame_key)
+            return _frame_cache[frame_key].copy(deep=False)
+
+    entries = []
+    jobs = []
+    with _cache_lock:
+        for path, sig in signatures:
+            entry = _column_cache.get((path, sig))
+            if entry is None:
+                # Ältere Versionen der Datei freigeben, sofern kein Datenstand sie hält
+                for key in [k for k in _column_cache if k[0] == path]:
+                    if key not in _retained:
+                        del _column_cache[key]
+                _drop_frames()
+                _check_version(path, sig)
+                header = list(pd.read_csv(path, nrows=0).columns)
+                entry = (header, {})
+                _column_cache[(path, sig)] = entry
+
+            wanted = entry[0] if columns is None else list(columns)
+            missing = [c for c in wanted if c not in entry[1]]
+            entries.append((entry, wanted))
+            if missing:
+                jobs.append((entry, path, sig, missing))
+
+    for _, path, sig, _ in jobs:
+        _check_version(path, sig)
+    with span("data.read_columns") if jobs else nullcontext():
+        if len(jobs) > 1:
+            workers = min(len(jobs), os.cpu_count() or 1)
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                parsed = list(pool.map(
+                    _read_partition,
+                    [path for _, path, _, _ in jobs],
+                    [missing for _, _, _, missing in jobs]
+                ))
+        else:
+            parsed = [_read_partition(path, missing) for _, path, _, missing in jobs]
+    # Während des Lesens ersetzte Dateien ebenfalls verwerfen
+    for _, path, sig, _ in jobs:
+        _check_version(path, sig)
+
+    with _cache_lock:
+        for (entry, _, _, _), df in zip(jobs, parsed):
+            for col in df.columns:
+                entry[1][col] = df[col]
+        frames = [pd.DataFrame({c: entry[1][c] for c in wanted}) for entry, wanted in entries]
+
+    df = _concat_partitions(frames)
+    with _cache_lock:
+        _frame_cache[frame_key] = df
+        while len(_frame_cache) > MAX_FRAMES:
+            _frame_cache.popitem(last=False)
+    # Jeder Aufrufer erhält ein eigenes Objekt: Spalten hinzufügen/entfernen
+    # ändert den Cache nicht, Werte schützt Copy-on-Write
+    return df.copy(deep=False)
+
+
+def _filter_partitions(
+    df: pd.DataFrame,
+    jahre: Optional[Iterable[int]],
+    linien: Optional[Iterable[str]]
+) -> pd.DataFrame:
+    """Filtert im Speicher, wenn keine partitionierte Ablage vorhanden ist."""
+    mask = pd.Series(True, index=df.index)
+    if jahre is not None:
+        mask &= df["Datum"].dt.year.isin([int(j) for j in jahre])
+    if linien is not None:
+        mask &= df["Produktionslinie"].isin(list(linien))
+    return df[mask].reset_index(drop=True)
+
+
+@cache_data
+def _derive_partition_index(version: int = 0) -> pd.DataFrame:
+    # Lokaler Import: services.refresh importiert dieses Modul
+    from services.refresh import snapshot_scope
+
+    # Dateiversionen des Datenstands version lesen (wie die Loader in services.page_data)
+    with snapshot_scope(version):
+        df = load_production_data(columns=["Datum", "Produktionslinie"])
+    return (
+        df.groupby([df["Datum"].dt.year.rename("Jahr"), "Produktionslinie"])
+        .agg(rows=("Datum", "size"), min_datum=("Datum", "min"), max_datum=("Datum", "max"))
+        .reset_index()
+    )
+
+
+def load_partition_index(version: int = 0) -> pd.DataFrame:
+    """
+    Liefert die verfügbaren Jahr/Linie-Kombinationen samt Zeitraum,
+    ohne die Produktionsdaten selbst zu laden (sofern partitioniert).
+
+    version ist der Datenstand aus services.refresh (Cache-Schlüssel).
+    """
+    if is_partitioned(PARTITION_ROOT):
+        return read_manifest(PARTITION_ROOT)
+    return _derive_partition_index(version)
+
+
+def load_production_data(
+    source: Optional[Union[str, Path]] = None,
+    jahre: Optional[Iterable[int]] = None,
+    linien: Optional[Iterable[str]] = None,
+    columns: Optional[Iterable[str]] = None
+) -> pd.DataFrame:
     """
     Lädt den Produktionsdatensatz aus dem data-Ordner.
     Wird von allen Streamlit-Pages verwendet.
+
+    Optional kann eine Datei, ein Ordner oder ein Glob-Muster mit
+    Partitionsdateien (z. B. eine CSV pro Werk und Monat) übergeben werden.
+
+    Mit jahre/linien werden bei partitionierter Ablage (data/partitioned,
+    siehe services.partition_store) nur die passenden Partitionen gelesen.
+
+    Mit columns werden nur die angegebenen Spalten gelesen. Der Cache ist
+    spaltenweise aufgebaut, Pages mit überlappender Auswahl teilen sich also
+    die bereits geladenen Spalten. Das Ergebnis ist eine flache Kopie der
+    gecachten Spalten; Änderungen daran kopieren erst beim Schreiben
+    (Copy-on-Write) und wirken nicht auf den Cache zurück.
     """
+    columns = list(columns) if columns is not None else None
+    root = Path(source) if source is not None else PARTITION_ROOT
+    pruning = jahre is not None or linien is not None
 
-    base_path = Path(__file__).resolve().parent.parent
-    data_path = base_path / "data" / "produktionsdaten_premium_5Jahre.csv"
+    if pruning and is_partitioned(root):
+        manifest = read_manifest(root)
+        selected = prune_partitions(manifest, jahre, linien)
+        if selected.empty:
+            header_path = manifest["path"].iloc[0] if columns is None and len(manifest) else None
+            return _empty_frame(columns, header_path)
+        signatures = tuple(
+            (path, _signature(path)) for path in selected["path"]
+        )
+        return _load_columns(signatures, columns)
 
-    df = pd.read_csv(data_path)
+    # Für das Filtern im Speicher werden Datum und Linie zusätzlich benötigt
+    read_cols = columns
+    if pruning and columns is not None:
+        read_cols = columns + [c for c in ("Datum", "Produktionslinie") if c not in columns]
 
-    # Datum korrekt parsen
-    df["Datum"] = pd.to_datetime(df["Datum"])
+    if source is None:
+        signatures = ((str(DEFAULT_DATA_PATH), _signature(DEFAULT_DATA_PATH)),)
+        df = _load_columns(signatures, read_cols)
+    else:
+        signatures = tuple(
+            (str(path.resolve()), _signature(path.resolve()))
+            for path in _resolve_sources(source)
+        )
+        df = _load_columns(signatures, read_cols)
 
-    return df
+    if pruning:
+        df = _filter_partitions(df, jahre, linien)
+    return df[columns] if columns is not None and list(df.columns) != columns else df
@@ -0,0 +1,105 @@
+"""
+Datenaufbereitung der Analyse-Seiten.
+
+Die Pages rufen diese Funktionen in ihren gecachten load_*-Funktionen auf.
+Als eigenes Modul sind sie auch ohne laufende Streamlit-Session nutzbar
+(Benchmarks, Warm-up).
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from services.kpis import rollup, sum_table
+from services.oee import IdealRates, add_oee, ideal_output
+from services.validation import ValidationResult, validate_production_data
+
+# Spalten, die die Seiten tatsächlich verwenden (Column Projection)
+OOP_COLUMNS = [
+    "Datum", "Produktionslinie", "Schicht", "Produkt", "Modifikation",
+    "Stueckzahl", "Ausschuss", "Betriebsstunden",
+    "Energieverbrauch_kWh", "Stillstandszeit_Min", "Fehlercode"
+]
+KPI_COLUMNS = [
+    "Datum", "Produktionslinie", "Schicht", "Produkt", "Modifikation",
+    "Stueckzahl", "Ausschuss", "Betriebsstunden",
+    "Stillstandszeit_Min", "Energieverbrauch_kWh"
+]
+# Körnung der Summentabelle des KPI-Dashboards (gröbere Sichten per rollup)
+KPI_GRAIN = ["Jahr", "Jahr_Monat", "Produktionslinie", "Schicht"]
+KPI_SUMS = [
+    "Datensaetze", "Stueckzahl", "Ausschuss", "Gutteile", "Energieverbrauch_kWh",
+    "Stillstandszeit_Min", "Betriebsstunden", "Planzeit_h"
+]
+
+
+def prepare_oop_data(df: pd.DataFrame) -> pd.DataFrame:
+    """Aufbereitung für die OOP-Seite"""
+    # Typkonvertierung & Bereinigung (ungültige Zeilen gehen in Quarantäne)
+    return validate_production_data(df).clean
+
+
+def prepare_sql_data(df: pd.DataFrame) -> ValidationResult:
+    """Aufbereitung für die SQL-Seite (inkl. Quarantäne-Übersicht)"""
+    return validate_production_data(df)
+
+
+def prepare_kpi_data(df: pd.DataFrame) -> pd.DataFrame:
+    """Aufbereitung für das KPI-Dashboard"""
+    # Typkonvertierung & Bereinigung (ungültige Zeilen gehen in Quarantäne)
+    df = validate_production_data(df).clean
+
+    # Periodenschlüssel; Quoten entstehen später aus Summen (services.kpis), nicht je Datensatz
+    df["Jahr"] = df["Datum"].dt.year
+    df["Monat"] = df["Datum"].dt.month
+    df["Jahr_Monat"] = df["Datum"].dt.to_period("M").astype(str)
+
+    return df
+
+
+@dataclass
+class KpiAggregates:
+    """Kennzahlen und Chart-Aggregate des KPI-Dashboards für eine Filterauswahl (Quoten aus Summen)"""
+    total_output: float
+    total_scrap: float
+    avg_scrap_rate: float
+    avg_availability: float
+    total_energy: float
+    oee: pd.Series
+    line_oee: pd.DataFrame
+    monthly: pd.DataFrame
+    scrap_monthly: pd.DataFrame
+    line_kpi: pd.DataFrame
+    shift_kpi: pd.DataFrame
+
+
+def kpi_sum_table(df: pd.DataFrame, rates: IdealRates) -> pd.DataFrame:
+    """
+    Kompakte Summentabelle des KPI-Dashboards je Monat, Linie und Schicht
+    (df = prepare_kpi_data-Daten, rates = Soll-Raten für die OEE-Leistung)
+    """
+    return sum_table(df, KPI_GRAIN, KPI_SUMS, extra={"Soll_Stueckzahl": ideal_output(df, rates)})
+
+
+def aggregate_kpis(table: pd.DataFrame) -> KpiAggregates:
+    """Aggregate für KPI-Karten und Charts aus einer (gefilterten) kpi_sum_table"""
+    totals = add_oee(rollup(table, [], ["Ausschussquote_%"])).iloc[0]
+    by_month = rollup(table, ["Jahr_Monat"], ["Ausschussquote_%"])
+    return KpiAggregates(
+        total_output=totals["Stueckzahl"],
+        total_scrap=totals["Ausschuss"],
+        avg_scrap_rate=float(np.nan_to_num(totals["Ausschussquote_%"])),
+        avg_availability=float(np.nan_to_num(totals["Verfuegbarkeit_%"])),
+        total_energy=totals["Energieverbrauch_kWh"],
+        oee=totals,
+        line_oee=add_oee(rollup(table, ["Produktionslinie"])),
+        monthly=by_month[["Jahr_Monat", "Stueckzahl", "Gutteile"]],
+        scrap_monthly=by_month[["Jahr_Monat", "Ausschussquote_%"]],
+        line_kpi=rollup(table, ["Produktionslinie"], ["Ausschussquote_%"])[
+            ["Produktionslinie", "Stueckzahl", "Ausschussquote_%"]
+        ],
+        shift_kpi=rollup(table, ["Schicht"], ["Ausschussquote_%"])[
+            ["Schicht", "Stueckzahl", "Ausschussquote_%"]
+        ]
+    )
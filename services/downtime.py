@@ -0,0 +1,181 @@
+"""
+Auffällige Stillstandszeiten auf Basis vorberechneter Histogramme.
+
+Je Linie, Schicht und Fehlercode liegt ein Histogramm der
+Stillstandszeit mit festen 1-Minuten-Bins (plus Überlauf-Bin). Histogramme
+sind additiv: neue Daten werden per update() hinzugezählt, Roll-ups (z. B.
+alle Fehlercodes einer Linie) sind Summen. Median und MAD je Gruppe ergeben
+sich aus den Bins, ohne die Datensätze erneut zu sortieren.
+
+Ein Datensatz gilt als auffällig, wenn sein robuster z-Wert
+0.6745 * (x - Median) / MAD die Schwelle überschreitet (Iglewicz/Hoaglin,
+Standard 3.5). Die Markierung ist danach ein Vergleich je Zeile gegen die
+Schwelle seiner Gruppe.
+"""
+
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+BIN_WIDTH_MIN = 1
+# Eine Schicht hat 8 Stunden; längere Stillstände landen im Überlauf-Bin
+MAX_MINUTES = 480
+N_BINS = MAX_MINUTES // BIN_WIDTH_MIN + 2
+
+DEFAULT_THRESHOLD = 3.5
+# Skalierung der MAD auf die Standardabweichung einer Normalverteilung
+MAD_SCALE = 0.6745
+
+GROUP_COLUMNS = ("Produktionslinie", "Schicht", "Fehlercode")
+NO_ERROR = "-"
+
+Key = Tuple[str, str, str]
+
+
+def _bins(minutes: np.ndarray) -> np.ndarray:
+    """Bin-Index je Wert (negativ -> 0, > MAX_MINUTES -> Überlauf-Bin)."""
+    return np.clip(np.floor(minutes / BIN_WIDTH_MIN), 0, N_BINS - 1).astype("int64")
+
+
+def _bin_values() -> np.ndarray:
+    """Untergrenze je Bin (bei ganzen Minuten exakt der Wert)."""
+    return np.arange(N_BINS, dtype="float64") * BIN_WIDTH_MIN
+
+
+def _weighted_median(values: np.ndarray, counts: np.ndarray) -> float:
+    """Median wie np.median: bei gerader Anzahl Mittel der beiden mittleren Werte."""
+    order = np.argsort(values, kind="stable")
+    cumulative = np.cumsum(counts[order])
+    n = int(cumulative[-1])
+    # 1-basierte Ränge der beiden mittleren Werte (bei ungerader Anzahl identisch)
+    middle = np.searchsorted(cumulative, [(n + 1) // 2, n // 2 + 1])
+    return float(values[order][middle].mean())
+
+
+def robust_stats(counts: np.ndarray) -> Tuple[float, float]:
+    """
+    Median und MAD aus einem Histogramm (nan ohne Daten).
+
+    Jeder Wert zählt mit der Untergrenze seines Bins: Für ganze Minuten
+    zwischen 0 und MAX_MINUTES entspricht das Ergebnis np.median bzw. der
+    MAD der Rohwerte. Bruchteile von Minuten werden abgerundet (Fehler
+    < BIN_WIDTH_MIN). Werte über MAX_MINUTES zählen als MAX_MINUTES + 1 –
+    das ändert den Median nicht, solange weniger als die Hälfte der Werte
+    überläuft, und die MAD nicht, solange ihre Abweichungen über der MAD
+    bleiben.
+    """
+    if counts.sum() == 0:
+        return np.nan, np.nan
+    values = _bin_values()
+    median = _weighted_median(values, counts)
+    mad = _weighted_median(np.abs(values - median), counts)
+    return median, mad
+
+
+class DowntimeHistograms:
+    """Additive Stillstands-Histogramme je (Linie, Schicht, Fehlercode)."""
+
+    def __init__(self):
+        self._counts: Dict[Key, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return int(sum(c.sum() for c in self._counts.values()))
+
+    @property
+    def keys(self) -> Sequence[Key]:
+        return sorted(self._counts)
+
+    def update(self, df: pd.DataFrame) -> None:
+        """Zählt Datensätze mit Stillstandszeit hinzu (inkrementell, z. B. je Partition)."""
+        df = df[df["Stillstandszeit_Min"].notna()]
+        if df.empty:
+            return
+        keys = df[list(GROUP_COLUMNS)].astype(object).fillna(NO_ERROR)
+        codes, uniques = pd.MultiIndex.from_frame(keys).factorize()
+        bins = _bins(df["Stillstandszeit_Min"].to_numpy(dtype="float64"))
+        counts = np.bincount(codes * N_BINS + bins, minlength=len(uniques) * N_BINS)
+        for i, key in enumerate(uniques):
+            block = counts[i * N_BINS:(i + 1) * N_BINS]
+            if key in self._counts:
+                self._counts[key] += block
+            else:
+                self._counts[key] = block.copy()
+
+    def histogram(
+        self,
+        linie: Optional[str] = None,
+        schicht: Optional[str] = None,
+        fehlercode: Optional[str] = None
+    ) -> np.ndarray:
+        """Summe der Histogramme aller passenden Gruppen (None = alle)."""
+        total = np.zeros(N_BINS, dtype="int64")
+        for (key_linie, key_schicht, key_code), counts in self._counts.items():
+            if linie in (None, key_linie) and schicht in (None, key_schicht) and fehlercode in (None, key_code):
+                total += counts
+        return total
+
+    def stats(
+        self,
+        by: Sequence[str] = ("Produktionslinie", "Schicht"),
+        threshold: float = DEFAULT_THRESHOLD,
+        linien: Optional[Iterable[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Robuste Kennzahlen je Gruppe: Anzahl, Median, MAD und obere Schwelle
+        für auffällige Stillstände (Median + threshold * MAD / 0.6745).
+
+        Median und MAD stammen aus den Bins (Genauigkeit siehe robust_stats);
+        bei MAD 0 gibt es keine Schwelle (NaN) und flag() markiert nichts.
+        """
+        positions = [GROUP_COLUMNS.index(column) for column in by]
+        linien = set(linien) if linien is not None else None
+        groups: Dict[Tuple, np.ndarray] = {}
+        for key, counts in self._counts.items():
+            if linien is not None and key[0] not in linien:
+                continue
+            group = tuple(key[p] for p in positions)
+            groups[group] = groups.get(group, 0) + counts
+
+        rows = []
+        for group in sorted(groups):
+            counts = groups[group]
+            median, mad = robust_stats(counts)
+            rows.append({
+                **dict(zip(by, group)),
+                "Anzahl": int(counts.sum()),
+                "Median_Min": median,
+                "MAD_Min": mad,
+                "Schwelle_Min": median + threshold * mad / MAD_SCALE if mad > 0 else np.nan,
+            })
+        return pd.DataFrame(rows, columns=[*by, "Anzahl", "Median_Min", "MAD_Min", "Schwelle_Min"])
+
+    def flag(
+        self,
+        df: pd.DataFrame,
+        by: Sequence[str] = ("Produktionslinie", "Schicht"),
+        threshold: float = DEFAULT_THRESHOLD
+    ) -> pd.DataFrame:
+        """
+        Datensätze aus df, deren Stillstandszeit über der Schwelle ihrer Gruppe
+        liegt – mit robustem z-Wert (Spalte "z_robust") und Gruppen-Median.
+        """
+        stats = self.stats(by, threshold)
+        keys = df[list(by)].astype(object).fillna(NO_ERROR)
+        merged = keys.merge(stats, on=list(by), how="left")
+        minutes = df["Stillstandszeit_Min"].to_numpy(dtype="float64")
+        mad = merged["MAD_Min"].to_numpy()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            z = MAD_SCALE * (minutes - merged["Median_Min"].to_numpy()) / mad
+        flagged = np.nan_to_num(z, nan=0.0, posinf=0.0, neginf=0.0) > threshold
+
+        result = df[flagged].copy()
+        result["Median_Min"] = merged["Median_Min"].to_numpy()[flagged]
+        result["z_robust"] = z[flagged].round(2)
+        return result
+
+
+def build_histograms(df: pd.DataFrame) -> DowntimeHistograms:
+    histograms = DowntimeHistograms()
+    histograms.update(df)
+    return histograms
@@ -0,0 +1,219 @@
+"""
+Fehlercode-Analyse auf Basis eines invertierten Index.
+
+Für jede indizierte Spalte (Fehlercode, Linie, Schicht, Jahr) hält der
+Index je Wert die sortierten Zeilenpositionen ("Postings"). Filter und
+Drill-through sind damit Mengenoperationen auf kurzen Integer-Arrays
+(Schnitt der Postings), statt die gesamte Tabelle je Auswahl erneut
+zu filtern. Ein Pareto je Fehlercode summiert Anzahl, Ausschuss und
+Stillstand über den Schnitt aus Code-Postings und Filterauswahl.
+"""
+
+from typing import Dict, Hashable, Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from services.ranking import top_k
+
+NO_ERROR = "-"
+
+# Kennzahl des Paretos -> Quellspalte (None = Anzahl Aufträge)
+METRICS: Dict[str, Optional[str]] = {
+    "Anzahl": None,
+    "Ausschuss": "Ausschuss",
+    "Stillstand_Min": "Stillstandszeit_Min",
+}
+
+# Spalten des Drill-through auf die Aufträge
+ORDER_COLUMNS = [
+    "Datum", "Auftragsnummer", "Produktionslinie", "Schicht", "Produkt", "Modifikation",
+    "Stueckzahl", "Ausschuss", "Stillstandszeit_Min", "Status", "Fehlercode"
+]
+
+# ABC-Klassen: Codes bis 80 % kumuliertem Anteil sind A, bis 95 % B, danach C
+ABC_LIMITS = (("A", 80.0), ("B", 95.0))
+
+_EMPTY = np.empty(0, dtype="int64")
+
+
+def intersect(postings: Iterable[np.ndarray]) -> np.ndarray:
+    """Schnitt sortierter Postings (kürzeste zuerst, damit die Zwischenergebnisse klein bleiben)."""
+    postings = sorted(postings, key=len)
+    if not postings:
+        raise ValueError("intersect benötigt mindestens eine Posting-Liste")
+    result = postings[0]
+    for other in postings[1:]:
+        if len(result) == 0:
+            break
+        result = np.intersect1d(result, other, assume_unique=True)
+    return result
+
+
+class InvertedIndex:
+    """Wert -> sortierte Zeilenpositionen für eine Spalte (fehlende Werte werden nicht indiziert)."""
+
+    def __init__(self, values: Sequence[Hashable]):
+        codes, uniques = pd.factorize(pd.Series(values), use_na_sentinel=True)
+        # Stabile Sortierung: innerhalb eines Werts bleiben die Positionen aufsteigend
+        order = np.argsort(codes, kind="stable")
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        bounds = np.concatenate([[0], np.cumsum(counts)]) + int((codes < 0).sum())
+        self._postings: Dict[Hashable, np.ndarray] = {
+            value: order[bounds[i]:bounds[i + 1]] for i, value in enumerate(uniques)
+        }
+
+    def __len__(self) -> int:
+        return len(self._postings)
+
+    def __contains__(self, value: Hashable) -> bool:
+        return value in self._postings
+
+    @property
+    def values(self) -> list:
+        return sorted(self._postings)
+
+    def lookup(self, value: Hashable) -> np.ndarray:
+        """Positionen eines Werts (leer, wenn er nicht vorkommt)."""
+        return self._postings.get(value, _EMPTY)
+
+    def union(self, values: Iterable[Hashable]) -> np.ndarray:
+        """Positionen, die einen der Werte tragen (sortiert)."""
+        postings = [self.lookup(value) for value in values]
+        if not postings:
+            return _EMPTY
+        return np.sort(np.concatenate(postings), kind="stable")
+
+
+class ErrorCodeIndex:
+    """Invertierte Indizes über Fehlercode, Linie, Schicht und Jahr eines Datensatzes."""
+
+    def __init__(self, df: pd.DataFrame):
+        df = df.reset_index(drop=True)
+        self._orders = df[[c for c in ORDER_COLUMNS if c in df.columns]]
+        self._measures = {
+            column: df[column].to_numpy(dtype="float64", na_value=np.nan)
+            for column in METRICS.values() if column is not None
+        }
+        self._size = len(df)
+        self._indexes = {
+            "Fehlercode": InvertedIndex(df["Fehlercode"].astype(object).fillna(NO_ERROR)),
+            "Produktionslinie": InvertedIndex(df["Produktionslinie"]),
+            "Schicht": InvertedIndex(df["Schicht"]),
+            "Jahr": InvertedIndex(df["Datum"].dt.year),
+        }
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def codes(self) -> list:
+        return self._indexes["Fehlercode"].values
+
+    def positions(
+        self,
+        jahr: Optional[int] = None,
+        linie: Optional[str] = None,
+        schicht: Optional[str] = None,
+        fehlercode: Optional[str] = None
+    ) -> Optional[np.ndarray]:
+        """Zeilenpositionen der Auswahl (None = keine Einschränkung, also alle Zeilen)."""
+        selection = {"Jahr": jahr, "Produktionslinie": linie, "Schicht": schicht,
+                     "Fehlercode": fehlercode}
+        postings = [self._indexes[column].lookup(value)
+                    for column, value in selection.items() if value is not None]
+        return intersect(postings) if postings else None
+
+    def _totals(self, positions: Optional[np.ndarray]) -> Dict[str, float]:
+        count = self._size if positions is None else len(positions)
+        totals = {"Anzahl": count}
+        for metric, column in METRICS.items():
+            if column is not None:
+                values = self._measures[column] if positions is None else self._measures[column][positions]
+                totals[metric] = float(np.nansum(values))
+        return totals
+
+    def pareto(
+        self,
+        metric: str = "Anzahl",
+        jahr: Optional[int] = None,
+        linie: Optional[str] = None,
+        schicht: Optional[str] = None,
+        include_no_error: bool = False
+    ) -> pd.DataFrame:
+        """
+        Pareto je Fehlercode: Anzahl, Ausschuss und Stillstand, absteigend nach
+        metric, mit Anteil, kumuliertem Anteil und ABC-Klasse bezogen auf metric.
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unbekannte Kennzahl {metric!r} (erlaubt: {', '.join(METRICS)})")
+        selection = self.positions(jahr, linie, schicht)
+        index = self._indexes["Fehlercode"]
+
+        rows = []
+        for code in index.values:
+            if code == NO_ERROR and not include_no_error:
+                continue
+            postings = index.lookup(code)
+            if selection is not None:
+                postings = intersect([postings, selection])
+            rows.append({"Fehlercode": code, **self._totals(postings)})
+        result = pd.DataFrame(rows, columns=["Fehlercode", *METRICS])
+        result = result[result["Anzahl"] > 0]
+        result = top_k(result, metric).reset_index(drop=True)
+
+        total = result[metric].sum()
+        share = result[metric] / total * 100 if total else result[metric] * 0.0
+        cumulative = share.cumsum()
+        result["Anteil_%"] = share.round(2)
+        result["Kumuliert_%"] = cumulative.round(2)
+        # Klasse nach dem kumulierten Anteil *vor* dem Code: der erste Code ist immer A
+        before = (cumulative - share).to_numpy()
+        result["Klasse"] = np.select([before < limit for _, limit in ABC_LIMITS],
+                                     [cls for cls, _ in ABC_LIMITS], default="C")
+        return result
+
+    def matrix(
+        self,
+        by: str = "Produktionslinie",
+        metric: str = "Anzahl",
+        jahr: Optional[int] = None,
+        linie: Optional[str] = None,
+        schicht: Optional[str] = None,
+        include_no_error: bool = False
+    ) -> pd.DataFrame:
+        """
+        Fehlercode × Linie (bzw. Schicht): metric je Schnitt der Postings.
+        Der Filter auf der Spaltendimension selbst wird ignoriert.
+        """
+        if by not in ("Produktionslinie", "Schicht"):
+            raise ValueError("matrix unterstützt by='Produktionslinie' oder by='Schicht'")
+        if by == "Produktionslinie":
+            linie = None
+        else:
+            schicht = None
+        selection = self.positions(jahr, linie, schicht)
+        codes = [c for c in self.codes if include_no_error or c != NO_ERROR]
+        columns = self._indexes[by].values
+
+        values = np.zeros((len(codes), len(columns)))
+        for i, code in enumerate(codes):
+            postings = self._indexes["Fehlercode"].lookup(code)
+            if selection is not None:
+                postings = intersect([postings, selection])
+            for j, value in enumerate(columns):
+                cell = intersect([postings, self._indexes[by].lookup(value)])
+                values[i, j] = self._totals(cell)[metric]
+        return pd.DataFrame(values, index=pd.Index(codes, name="Fehlercode"),
+                            columns=pd.Index(columns, name=by))
+
+    def orders(
+        self,
+        fehlercode: str,
+        jahr: Optional[int] = None,
+        linie: Optional[str] = None,
+        schicht: Optional[str] = None
+    ) -> pd.DataFrame:
+        """Drill-through: die Aufträge hinter einem Fehlercode in der aktuellen Auswahl."""
+        positions = self.positions(jahr, linie, schicht, fehlercode)
+        return self._orders.iloc[positions].reset_index(drop=True)
@@ -0,0 +1,158 @@
+"""
+Kennzahlen als Quotienten aus additiven Summen.
+
+Jede Quote ist als Zähler- und Nenner-Summe deklariert (RatioKpi) und
+wird erst am aggregierten Ergebnis gebildet: Ausschussquote =
+Σ Ausschuss / Σ Stückzahl statt Mittelwert der Quoten je Datensatz. Das
+entspricht dem mit dem Nenner gewichteten Mittel und lässt sich aus
+vorverdichteten Tabellen zusammensetzen – eine Summentabelle je Monat,
+Linie und Schicht genügt für alle gröberen Sichten (rollup), ohne
+Quotenspalten je Datensatz mitzuführen.
+
+    table = sum_table(df, ["Jahr_Monat", "Produktionslinie", "Schicht"])
+    line_kpis = rollup(table, ["Produktionslinie"], ["Ausschussquote_%"])
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+def _values(df: pd.DataFrame, column: str) -> np.ndarray:
+    return df[column].to_numpy(dtype="float64", na_value=np.nan)
+
+
+def _filled(df: pd.DataFrame, column: str) -> np.ndarray:
+    """Wie _values, fehlende Werte als 0 – für zusammengesetzte Summanden."""
+    return np.nan_to_num(_values(df, column), nan=0.0)
+
+
+# Additive Summen: Name -> Summand je Datensatz
+SUMS: Dict[str, Callable[[pd.DataFrame], np.ndarray]] = {
+    "Datensaetze": lambda df: np.ones(len(df)),
+    "Stueckzahl": lambda df: _values(df, "Stueckzahl"),
+    "Ausschuss": lambda df: _values(df, "Ausschuss"),
+    "Gutteile": lambda df: _filled(df, "Stueckzahl") - _filled(df, "Ausschuss"),
+    "Energieverbrauch_kWh": lambda df: _values(df, "Energieverbrauch_kWh"),
+    "Materialkosten": lambda df: _values(df, "Materialkosten"),
+    "Stillstandszeit_Min": lambda df: _values(df, "Stillstandszeit_Min"),
+    "Betriebsstunden": lambda df: _values(df, "Betriebsstunden"),
+    # Geplante Produktionszeit: Betriebsstunden plus Stillstand
+    "Planzeit_h": lambda df: _filled(df, "Betriebsstunden") + _filled(df, "Stillstandszeit_Min") / 60,
+}
+
+
+@dataclass(frozen=True)
+class RatioKpi:
+    """Quote = Σ numerator * scale / Σ denominator (NaN bei Nenner 0)."""
+    numerator: str
+    denominator: str
+    scale: float = 100.0
+
+    def of(self, numerator, denominator):
+        """Quote aus Summen (Skalare oder Arrays)."""
+        numerator = np.asarray(numerator, dtype="float64")
+        denominator = np.asarray(denominator, dtype="float64")
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result = np.where(denominator != 0, numerator * self.scale / denominator, np.nan)
+        return result if result.ndim else float(result)
+
+
+KPIS: Dict[str, RatioKpi] = {
+    "Ausschussquote_%": RatioKpi("Ausschuss", "Stueckzahl"),
+    "kWh_pro_Stück": RatioKpi("Energieverbrauch_kWh", "Stueckzahl", 1.0),
+    # Kosten je Gutteil (services.costs): Ausschuss trägt seine Kosten nicht selbst
+    "kWh_pro_Gutteil": RatioKpi("Energieverbrauch_kWh", "Gutteile", 1.0),
+    "Materialkosten_pro_Gutteil": RatioKpi("Materialkosten", "Gutteile", 1.0),
+    "Stillstand_Min_pro_h": RatioKpi("Stillstandszeit_Min", "Betriebsstunden", 1.0),
+    # OEE-Faktoren (services.oee); Soll_Stueckzahl kommt als zusätzliche Summe hinzu
+    "Verfuegbarkeit_%": RatioKpi("Betriebsstunden", "Planzeit_h"),
+    "Leistung_%": RatioKpi("Stueckzahl", "Soll_Stueckzahl"),
+    "Qualitaet_%": RatioKpi("Gutteile", "Stueckzahl"),
+}
+
+
+def required_sums(kpis: Iterable[str]) -> list:
+    """Summen, die die Kennzahlen benötigen (Reihenfolge wie SUMS, ohne Duplikate)."""
+    needed = {s for name in kpis for s in (KPIS[name].numerator, KPIS[name].denominator)}
+    return [s for s in SUMS if s in needed]
+
+
+def row_sums(df: pd.DataFrame, sums: Sequence[str]) -> pd.DataFrame:
+    """Summanden je Datensatz (gleicher Index wie df); fehlende Werte zählen als 0."""
+    return pd.DataFrame({s: np.nan_to_num(SUMS[s](df), nan=0.0) for s in sums}, index=df.index)
+
+
+def sum_table(
+    df: pd.DataFrame,
+    by: Sequence[str] = (),
+    sums: Optional[Sequence[str]] = None,
+    extra: Optional[Mapping[str, np.ndarray]] = None
+) -> pd.DataFrame:
+    """
+    Kompakte Summentabelle je Gruppe – alle Summen in einem bincount-Durchlauf.
+
+    Args:
+        df: Datensätze
+        by: Gruppierung (leer = eine Zeile für alles); Zeilen mit fehlendem Schlüssel entfallen
+        sums: Namen aus SUMS (Standard: alle)
+        extra: weitere Summanden je Datensatz (z. B. Soll_Stueckzahl der OEE)
+    """
+    names = list(SUMS if sums is None else sums)
+    columns = [np.nan_to_num(SUMS[s](df), nan=0.0) for s in names]
+    for name, values in (extra or {}).items():
+        names.append(name)
+        columns.append(np.nan_to_num(np.asarray(values, dtype="float64"), nan=0.0))
+    values = np.column_stack(columns) if columns else np.empty((len(df), 0))
+
+    if by:
+        # Gruppennummer je Datensatz (-1 bei fehlendem Schlüssel), Schlüssel aus der ersten Zeile je Gruppe
+        codes = df.groupby(list(by), sort=False, observed=True).ngroup().fillna(-1).to_numpy("int64")
+        keep = np.flatnonzero(codes >= 0)
+        codes, values = codes[keep], values[keep]
+        _, first = np.unique(codes, return_index=True)
+        result = df[list(by)].iloc[keep[first]].reset_index(drop=True)
+    else:
+        codes = np.zeros(len(df), dtype="int64")
+        result = pd.DataFrame(index=range(1))
+
+    # Bin = Gruppe * Anzahl Summen + Summe
+    n_groups, n_sums = len(result), len(names)
+    bins = (codes[:, None] * n_sums + np.arange(n_sums)).ravel()
+    totals = np.bincount(bins, weights=values.ravel(), minlength=n_groups * n_sums)
+    totals = totals.reshape(n_groups, n_sums)
+    for i, name in enumerate(names):
+        result[name] = totals[:, i]
+    if by:
+        result = result.sort_values(list(by), ignore_index=True)
+    # Summenspalten merken, damit rollup sie von Schlüsselspalten unterscheiden kann
+    result.attrs["sums"] = names
+    return result
+
+
+def add_kpis(table: pd.DataFrame, kpis: Iterable[str]) -> pd.DataFrame:
+    """Quoten aus den Summenspalten einer Tabelle ergänzen (Kopie)."""
+    result = table.copy()
+    for name in kpis:
+        kpi = KPIS[name]
+        result[name] = kpi.of(result[kpi.numerator].to_numpy(), result[kpi.denominator].to_numpy())
+    return result
+
+
+def rollup(table: pd.DataFrame, by: Sequence[str], kpis: Iterable[str] = ()) -> pd.DataFrame:
+    """Summentabelle (sum_table) auf eine gröbere Gruppierung verdichten und Quoten neu bilden."""
+    known = set(SUMS) | {s for kpi in KPIS.values() for s in (kpi.numerator, kpi.denominator)}
+    sums = table.attrs.get("sums") or [c for c in table.columns if c in known]
+    if by:
+        grouped = table.groupby(list(by), sort=True, observed=True)[sums].sum().reset_index()
+    else:
+        grouped = table[sums].sum().to_frame().T
+    grouped.attrs["sums"] = list(sums)
+    return add_kpis(grouped, kpis)
+
+
+def kpi_table(df: pd.DataFrame, by: Sequence[str], kpis: Sequence[str]) -> pd.DataFrame:
+    """Summen und Quoten je Gruppe direkt aus Datensätzen."""
+    return add_kpis(sum_table(df, by, required_sums(kpis)), kpis)
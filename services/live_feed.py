@@ -0,0 +1,303 @@
+"""
+Live-Modus des KPI-Dashboards: neue Produktionsdatensätze aus einem
+fortlaufend ergänzten CSV (tail -f) oder über einen lokalen TCP-Socket
+(Platzhalter für den MES-Feed).
+
+Jeder Abruf liest nur die seit dem letzten Abruf hinzugekommenen Zeilen,
+bereitet sie wie das Dashboard auf (prepare_kpi_data) und addiert sie auf
+laufende Summen je Linie und Schicht sowie die rollierenden Fenster
+(services.rolling_kpis) – Aufwand O(neue Zeilen), die Historie wird nie
+erneut gelesen.
+
+Quelle: PORTFOLIO_LIVE_SOURCE = Pfad zu einer CSV-Datei oder tcp://host:port
+(Zeilen im Format des Produktionsdatensatzes, Kopfzeile optional). Zeilen
+mit falscher Feldanzahl werden übersprungen, ungültige Werte landen wie
+beim Laden in der Quarantäne (services.validation).
+
+Testdaten einspielen:
+    python -m services.live_feed data/live.csv --rate 5
+    python -m services.live_feed tcp://127.0.0.1:9009 --rate 5
+"""
+
+import argparse
+import io
+import logging
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from services.data_loader import DEFAULT_DATA_PATH
+from services.data_prep import prepare_kpi_data
+from services.kpis import sum_table
+from services.rolling_kpis import SOURCES, KpiSums, RollingKpis
+
+logger = logging.getLogger(__name__)
+
+# Anzahl der zuletzt empfangenen Zeilen für den Live-Chart
+RECENT_ROWS = 500
+
+
+def live_source() -> Optional[str]:
+    """Konfigurierte Live-Quelle (PORTFOLIO_LIVE_SOURCE) oder None."""
+    return os.environ.get("PORTFOLIO_LIVE_SOURCE") or None
+
+
+def live_interval() -> float:
+    """Abstand der Live-Aktualisierung in Sekunden (PORTFOLIO_LIVE_INTERVAL)."""
+    return float(os.environ.get("PORTFOLIO_LIVE_INTERVAL", 2))
+
+
+def feed_columns() -> List[str]:
+    """Spaltenreihenfolge einer Feed-Zeile (wie im Produktionsdatensatz)."""
+    return list(pd.read_csv(DEFAULT_DATA_PATH, nrows=0).columns)
+
+
+def is_header(line: str, columns: List[str]) -> bool:
+    """Ob eine Feed-Zeile die Kopfzeile ist (beginnt mit dem ersten Spaltennamen)."""
+    return line.startswith(columns[0] + ",")
+
+
+# =========================
+# Laufende Kennzahlen
+# =========================
+class LiveKpis:
+    """Laufende Summen je (Linie, Schicht) und die zuletzt empfangenen Zeilen."""
+
+    def __init__(self, recent_rows: int = RECENT_ROWS):
+        self.recent_rows = recent_rows
+        self.groups: Dict[Tuple[str, str], KpiSums] = {}
+        self.recent = pd.DataFrame()
+
+    def update(self, batch: pd.DataFrame) -> None:
+        """Addiert einen aufbereiteten Batch (prepare_kpi_data) – O(Batchgröße)."""
+        sums = sum_table(batch, ["Produktionslinie", "Schicht"], list(SOURCES.values()))
+        for key, values in zip(zip(sums["Produktionslinie"], sums["Schicht"]),
+                               sums[list(SOURCES.values())].to_numpy()):
+            self.groups.setdefault(key, KpiSums()).add(KpiSums.from_vector(values))
+        recent = batch if self.recent.empty else pd.concat([self.recent, batch], ignore_index=True)
+        self.recent = recent.tail(self.recent_rows).reset_index(drop=True)
+
+    def totals(self, linie: str = "All", schicht: str = "All") -> KpiSums:
+        """Summen für eine Filterauswahl ("All" = alle Linien bzw. Schichten)."""
+        total = KpiSums()
+        for (group_linie, group_schicht), sums in self.groups.items():
+            if linie in ("All", group_linie) and schicht in ("All", group_schicht):
+                total.add(sums)
+        return total
+
+
+# =========================
+# Quellen
+# =========================
+class FileTail:
+    """Liest die seit dem letzten Aufruf angehängten, vollständigen Zeilen einer CSV."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.columns = feed_columns()
+        self.offset = 0
+        self.header: Optional[bytes] = None
+        # (st_dev, st_ino) der gelesenen Datei – ändert sich bei Rotation/Ersetzen
+        self.identity: Optional[Tuple[int, int]] = None
+
+    def read_new(self) -> Tuple[pd.DataFrame, bool]:
+        """
+        Returns:
+            (neue Zeilen, reset): reset ist True, wenn die Datei gekürzt oder
+            ersetzt wurde und von vorne gelesen wird
+        """
+        reset = False
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return pd.DataFrame(), reset
+
+        with f:
+            # Kennung und Größe der tatsächlich geöffneten Datei (kein Wechsel zwischen stat und open)
+            stat = os.fstat(f.fileno())
+            identity = (stat.st_dev, stat.st_ino)
+            replaced = self.identity is not None and identity != self.identity
+            if replaced or stat.st_size < self.offset:
+                self.offset, self.header, reset = 0, None, True
+            self.identity = identity
+            f.seek(self.offset)
+            chunk = f.read()
+
+        # Nur vollständige Zeilen verarbeiten; der Rest folgt beim nächsten Aufruf
+        end = chunk.rfind(b"\n") + 1
+        if end == 0:
+            return pd.DataFrame(), reset
+        self.offset += end
+        lines = chunk[:end]
+
+        if self.header is None:
+            # Ohne Kopfzeile gilt die Spaltenreihenfolge des Produktionsdatensatzes
+            first, _, rest = lines.partition(b"\n")
+            if is_header(first.decode("utf-8").strip(), self.columns):
+                self.header, lines = first + b"\n", rest
+            else:
+                self.header = (",".join(self.columns) + "\n").encode("utf-8")
+        if not lines.strip():
+            return pd.DataFrame(), reset
+        return pd.read_csv(io.BytesIO(self.header + lines), on_bad_lines="skip"), reset
+
+
+class _FeedServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class SocketFeed:
+    """
+    Lokaler TCP-Server; jede Verbindung sendet CSV-Zeilen im Format des
+    Produktionsdatensatzes. Empfangene Zeilen werden bis zum Abruf gepuffert.
+    """
+
+    def __init__(self, host: str, port: int):
+        self.columns = feed_columns()
+        self.lines: "queue.Queue[str]" = queue.Queue()
+        feed = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self) -> None:
+                for raw in self.rfile:
+                    line = raw.decode("utf-8").strip()
+                    # Kopfzeilen (auch mehrfach, je Verbindung) überspringen
+                    if line and not is_header(line, feed.columns):
+                        feed.lines.put(line)
+
+        self.server = _FeedServer((host, port), Handler)
+        threading.Thread(
+            target=self.server.serve_forever, name="live-feed-socket", daemon=True
+        ).start()
+        logger.info("Live-Feed wartet auf %s:%d", host, port)
+
+    def read_new(self) -> Tuple[pd.DataFrame, bool]:
+        lines = []
+        while True:
+            try:
+                lines.append(self.lines.get_nowait())
+            except queue.Empty:
+                break
+        if not lines:
+            return pd.DataFrame(), False
+        text = ",".join(self.columns) + "\n" + "\n".join(lines) + "\n"
+        return pd.read_csv(io.StringIO(text), on_bad_lines="skip"), False
+
+
+def _parse_address(source: str) -> Tuple[str, int]:
+    host, _, port = source[len("tcp://"):].rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+# =========================
+# Feed
+# =========================
+class LiveFeed:
+    """Gemeinsamer Live-Feed aller Sessions: Quelle plus laufende Kennzahlen."""
+
+    def __init__(self, source: str):
+        self.source = source
+        if source.startswith("tcp://"):
+            self.reader = SocketFeed(*_parse_address(source))
+        else:
+            self.reader = FileTail(source)
+        self.kpis = LiveKpis()
+        self.rolling = RollingKpis()
+        self.updated: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    def poll(self) -> int:
+        """Übernimmt neue Zeilen der Quelle; liefert deren Anzahl."""
+        with self._lock:
+            raw, reset = self.reader.read_new()
+            if reset:
+                self.kpis = LiveKpis(self.kpis.recent_rows)
+                self.rolling = RollingKpis(self.rolling.windows)
+            if raw.empty:
+                return 0
+            batch = prepare_kpi_data(raw)
+            self.kpis.update(batch)
+            self.rolling.update(batch)
+            self.updated = datetime.now()
+            return len(batch)
+
+
+_feeds: Dict[str, LiveFeed] = {}
+_feeds_lock = threading.Lock()
+
+
+def get_feed(source: Optional[str] = None) -> Optional[LiveFeed]:
+    """Liefert den (pro Prozess einmal angelegten) Feed einer Quelle oder None."""
+    source = source or live_source()
+    if source is None:
+        return None
+    with _feeds_lock:
+        if source not in _feeds:
+            _feeds[source] = LiveFeed(source)
+        return _feeds[source]
+
+
+# =========================
+# Testdaten einspielen
+# =========================
+@contextmanager
+def _sink(target: str, columns: List[str]) -> Iterator[Callable[[str], None]]:
+    """Schreibfunktion für eine Live-Quelle; Verbindung bzw. Datei wird am Ende geschlossen."""
+    if target.startswith("tcp://"):
+        with socket.create_connection(_parse_address(target)) as conn:
+            def send(line: str) -> None:
+                conn.sendall(line.encode("utf-8"))
+
+            yield send
+        return
+
+    path = Path(target)
+    new_file = not path.exists() or path.stat().st_size == 0
+    with open(path, "a", encoding="utf-8") as out:
+        if new_file:
+            out.write(",".join(columns) + "\n")
+
+        def send(line: str) -> None:
+            out.write(line)
+            out.flush()
+
+        yield send
+
+
+def replay(target: str, rate: float, limit: Optional[int] = None) -> None:
+    """
+    Spielt Zeilen des Produktionsdatensatzes mit heutigem Datum in eine
+    Live-Quelle ein (rate = Zeilen pro Sekunde).
+    """
+    rows = pd.read_csv(DEFAULT_DATA_PATH).sample(frac=1, random_state=0)
+    if limit is not None:
+        rows = rows.head(limit)
+
+    with _sink(target, list(rows.columns)) as send:
+        for _, row in rows.iterrows():
+            row["Datum"] = datetime.now().date().isoformat()
+            send(row.to_frame().T.to_csv(index=False, header=False))
+            time.sleep(1 / rate)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Produktionsdaten in eine Live-Quelle einspielen")
+    parser.add_argument("target", help="CSV-Datei (wird ergänzt) oder tcp://host:port")
+    parser.add_argument("--rate", type=float, default=5, help="Zeilen pro Sekunde")
+    parser.add_argument("--limit", type=int, default=None, help="Anzahl Zeilen (Standard: alle)")
+    args = parser.parse_args()
+    replay(args.target, args.rate, args.limit)
+
+
+if __name__ == "__main__":
+    main()
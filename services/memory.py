@@ -0,0 +1,229 @@
+"""
+Speicherbericht für gecachte Objekte und Sessions.
+
+Erfasst werden:
+
+- Ergebnisse der mit services.metrics.cache_data gecachten Funktionen
+  (je Argumentkombination, DataFrames aufgeschlüsselt nach Spalten).
+  Die Aufschlüsselung wird beim Berechnen (Cache-Miss) erstellt; Streamlit
+  selbst hält die Ergebnisse serialisiert (Pickle) und liefert bei jedem
+  Hit eine neue Kopie – dessen Bytes stehen in streamlit_cache_report().
+- der Spalten-Cache des Loaders (services.data_loader)
+- große Objekte im Session State aller aktiven Sessions
+
+Angezeigt wird der Bericht im Admin-Bereich von app.py (services.admin).
+"""
+
+import dataclasses
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterator, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Anzahl gemerkter Argumentkombinationen je gecachter Funktion
+MAX_ENTRIES_PER_FUNCTION = 128
+
+# Session-State-Objekte ab dieser Größe erscheinen im Bericht
+SESSION_MIN_BYTES = 64 * 1024
+
+_cached_results: Dict[str, "OrderedDict[str, pd.DataFrame]"] = {}
+_lock = threading.Lock()
+
+
+def deep_sizeof(obj, _seen=None) -> int:
+    """
+    Geschätzter Speicherbedarf eines Objekts inkl. enthaltener Objekte.
+
+    DataFrames/Series zählen mit memory_usage(deep=True), Arrays mit nbytes;
+    Container, Dataclasses und Objekte mit __dict__ werden rekursiv erfasst.
+    """
+    seen = _seen if _seen is not None else set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__") and not isinstance(obj, type):
+        size += deep_sizeof(vars(obj), seen)
+    elif hasattr(obj, "__slots__"):
+        size += sum(deep_sizeof(getattr(obj, s), seen) for s in obj.__slots__ if hasattr(obj, s))
+    return size
+
+
+def _frames(value, prefix: str = "") -> Iterator[Tuple[str, pd.DataFrame]]:
+    """DataFrames in einem Ergebnis (direkt oder als Felder einer Dataclass)."""
+    if isinstance(value, pd.DataFrame):
+        yield prefix, value
+    elif isinstance(value, pd.Series):
+        yield prefix, value.to_frame(value.name or "Wert")
+    elif dataclasses.is_dataclass(value) and not isinstance(value, type):
+        for field in dataclasses.fields(value):
+            yield from _frames(getattr(value, field.name), f"{prefix}{field.name}.")
+
+
+def frame_memory(df: pd.DataFrame, prefix: str = "") -> pd.DataFrame:
+    """
+    Speicherbedarf je Spalte.
+
+    Returns:
+        pd.DataFrame: Spalte, Dtype, Zeilen, Bytes
+    """
+    usage = df.memory_usage(index=True, deep=True)
+    return pd.DataFrame({
+        "Spalte": [f"{prefix}{c}" for c in usage.index],
+        "Dtype": ["index" if c == "Index" else str(df[c].dtype) for c in usage.index],
+        "Zeilen": len(df),
+        "Bytes": usage.to_numpy(dtype="int64")
+    })
+
+
+def object_memory(value) -> pd.DataFrame:
+    """Spaltenaufschlüsselung eines Ergebnisses; sonstige Objekte als eine Zeile."""
+    parts = [frame_memory(df, prefix) for prefix, df in _frames(value)]
+    if parts:
+        return pd.concat(parts, ignore_index=True)
+    return pd.DataFrame([{
+        "Spalte": "-", "Dtype": type(value).__name__,
+        "Zeilen": len(value) if hasattr(value, "__len__") else 1,
+        "Bytes": deep_sizeof(value)
+    }])
+
+
+def record_cached_result(function: str, arguments: str, value) -> None:
+    """Merkt sich die Spaltenaufschlüsselung eines frisch berechneten Cache-Eintrags."""
+    breakdown = object_memory(value)
+    with _lock:
+        entries = _cached_results.setdefault(function, OrderedDict())
+        entries[arguments] = breakdown
+        entries.move_to_end(arguments)
+        while len(entries) > MAX_ENTRIES_PER_FUNCTION:
+            entries.popitem(last=False)
+
+
+def forget_cached_results(function: str) -> None:
+    with _lock:
+        _cached_results.pop(function, None)
+
+
+def cache_report() -> pd.DataFrame:
+    """
+    Gecachte Ergebnisse je Funktion und Argumentkombination.
+
+    Returns:
+        pd.DataFrame: Funktion, Argumente, Zeilen, Spalten, Bytes (größte zuerst)
+    """
+    with _lock:
+        items = [(f, a, b) for f, entries in _cached_results.items() for a, b in entries.items()]
+
+    rows = [{
+        "Funktion": function,
+        "Argumente": arguments,
+        "Zeilen": int(breakdown["Zeilen"].max()),
+        "Spalten": int((breakdown["Dtype"] != "index").sum()),
+        "Bytes": int(breakdown["Bytes"].sum())
+    } for function, arguments, breakdown in items]
+    columns = ["Funktion", "Argumente", "Zeilen", "Spalten", "Bytes"]
+    return pd.DataFrame(rows, columns=columns).sort_values("Bytes", ascending=False, ignore_index=True)
+
+
+def cache_columns(function: str, arguments: str) -> pd.DataFrame:
+    """Spaltenaufschlüsselung eines Eintrags aus cache_report()."""
+    with _lock:
+        breakdown = _cached_results.get(function, {}).get(arguments)
+    if breakdown is None:
+        return pd.DataFrame(columns=["Spalte", "Dtype", "Zeilen", "Bytes"])
+    return breakdown.sort_values("Bytes", ascending=False, ignore_index=True)
+
+
+def streamlit_cache_report() -> pd.DataFrame:
+    """
+    Von Streamlit gehaltene Bytes je gecachter Funktion (serialisiert).
+
+    Returns:
+        pd.DataFrame: Funktion, Eintraege, Bytes
+    """
+    from streamlit.runtime.caching import get_data_cache_stats_provider
+
+    stats = [s for family in get_data_cache_stats_provider().get_stats().values() for s in family]
+    df = pd.DataFrame(
+        [{"Funktion": s.cache_name, "Bytes": s.byte_length} for s in stats],
+        columns=["Funktion", "Bytes"]
+    )
+    return (
+        df.groupby("Funktion")
+        .agg(Eintraege=("Bytes", "size"), Bytes=("Bytes", "sum"))
+        .sort_values("Bytes", ascending=False)
+        .reset_index()
+    )
+
+
+def loader_cache_report() -> pd.DataFrame:
+    """
+    Spalten-Cache des Loaders je Datei und Spalte.
+
+    Returns:
+        pd.DataFrame: Datei, Spalte, Dtype, Zeilen, Bytes
+    """
+    from services.data_loader import column_cache_columns
+
+    rows = [{
+        "Datei": path,
+        "Spalte": name,
+        "Dtype": str(series.dtype),
+        "Zeilen": len(series),
+        "Bytes": int(series.memory_usage(index=False, deep=True))
+    } for path, name, series in column_cache_columns()]
+    columns = ["Datei", "Spalte", "Dtype", "Zeilen", "Bytes"]
+    return pd.DataFrame(rows, columns=columns).sort_values("Bytes", ascending=False, ignore_index=True)
+
+
+def _active_session_states() -> Iterator[Tuple[str, Dict[str, object]]]:
+    from streamlit.runtime import Runtime
+
+    if Runtime.exists():
+        # Kein öffentliches API für alle Sessions – Diagnose nutzt den Session-Manager
+        session_mgr = getattr(Runtime.instance(), "_session_mgr", None)
+        if session_mgr is not None:
+            for info in session_mgr.list_active_sessions():
+                yield info.session.id, info.session.session_state.filtered_state
+            return
+
+    # Ohne Server (z. B. AppTest): nur die aktuelle Session
+    import streamlit as st
+    yield "aktuell", st.session_state.to_dict()
+
+
+def session_report(min_bytes: int = SESSION_MIN_BYTES) -> pd.DataFrame:
+    """
+    Objekte im Session State je Session ab min_bytes.
+
+    Returns:
+        pd.DataFrame: Session, Schluessel, Typ, Bytes (größte zuerst)
+    """
+    rows = []
+    for session_id, state in _active_session_states():
+        total = 0
+        for key, value in state.items():
+            size = deep_sizeof(value)
+            total += size
+            if size >= min_bytes:
+                rows.append({"Session": session_id, "Schluessel": key,
+                             "Typ": type(value).__name__, "Bytes": size})
+        rows.append({"Session": session_id, "Schluessel": "(gesamt)", "Typ": "", "Bytes": total})
+
+    columns = ["Session", "Schluessel", "Typ", "Bytes"]
+    return pd.DataFrame(rows, columns=columns).sort_values("Bytes", ascending=False, ignore_index=True)
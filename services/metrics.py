@@ -0,0 +1,318 @@
+"""
+Metriken im Prometheus-Textformat.
+
+Ein kleiner HTTP-Server in einem Daemon-Thread liefert unter /metrics:
+
+- portfolio_stage_duration_seconds  Histogramm je Stufe (aus services.timing)
+- portfolio_page_render_seconds     Histogramm je Seite
+- portfolio_cache_requests_total    Hits/Misses je gecachter Funktion
+- portfolio_dataset_rows / _bytes   Zeilen und Speicher der geladenen Dateien
+- portfolio_process_peak_rss_bytes  Peak-RSS des Prozesses
+
+Gestartet wird der Server mit PORTFOLIO_METRICS_PORT=<port> (nur lokal,
+127.0.0.1). Zum Prüfen genügt ein lokaler Scraper:
+
+    curl -s localhost:9108/metrics
+"""
+
+import functools
+import logging
+import os
+import resource
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import streamlit as st
+
+from services.memory import forget_cached_results, record_cached_result
+from services.timing import timer
+
+logger = logging.getLogger(__name__)
+
+# Standard-Buckets von Prometheus (Sekunden)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in items) + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._lock = threading.Lock()
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} {self.kind}",
+            *self.samples()
+        ]
+
+
+class Counter(_Metric):
+    """Monoton steigender Zähler je Label-Kombination."""
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        super().__init__(name, help_text)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{_format_labels(k)} {_format_value(v)}" for k, v in sorted(values.items())]
+
+
+class Gauge(_Metric):
+    """Momentaufnahme; Werte werden beim Abruf über eine Funktion ermittelt."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, collect: Callable[[], Dict[Labels, float]]):
+        super().__init__(name, help_text)
+        self._collect = collect
+
+    def samples(self) -> List[str]:
+        try:
+            values = self._collect()
+        except Exception:
+            logger.exception("Gauge %s konnte nicht ermittelt werden", self.name)
+            return []
+        return [f"{self.name}{_format_labels(k)} {_format_value(v)}" for k, v in sorted(values.items())]
+
+
+class Histogram(_Metric):
+    """Kumulative Buckets plus _sum und _count je Label-Kombination."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Labels, List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            # [Bucket-Zähler..., +Inf, Summe]
+            state = self._values.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += 1
+            state[-1] += value
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = {k: list(v) for k, v in self._values.items()}
+
+        lines = []
+        for key, state in sorted(values.items()):
+            for bound, count in zip(self.buckets, state):
+                le = _format_labels(key, ("le", f"{bound:g}"))
+                lines.append(f"{self.name}_bucket{le} {_format_value(count)}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {_format_value(state[-2])}")
+        return lines
+
+
+# =========================
+# Registry
+# =========================
+def _dataset_stats(index: int) -> Dict[Labels, float]:
+    from services.data_loader import column_cache_stats
+
+    return {(("source", path),): stats[index] for path, stats in column_cache_stats().items()}
+
+
+def _dataset_version() -> Dict[Labels, float]:
+    from services.refresh import current_snapshot
+
+    return {(): float(current_snapshot().version)}
+
+
+def _peak_rss() -> Dict[Labels, float]:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux liefert KiB, macOS Bytes
+    return {(): float(peak if sys.platform == "darwin" else peak * 1024)}
+
+
+STAGE_DURATION = Histogram(
+    "portfolio_stage_duration_seconds", "Dauer der gemessenen Stufen (services.timing.span)"
+)
+PAGE_RENDER = Histogram(
+    "portfolio_page_render_seconds", "Dauer eines kompletten Seitenlaufs"
+)
+CACHE_REQUESTS = Counter(
+    "portfolio_cache_requests_total", "Aufrufe gecachter Funktionen nach Ergebnis (hit/miss)"
+)
+DATASET_ROWS = Gauge(
+    "portfolio_dataset_rows", "Zeilen je geladener Datei im Spalten-Cache",
+    lambda: _dataset_stats(0)
+)
+DATASET_BYTES = Gauge(
+    "portfolio_dataset_bytes", "Speicherbedarf der gecachten Spalten je Datei",
+    lambda: _dataset_stats(1)
+)
+PEAK_RSS = Gauge(
+    "portfolio_process_peak_rss_bytes", "Peak-RSS des Streamlit-Prozesses", _peak_rss
+)
+
+DATASET_VERSION = Gauge(
+    "portfolio_dataset_version", "Version des aktiven Datenstands (services.refresh)",
+    _dataset_version
+)
+
+REGISTRY: List[_Metric] = [
+    STAGE_DURATION, PAGE_RENDER, CACHE_REQUESTS, DATASET_ROWS, DATASET_BYTES, PEAK_RSS,
+    DATASET_VERSION
+]
+
+
+def render_metrics() -> str:
+    """Alle Metriken im Prometheus-Textformat (Version 0.0.4)."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# =========================
+# Cache-Instrumentierung
+# =========================
+_cache_state = threading.local()
+
+
+def _format_arguments(args: tuple, kwargs: dict) -> str:
+    parts = [repr(a) for a in args] + [f"{k}={v!r}" for k, v in kwargs.items()]
+    text = ", ".join(parts)
+    return text if len(text) <= 200 else text[:197] + "..."
+
+
+def _miss_flags() -> List[List[bool]]:
+    if not hasattr(_cache_state, "flags"):
+        _cache_state.flags = []
+    return _cache_state.flags
+
+
+def cache_data(func: Optional[Callable] = None, **kwargs):
+    """
+    Ersatz für @st.cache_data, der Hits und Misses je Funktion zählt.
+
+    Streamlit führt die Funktion nur bei einem Miss aus; ein Merker je
+    Aufruf (Stack im aufrufenden Thread, auch bei verschachtelten
+    gecachten Funktionen) unterscheidet so beide Fälle. Bei einem Miss
+    wird zusätzlich der Speicherbedarf des Ergebnisses erfasst
+    (services.memory).
+    """
+    if func is None:
+        return lambda f: cache_data(f, **kwargs)
+
+    # Dateiname als Präfix, da mehrere Pages gleichnamige Funktionen haben
+    name = f"{Path(func.__code__.co_filename).stem}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def compute(*args, **kw):
+        _miss_flags()[-1].append(True)
+        result = func(*args, **kw)
+        record_cached_result(name, _format_arguments(args, kw), result)
+        return result
+
+    cached = st.cache_data(**kwargs)(compute)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kw):
+        flags = _miss_flags()
+        flags.append([])
+        try:
+            result = cached(*args, **kw)
+        finally:
+            missed = bool(flags.pop())
+        CACHE_REQUESTS.inc(function=name, result="miss" if missed else "hit")
+        return result
+
+    def clear(*args, **kw):
+        forget_cached_results(name)
+        return cached.clear(*args, **kw)
+
+    wrapper.clear = clear
+    return wrapper
+
+
+# =========================
+# HTTP-Server
+# =========================
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_metrics().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug("metrics: " + format, *args)
+
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+def _observe_stage(name: str, seconds: float, allocations: int) -> None:
+    if name.endswith(".page"):
+        PAGE_RENDER.observe(seconds, page=name[:-len(".page")])
+    else:
+        STAGE_DURATION.observe(seconds, stage=name)
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """
+    Startet den Metrik-Server einmalig pro Prozess (weitere Aufrufe liefern
+    den laufenden Server) und leitet die Spans aus services.timing weiter.
+    """
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            _server.daemon_threads = True
+            threading.Thread(
+                target=_server.serve_forever, name="metrics-server", daemon=True
+            ).start()
+            timer.add_listener(_observe_stage)
+            logger.info("Metriken unter http://%s:%d/metrics", host, _server.server_address[1])
+    return _server
+
+
+if os.environ.get("PORTFOLIO_METRICS_PORT"):
+    start_metrics_server(int(os.environ["PORTFOLIO_METRICS_PORT"]))
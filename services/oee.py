@@ -0,0 +1,140 @@
+"""
+OEE (Overall Equipment Effectiveness) = Verfügbarkeit × Leistung × Qualität.
+
+Jeder Faktor ist ein Quotient aus Summen (ratio-of-sums), nicht der
+Mittelwert von Quoten je Datensatz:
+
+    Verfügbarkeit = Σ Betriebsstunden / Σ (Betriebsstunden + Stillstand/60)
+    Leistung      = Σ Stückzahl / Σ (Betriebsstunden × Soll-Rate der Variante)
+    Qualität      = Σ (Stückzahl − Ausschuss) / Σ Stückzahl
+
+Lange Schichten und große Aufträge gehen damit mit ihrem Gewicht ein, und
+die Summen sind additiv (Roll-ups, Vorperioden, Live-Daten). compute_oee
+bildet die Summen für eine beliebige Gruppierung in einem einzigen
+bincount-Durchlauf (services.kpis.sum_table).
+
+Soll-Raten (Stück je Betriebsstunde) je Produkt/Modifikation: Standard ist
+die beste nachgewiesene Rate (95. Perzentil der Historie). Eine CSV mit den
+Spalten Produkt, Modifikation, Stueck_pro_h (PORTFOLIO_IDEAL_RATES) hat
+Vorrang; nicht aufgeführte Varianten behalten den Wert aus der Historie.
+"""
+
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services.kpis import add_kpis, rollup, sum_table
+
+VARIANT_COLUMNS = ("Produkt", "Modifikation")
+
+# Perzentil der Stück/h-Verteilung je Variante, das als Soll-Rate gilt
+IDEAL_RATE_QUANTILE = 0.95
+
+# Summen der drei Faktoren; Soll_Stueckzahl hängt von den Soll-Raten ab
+COMPONENTS = ("Betriebsstunden", "Planzeit_h", "Stueckzahl", "Gutteile")
+
+# Faktoren (Definitionen in services.kpis.KPIS)
+FACTORS = ("Verfuegbarkeit_%", "Leistung_%", "Qualitaet_%")
+
+# Feinste Gruppierung der gecachten OEE-Summentabelle (services.page_data.load_oee_table)
+OEE_GRAIN = ("Datum", "Produktionslinie", "Schicht")
+
+Variant = Tuple[str, str]
+
+
+@dataclass
+class IdealRates:
+    """Soll-Rate (Stück je Betriebsstunde) je Produkt/Modifikation."""
+    rates: Dict[Variant, float] = field(default_factory=dict)
+    # Für Varianten ohne eigene Soll-Rate
+    default: float = np.nan
+
+    @classmethod
+    def from_history(cls, df: pd.DataFrame, quantile: float = IDEAL_RATE_QUANTILE) -> "IdealRates":
+        """Beste nachgewiesene Rate je Variante (quantile der Stück/h über alle Datensätze)."""
+        hours = df["Betriebsstunden"].where(df["Betriebsstunden"] > 0)
+        rate = (df["Stueckzahl"] / hours).rename("rate")
+        valid = rate.notna()
+        keys = [df.loc[valid, c].astype(object) for c in VARIANT_COLUMNS]
+        per_variant = rate[valid].groupby(keys).quantile(quantile)
+        default = float(rate[valid].quantile(quantile)) if valid.any() else np.nan
+        return cls(rates={k: float(v) for k, v in per_variant.items()}, default=default)
+
+    @classmethod
+    def from_csv(cls, path: str) -> "IdealRates":
+        """Konfigurierte Soll-Raten (Spalten Produkt, Modifikation, Stueck_pro_h)."""
+        table = pd.read_csv(path)
+        keys = zip(*(table[c].astype(str) for c in VARIANT_COLUMNS))
+        return cls(rates=dict(zip(keys, table["Stueck_pro_h"].astype(float))))
+
+    def override(self, other: "IdealRates") -> "IdealRates":
+        """Soll-Raten aus other haben Vorrang."""
+        default = other.default if not np.isnan(other.default) else self.default
+        return IdealRates(rates={**self.rates, **other.rates}, default=default)
+
+    def for_rows(self, df: pd.DataFrame) -> np.ndarray:
+        """Soll-Rate je Datensatz (vektorisiert über den Varianten-Schlüssel)."""
+        if not self.rates:
+            return np.full(len(df), self.default)
+        lookup = pd.Series(self.rates, dtype="float64")
+        keys = pd.MultiIndex.from_arrays([df[c].astype(object) for c in VARIANT_COLUMNS])
+        return lookup.reindex(keys).fillna(self.default).to_numpy()
+
+    def as_frame(self) -> pd.DataFrame:
+        """Soll-Raten als Tabelle (für die Anzeige)."""
+        rows = [(*key, rate) for key, rate in sorted(self.rates.items())]
+        return pd.DataFrame(rows, columns=[*VARIANT_COLUMNS, "Stueck_pro_h"])
+
+
+def ideal_rates(df: pd.DataFrame) -> IdealRates:
+    """Soll-Raten aus der Historie, überschrieben durch PORTFOLIO_IDEAL_RATES (falls gesetzt)."""
+    rates = IdealRates.from_history(df)
+    path = os.environ.get("PORTFOLIO_IDEAL_RATES")
+    if path:
+        rates = rates.override(IdealRates.from_csv(path))
+    return rates
+
+
+def ideal_output(df: pd.DataFrame, rates: IdealRates) -> np.ndarray:
+    """Soll-Stückzahl je Datensatz: Betriebsstunden × Soll-Rate der Variante."""
+    return df["Betriebsstunden"].to_numpy(dtype="float64", na_value=np.nan) * rates.for_rows(df)
+
+
+def add_oee(table: pd.DataFrame) -> pd.DataFrame:
+    """Faktoren und OEE_% aus einer Summentabelle mit COMPONENTS und Soll_Stueckzahl."""
+    result = add_kpis(table, FACTORS)
+    result["OEE_%"] = np.prod([result[f].to_numpy() / 100 for f in FACTORS], axis=0) * 100
+    return result
+
+
+def compute_oee(
+    df: pd.DataFrame,
+    rates: IdealRates,
+    by: Sequence[str] = ()
+) -> pd.DataFrame:
+    """
+    OEE und Faktoren je Gruppe (by=() = eine Zeile für den gesamten Datensatz).
+
+    Returns:
+        pd.DataFrame: by-Spalten, die Summen aus COMPONENTS und Soll_Stueckzahl,
+        die Faktoren aus FACTORS und OEE_% (jeweils in Prozent, NaN bei Nenner 0)
+    """
+    return add_oee(oee_sum_table(df, rates, by))
+
+
+def oee_sum_table(df: pd.DataFrame, rates: IdealRates, by: Sequence[str] = ()) -> pd.DataFrame:
+    """Summen aus COMPONENTS und Soll_Stueckzahl je Gruppe (Grundlage für oee_rollup)."""
+    return sum_table(df, by, COMPONENTS, extra={"Soll_Stueckzahl": ideal_output(df, rates)})
+
+
+def oee_rollup(table: pd.DataFrame, by: Sequence[str] = ()) -> pd.DataFrame:
+    """OEE je gröberer Gruppe aus einer (ggf. gefilterten) oee_sum_table."""
+    return add_oee(rollup(table, by))
+
+
+def oee_totals(df: pd.DataFrame, rates: IdealRates) -> pd.Series:
+    """OEE und Faktoren über den gesamten Datensatz."""
+    return compute_oee(df, rates).iloc[0]
@@ -0,0 +1,325 @@
+"""
+OLAP-Würfel über fact_produktion und die Dimensionen des Star Schema.
+
+Der Würfel materialisiert Teilaggregate (Cuboids) in mehreren Körnungen –
+von Unternehmen × Linie × Schicht × Produkt × Tag bis Unternehmen × Linie.
+Eine Abfrage wählt das kleinste Cuboid, das alle benötigten Ebenen enthält
+(Gruppierung und Filter), und fasst nur dessen Zeilen zusammen; die
+Faktentabelle wird nach dem Aufbau nicht mehr gelesen. Jahr und Monat
+ergeben sich aus dem Tag, die Summen sind additiv, Quoten werden erst am
+Ergebnis aus den Summen berechnet.
+
+CubeView bildet die OLAP-Operationen als unveränderliche Sicht ab:
+
+    view = cube.view().drill_down("Unternehmen").drill_down("Produktionslinie")
+    view.slice("Jahr", 2023).dice(Schicht=["Früh", "Spät"]).result()
+    view.roll_up().pivot("Produktionslinie", "Schicht", "Ausschussquote_%")
+"""
+
+from dataclasses import dataclass, replace
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services.kpis import KPIS
+from services.star_schema import StarSchema
+
+# Summen je Zelle: Spalte der Faktentabelle -> Name im Ergebnis
+MEASURES: Dict[str, str] = {
+    "Stueckzahl": "Stueckzahl",
+    "Ausschuss": "Ausschuss",
+    "Stillstandszeit_Min": "Stillstandszeit_Min",
+    "Energieverbrauch_kWh": "Energieverbrauch_kWh",
+    "Materialkosten": "Materialkosten",
+    "Betriebsstunden": "Betriebsstunden",
+}
+
+# Aus Summen abgeleitete Kennzahlen (Definitionen in services.kpis): Name -> (Zähler, Nenner, Faktor)
+RATIOS: Dict[str, Tuple[str, str, float]] = {
+    name: (KPIS[name].numerator, KPIS[name].denominator, KPIS[name].scale)
+    for name in ("Ausschussquote_%", "kWh_pro_Stück", "Stillstand_Min_pro_h")
+}
+
+# Standard-Drillpfad der SQL-Seite
+DRILL_PATH = ("Unternehmen", "Produktionslinie", "Schicht", "Produkt", "Tag")
+
+# Materialisierte Körnungen (die erste ist die feinste und wird aus der Faktentabelle gebaut)
+DEFAULT_GRAINS: Tuple[Tuple[str, ...], ...] = (
+    ("Unternehmen", "Produktionslinie", "Schicht", "Produkt", "Tag"),
+    ("Unternehmen", "Produktionslinie", "Schicht", "Produkt", "Monat"),
+    ("Unternehmen", "Produktionslinie", "Schicht", "Produkt"),
+    ("Unternehmen", "Produktionslinie", "Schicht", "Monat"),
+    ("Unternehmen", "Produktionslinie", "Schicht", "Jahr"),
+    ("Unternehmen", "Produktionslinie", "Schicht"),
+    ("Unternehmen", "Produktionslinie", "Jahr"),
+    ("Unternehmen", "Produktionslinie"),
+)
+
+ROWS = "Datensätze"
+
+
+@dataclass(frozen=True)
+class Level:
+    """
+    Ebene des Würfels: ganzzahliger Code je Dimensions-ID (lookup[id]) und
+    Beschriftung je Code (labels[code]).
+
+    ids ist gesetzt, wenn Codes und IDs eins zu eins zusammengehören (z. B. Tag);
+    aus einer solchen Ebene lassen sich alle gröberen Ebenen derselben
+    Dimension ableiten (Monat, Jahr).
+    """
+    name: str
+    source: str
+    lookup: np.ndarray
+    labels: np.ndarray
+    ids: Optional[np.ndarray] = None
+
+    def codes_for(self, values: Iterable) -> np.ndarray:
+        """Codes der Beschriftungen values (unbekannte Werte werden ignoriert)."""
+        wanted = pd.Index(list(values))
+        return np.flatnonzero(pd.Index(self.labels).isin(wanted))
+
+
+def _level(name: str, source: str, ids: np.ndarray, keys: pd.Series) -> Level:
+    """Ebene aus ID-Spalte und Schlüsselwerten einer Dimension (Codes sortiert nach Schlüssel)."""
+    codes, uniques = pd.factorize(keys, sort=True)
+    lookup = np.full(int(ids.max(initial=0)) + 1, -1, dtype="int64")
+    lookup[ids] = codes
+    ids_by_code = None
+    if len(uniques) == len(ids):
+        ids_by_code = np.empty(len(ids), dtype="int64")
+        ids_by_code[codes] = ids
+    return Level(name, source, lookup, np.asarray(uniques, dtype=object), ids_by_code)
+
+
+def build_levels(schema: StarSchema) -> Dict[str, Level]:
+    """Ebenen aus den Dimensionstabellen (Jahr und Monat sind Vergröberungen von Tag)."""
+    datum = schema.dim_datum
+    datum_ids = datum["datum_id"].to_numpy(dtype="int64")
+    produkt = schema.dim_produkt
+    levels = [
+        _level("Unternehmen", "unternehmen_id", schema.dim_unternehmen["unternehmen_id"].to_numpy(dtype="int64"),
+               schema.dim_unternehmen["Unternehmen"]),
+        _level("Produktionslinie", "linie_id", schema.dim_linie["linie_id"].to_numpy(dtype="int64"),
+               schema.dim_linie["Produktionslinie"]),
+        _level("Schicht", "schicht_id", schema.dim_schicht["schicht_id"].to_numpy(dtype="int64"),
+               schema.dim_schicht["Schicht"]),
+        _level("Produkt", "produkt_id", produkt["produkt_id"].to_numpy(dtype="int64"),
+               produkt["Produkt"].astype(str) + " " + produkt["Modifikation"].astype(str)),
+        _level("Jahr", "datum_id", datum_ids, datum["jahr"]),
+        _level("Monat", "datum_id", datum_ids,
+               datum["jahr"].astype(str) + "-" + datum["monat"].astype(str).str.zfill(2)),
+        _level("Tag", "datum_id", datum_ids, datum["Datum"].dt.date),
+    ]
+    return {level.name: level for level in levels}
+
+
+def group_codes(keys: Sequence[np.ndarray], sizes: Sequence[int]) -> Tuple[np.ndarray, List[np.ndarray]]:
+    """
+    Gruppennummer je Zeile für mehrere Code-Spalten (kombinierter Integer-Schlüssel).
+
+    Returns:
+        (inverse, codes je Spalte und Gruppe)
+    """
+    if not keys:
+        return np.zeros(0, dtype="int64"), []
+    if float(np.prod([max(s, 1) for s in sizes], dtype="float64")) < 2**62:
+        composite = np.ravel_multi_index(tuple(keys), tuple(max(s, 1) for s in sizes))
+        uniques, inverse = np.unique(composite, return_inverse=True)
+        return inverse, list(np.unravel_index(uniques, tuple(max(s, 1) for s in sizes)))
+    uniques, inverse = np.unique(np.column_stack(keys), axis=0, return_inverse=True)
+    return inverse.ravel(), [uniques[:, i] for i in range(len(keys))]
+
+
+@dataclass
+class Cuboid:
+    """Materialisiertes Teilaggregat: Codes je Ebene und Summen je Zelle."""
+    grain: Tuple[str, ...]
+    codes: Dict[str, np.ndarray]
+    sums: Dict[str, np.ndarray]
+
+    def __len__(self) -> int:
+        return len(self.sums[ROWS])
+
+
+class OlapCube:
+    """
+    Würfel mit vorberechneten Teilaggregaten in mehreren Körnungen.
+
+    Alle Abfragen laufen auf dem kleinsten passenden Cuboid – unabhängig von
+    der Größe der Faktentabelle, aus der der Würfel einmalig gebaut wurde.
+    """
+
+    def __init__(self, levels: Dict[str, Level], cuboids: List[Cuboid]):
+        self.levels = levels
+        self.cuboids = sorted(cuboids, key=len)
+
+    @classmethod
+    def from_schema(
+        cls, schema: StarSchema, grains: Sequence[Tuple[str, ...]] = DEFAULT_GRAINS
+    ) -> "OlapCube":
+        levels = build_levels(schema)
+        fact = schema.fact_produktion
+        base_grain = tuple(grains[0])
+
+        # Feinstes Cuboid direkt aus den Fremdschlüsseln der Faktentabelle
+        codes = {}
+        for name in base_grain:
+            level = levels[name]
+            ids = fact[level.source].to_numpy(dtype="float64", na_value=-1).astype("int64")
+            ids[ids >= len(level.lookup)] = -1
+            codes[name] = np.where(ids >= 0, level.lookup[np.maximum(ids, 0)], -1)
+        # Zeilen ohne Dimensionszuordnung fallen wie beim JOIN weg
+        valid = np.logical_and.reduce([c >= 0 for c in codes.values()]) if codes else slice(None)
+        values = {
+            column: fact[column].to_numpy(dtype="float64", na_value=0.0)[valid] for column in MEASURES
+        }
+        values[ROWS] = np.ones(len(fact), dtype="float64")[valid]
+        cube = cls(levels, [])
+        base = cube._aggregate_rows({name: c[valid] for name, c in codes.items()}, values, base_grain)
+
+        cuboids = [base]
+        for grain in grains[1:]:
+            # Jede weitere Körnung aus dem kleinsten bereits gebauten Cuboid, das sie abdeckt
+            source = min((c for c in cuboids if cube._covers(c, grain)), key=len)
+            cuboids.append(cube._aggregate_rows(
+                {name: cube._codes(source, name) for name in grain}, source.sums, tuple(grain)
+            ))
+        return cls(levels, cuboids)
+
+    # ---------- Bausteine ----------
+
+    def _covers(self, cuboid: Cuboid, names: Iterable[str]) -> bool:
+        """Kann das Cuboid die Ebenen liefern (direkt oder als Vergröberung, z. B. Monat aus Tag)?"""
+        return all(name in cuboid.codes or self._finer(cuboid, name) is not None for name in names)
+
+    def _finer(self, cuboid: Cuboid, name: str) -> Optional[str]:
+        """Ebene im Cuboid, deren Codes den IDs derselben Dimension entsprechen."""
+        source = self.levels[name].source
+        for candidate in cuboid.grain:
+            level = self.levels[candidate]
+            if level.source == source and level.ids is not None:
+                return candidate
+        return None
+
+    def _codes(self, cuboid: Cuboid, name: str) -> np.ndarray:
+        if name in cuboid.codes:
+            return cuboid.codes[name]
+        finer = self.levels[self._finer(cuboid, name)]
+        return self.levels[name].lookup[finer.ids[cuboid.codes[finer.name]]]
+
+    def _aggregate_rows(
+        self, codes: Dict[str, np.ndarray], values: Dict[str, np.ndarray], grain: Tuple[str, ...]
+    ) -> Cuboid:
+        keys = [codes[name] for name in grain]
+        sizes = [len(self.levels[name].labels) for name in grain]
+        inverse, cell_codes = group_codes(keys, sizes)
+        n = int(inverse.max(initial=-1)) + 1 if grain else 1
+        if not grain:
+            inverse = np.zeros(len(values[ROWS]), dtype="int64")
+        sums = {column: np.bincount(inverse, weights=v, minlength=n) for column, v in values.items()}
+        return Cuboid(grain, dict(zip(grain, cell_codes)), sums)
+
+    def cuboid_for(self, names: Iterable[str]) -> Cuboid:
+        """Kleinstes Cuboid, das alle Ebenen enthält."""
+        names = list(names)
+        for cuboid in self.cuboids:
+            if self._covers(cuboid, names):
+                return cuboid
+        raise ValueError(f"Kein Cuboid enthält die Ebenen {names}")
+
+    # ---------- Abfrage ----------
+
+    def query(
+        self,
+        levels: Sequence[str] = (),
+        filters: Optional[Dict[str, Sequence]] = None
+    ) -> pd.DataFrame:
+        """
+        Summen und Quoten je Kombination der Ebenen, eingeschränkt auf filters
+        (Ebene -> erlaubte Beschriftungen).
+        """
+        filters = filters or {}
+        unknown = [name for name in [*levels, *filters] if name not in self.levels]
+        if unknown:
+            raise ValueError(f"Unbekannte Ebene: {', '.join(unknown)} (verfügbar: {', '.join(self.levels)})")
+
+        cuboid = self.cuboid_for([*levels, *filters])
+        mask = np.ones(len(cuboid), dtype=bool)
+        for name, allowed in filters.items():
+            mask &= np.isin(self._codes(cuboid, name), self.levels[name].codes_for(allowed))
+
+        codes = {name: self._codes(cuboid, name)[mask] for name in levels}
+        values = {column: v[mask] for column, v in cuboid.sums.items()}
+        rolled = self._aggregate_rows(codes, values, tuple(levels))
+
+        result = pd.DataFrame({name: self.levels[name].labels[rolled.codes[name]] for name in levels})
+        result[ROWS] = rolled.sums[ROWS].round().astype("int64")
+        for column, alias in MEASURES.items():
+            result[alias] = rolled.sums[column]
+        for alias, (numerator, denominator, scale) in RATIOS.items():
+            result[alias] = (
+                result[numerator] * scale / result[denominator].replace(0, np.nan)
+            ).round(3)
+        if not levels:
+            result = result[result[ROWS] > 0]
+        return result.reset_index(drop=True)
+
+    def view(self) -> "CubeView":
+        return CubeView(self)
+
+
+@dataclass(frozen=True)
+class CubeView:
+    """
+    Unveränderliche Sicht auf den Würfel: Gruppierungsebenen (Drillpfad) und Filter.
+    Jede Operation liefert eine neue Sicht.
+    """
+    cube: OlapCube
+    levels: Tuple[str, ...] = ()
+    filters: Tuple[Tuple[str, Tuple], ...] = ()
+
+    def drill_down(self, level: Optional[str] = None) -> "CubeView":
+        """Eine Ebene feiner – ohne Angabe die nächste Ebene des Standard-Drillpfads."""
+        if level is None:
+            remaining = [name for name in DRILL_PATH if name not in self.levels]
+            if not remaining:
+                return self
+            level = remaining[0]
+        if level in self.levels:
+            return self
+        return replace(self, levels=self.levels + (level,))
+
+    def roll_up(self, level: Optional[str] = None) -> "CubeView":
+        """Eine Ebene gröber – ohne Angabe die zuletzt hinzugefügte."""
+        if not self.levels:
+            return self
+        level = level or self.levels[-1]
+        return replace(self, levels=tuple(name for name in self.levels if name != level))
+
+    def dice(self, **selection: Sequence) -> "CubeView":
+        """Filter auf mehrere Werte je Ebene, z. B. dice(Schicht=["Früh", "Spät"])."""
+        filters = dict(self.filters)
+        for name, values in selection.items():
+            if isinstance(values, (str, int)) or not isinstance(values, Iterable):
+                values = [values]
+            filters[name] = tuple(values)
+        return replace(self, filters=tuple(filters.items()))
+
+    def slice(self, level: str, value) -> "CubeView":
+        """Schnitt auf genau einen Wert; die Ebene verschwindet aus der Gruppierung."""
+        view = self.dice(**{level: [value]})
+        return replace(view, levels=tuple(name for name in view.levels if name != level))
+
+    def result(self) -> pd.DataFrame:
+        return self.cube.query(self.levels, dict(self.filters))
+
+    def source(self) -> Cuboid:
+        """Cuboid, aus dem result() beantwortet wird."""
+        return self.cube.cuboid_for([*self.levels, *dict(self.filters)])
+
+    def pivot(self, rows: str, columns: str, measure: str = "Stueckzahl") -> pd.DataFrame:
+        """Kreuztabelle zweier Ebenen für eine Kennzahl (unter den aktuellen Filtern)."""
+        frame = self.cube.query((rows, columns), dict(self.filters))
+        return frame.pivot(index=rows, columns=columns, values=measure)
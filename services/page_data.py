@@ -0,0 +1,174 @@
+"""
+Gecachte Daten der Analyse-Seiten.
+
+Pages und Warm-up (services.warmup) rufen dieselben Funktionen auf und
+teilen sich damit die Cache-Einträge: Was der Warm-up vorberechnet hat,
+ist für den ersten Besucher bereits ein Cache-Hit.
+
+Alle Funktionen erhalten die Version des Datenstands (services.refresh):
+Sie ist Teil des Cache-Schlüssels, und gelesen werden genau die Dateien
+dieses Stands. Einträge älterer Stände verdrängt max_entries.
+"""
+
+from typing import Iterable, Optional, Tuple
+
+import pandas as pd
+
+from services.costs import CostAttribution
+from services.data_loader import load_production_data
+from services.data_prep import (
+    KPI_COLUMNS, OOP_COLUMNS, KpiAggregates, aggregate_kpis, kpi_sum_table,
+    prepare_kpi_data, prepare_oop_data, prepare_sql_data
+)
+from services.downtime import DowntimeHistograms, build_histograms
+from services.error_index import ErrorCodeIndex
+from services.metrics import cache_data
+from services.oee import OEE_GRAIN, IdealRates, ideal_rates, oee_rollup, oee_sum_table
+from services.olap import OlapCube
+from services.period_compare import PeriodCube
+from services.refresh import snapshot_scope
+from services.rolling_kpis import RollingKpis
+from services.sketches import SketchCube
+from services.star_schema import StarSchema, build_star_schema
+from services.validation import ValidationResult
+
+# Einträge je Funktion (Filterkombinationen über aktuellen und vorherigen Datenstand)
+MAX_ENTRIES = 256
+
+
+@cache_data(max_entries=MAX_ENTRIES)
+def load_kpi_data(
+    jahre: Optional[Iterable[int]] = None,
+    linien: Optional[Iterable[str]] = None,
+    version: int = 0
+) -> pd.DataFrame:
+    """KPI-Dashboard: nur die angeforderten Jahr/Linie-Partitionen laden und aufbereiten"""
+    with snapshot_scope(version):
+        df = load_production_data(jahre=jahre, linien=linien, columns=KPI_COLUMNS)
+    return prepare_kpi_data(df)
+
+
+@cache_data(max_entries=MAX_ENTRIES)
+def load_kpi_table(jahr: int, linie: str = "All", version: int = 0) -> pd.DataFrame:
+    """KPI-Dashboard: Summentabelle je Monat/Linie/Schicht für ein Jahr (alle Schichten)"""
+    df = load_kpi_data(jahre=[jahr], linien=None if linie == "All" else [linie], version=version)
+    return kpi_sum_table(df[df["Jahr"] == jahr], load_ideal_rates(version=version))
+
+
+@cache_data(max_entries=MAX_ENTRIES)
+def load_kpi_aggregates(
+    jahr: int, linie: str = "All", schicht: str = "All", version: int = 0
+) -> KpiAggregates:
+    """KPI-Dashboard: Kennzahlen und Chart-Aggregate für eine Filterauswahl"""
+    table = load_kpi_table(jahr, linie, version=version)
+    if schicht != "All":
+        table = table[table["Schicht"] == schicht]
+    return aggregate_kpis(table)
+
+
+@cache_data(max_entries=MAX_ENTRIES)
+def load_ideal_rates(version: int = 0) -> IdealRates:
+    """Alle Seiten: OEE-Soll-Raten je Produkt/Modifikation aus der gesamten Historie"""
+    return ideal_rates(load_sql_data(version=version).clean)
+
+
+@cache_data(max_entries=MAX_ENTRIES)
+def load_oee_table(version: int = 0) -> pd.DataFrame:
+    """OOP- und SQL-Seite: OEE-Summentabelle je Tag/Linie/Schicht über alle Daten"""
+    return oee_sum_table(
+        load_sql_data(version=version).clean, load_ideal_rates(version=version), OEE_GRAIN
+    )
+
+
+@cache_data(max_entries=MAX_ENTRIES)
+def load_oee(by: Tuple[str, ...] = (), version: int = 0) -> pd.DataFrame:
+    """OOP- und SQL-Seite: OEE und Faktoren je Gruppierung über alle Daten"""
+    return oee_rollup(load_oee_table(version=version), by)
+
+
+@cache_data(max_entries=MAX_ENTRIES)
+def load_oee_totals(
+    linie: str,
+    start: pd.Timestamp,
+    end: pd.Timestamp,
+    schichten: Tuple[str, ...],
+    version: int = 0
+) -> pd.Series:
+    """OOP-Seite: OEE und Faktoren für Linie, Zeitraum und Schichten der Filterauswahl"""
+    table = load_oee_table(version=version)
+    mask = (
+        (table["Produktionslinie"] == linie)
+        & table["Schicht"].isin(schichten)
+        & table["Datum"].between(start, end)
+    )
+    return oee_rollup(table[mask]).iloc[0]
+
+
+@cache_data(max_entries=MAX_ENTRIES)
+def load_period_cube(version: int = 0) -> PeriodCube:
+    """KPI-Dashboard: Summen je Jahr/Monat/Schicht für Vorperioden-Vergleiche (alle Filter)"""
+    return PeriodCube(load_kpi_data(version=version))
+
+
+@cache_data(max_entries=MAX_ENTRIES)
+def load_rolling_kpis(version: int = 0) -> RollingKpis:
+    """KPI-Dashboard: rollierende Fenster zum Ende der Historie (alle Jahre, Linien und Schichten)"""
+    rolling = RollingKpis()
+    rolling.update(load_kpi_data(version=version))
+    return rolling
+
+
+@cache_data(max_entries=MAX_ENTRIES)
+def load_error_index(version: int = 0) -> ErrorCodeIndex:
+    """KPI-Dashboard: invertierter Index je Fehlercode/Linie/Schicht/Jahr für Pareto und Drill-through"""
+    return ErrorCodeIndex(load_sql_data(version=version).clean)
+
+
+@cache_data(max_entries=MAX_ENTRIES)
+def load_oop_data(
+    jahre: Optional[Iterable[int]] = None,
+    linien: Optional[Iterable[str]] = None,
+    version: int = 0
+) -> pd.DataFrame:
+    """OOP-Seite: Produktionsdaten laden und bereinigen (optional nur bestimmte Partitionen)"""
+    with snapshot_scope(version):
+        df = load_production_data(jahre=jahre, linien=linien, columns=OOP_COLUMNS)
+    return prepare_oop_data(df)
+
+
+@cache_data(max_entries=MAX_ENTRIES)
+def load_downtime_histograms(version: int = 0) -> DowntimeHistograms:
+    """OOP-Seite: Stillstands-Histogramme je Linie/Schicht/Fehlercode über alle Daten"""
+    return build_histograms(load_oop_data(version=version))
+
+
+@cache_data(max_entries=MAX_ENTRIES)
+def load_sql_data(version: int = 0) -> ValidationResult:
+    """SQL-Seite: Produktionsdaten laden und validieren (Typen, Wertebereiche, Duplikate)"""
+    with snapshot_scope(version):
+        df = load_production_data()
+    return prepare_sql_data(df)
+
+
+@cache_data(max_entries=MAX_ENTRIES)
+def load_cost_attribution(version: int = 0) -> CostAttribution:
+    """SQL-Seite: Summentabelle Produkt × Modifikation × Linie × Monat für Kosten je Gutteil"""
+    return CostAttribution(load_sql_data(version=version).clean)
+
+
+@cache_data(max_entries=MAX_ENTRIES)
+def load_star_schema(version: int = 0) -> StarSchema:
+    """SQL-Seite: Dimensionstabellen und Faktentabelle"""
+    return build_star_schema(load_sql_data(version=version).clean)
+
+
+@cache_data(max_entries=MAX_ENTRIES)
+def load_olap_cube(version: int = 0) -> OlapCube:
+    """SQL-Seite: OLAP-Würfel mit Teilaggregaten für Drill-down, Slice/Dice und Pivot"""
+    return OlapCube.from_schema(load_star_schema(version=version))
+
+
+@cache_data(max_entries=MAX_ENTRIES)
+def load_sketch_cube(version: int = 0) -> SketchCube:
+    """SQL-Seite: Distinct-Count- und Quantil-Sketches je Linie × Schicht × Monat"""
+    return SketchCube(load_star_schema(version=version))
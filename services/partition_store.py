@@ -0,0 +1,113 @@
+"""
+Partitionierte Ablage des Produktionsdatensatzes (Hive-Layout).
+
+Die Daten liegen als eine CSV pro Jahr und Produktionslinie:
+
+    <root>/Jahr=2023/Produktionslinie=Linie%201/part-0.csv
+
+Ein Manifest (_manifest.csv) beschreibt alle Partitionen, sodass Filter
+auf Jahr und Linie nur die benötigten Dateien lesen (Partition Pruning).
+"""
+
+from pathlib import Path
+from typing import Iterable, Optional, Union
+from urllib.parse import quote, unquote
+
+import pandas as pd
+
+PARTITION_KEYS = ["Jahr", "Produktionslinie"]
+MANIFEST_NAME = "_manifest.csv"
+MANIFEST_COLS = PARTITION_KEYS + ["path", "rows", "bytes", "min_datum", "max_datum"]
+
+
+def _partition_dir(root: Path, jahr: int, linie: str) -> Path:
+    return root / f"Jahr={int(jahr)}" / f"Produktionslinie={quote(str(linie))}"
+
+
+def is_partitioned(root: Union[str, Path]) -> bool:
+    """Prüft, ob unter root ein partitionierter Datensatz liegt."""
+    root = Path(root)
+    return root.is_dir() and (
+        (root / MANIFEST_NAME).exists() or any(root.glob("Jahr=*"))
+    )
+
+
+def write_partitions(df: pd.DataFrame, root: Union[str, Path]) -> pd.DataFrame:
+    """
+    Schreibt den Datensatz partitioniert nach Jahr und Produktionslinie.
+
+    Returns:
+        pd.DataFrame: Manifest mit einer Zeile pro Partition
+    """
+    root = Path(root)
+    datum = pd.to_datetime(df["Datum"])
+
+    entries = []
+    for (jahr, linie), part in df.groupby([datum.dt.year, df["Produktionslinie"]], observed=True):
+        part_dir = _partition_dir(root, jahr, linie)
+        part_dir.mkdir(parents=True, exist_ok=True)
+        path = part_dir / "part-0.csv"
+        part.to_csv(path, index=False)
+
+        part_datum = datum.loc[part.index]
+        entries.append({
+            "Jahr": int(jahr),
+            "Produktionslinie": linie,
+            "path": path.relative_to(root).as_posix(),
+            "rows": len(part),
+            "bytes": path.stat().st_size,
+            "min_datum": part_datum.min().date().isoformat(),
+            "max_datum": part_datum.max().date().isoformat()
+        })
+
+    manifest = pd.DataFrame(entries, columns=MANIFEST_COLS)
+    manifest.to_csv(root / MANIFEST_NAME, index=False)
+    return manifest
+
+
+def read_manifest(root: Union[str, Path]) -> pd.DataFrame:
+    """
+    Liest das Manifest; fehlt es, werden die Partitionen aus den
+    Verzeichnisnamen abgeleitet (ohne Zeilen- und Datumsangaben).
+    """
+    root = Path(root)
+    manifest_path = root / MANIFEST_NAME
+
+    if manifest_path.exists():
+        manifest = pd.read_csv(manifest_path, parse_dates=["min_datum", "max_datum"])
+    else:
+        entries = []
+        for path in sorted(root.glob("Jahr=*/Produktionslinie=*/*.csv")):
+            entries.append({
+                "Jahr": int(path.parent.parent.name.split("=", 1)[1]),
+                "Produktionslinie": unquote(path.parent.name.split("=", 1)[1]),
+                "path": path.relative_to(root).as_posix(),
+                "bytes": path.stat().st_size
+            })
+        manifest = pd.DataFrame(entries, columns=MANIFEST_COLS)
+
+    manifest["path"] = [str(root / p) for p in manifest["path"]]
+    return manifest
+
+
+def prune_partitions(
+    manifest: pd.DataFrame,
+    jahre: Optional[Iterable[int]] = None,
+    linien: Optional[Iterable[str]] = None
+) -> pd.DataFrame:
+    """Wählt nur die Partitionen aus, die zu den Filtern passen."""
+    mask = pd.Series(True, index=manifest.index)
+    if jahre is not None:
+        mask &= manifest["Jahr"].isin([int(j) for j in jahre])
+    if linien is not None:
+        mask &= manifest["Produktionslinie"].isin(list(linien))
+    return manifest[mask]
+
+
+if __name__ == "__main__":
+    # Erzeugt data/partitioned aus dem mitgelieferten CSV:
+    #   python -m services.partition_store
+    from services.data_loader import DEFAULT_DATA_PATH, PARTITION_ROOT
+
+    result = write_partitions(pd.read_csv(DEFAULT_DATA_PATH), PARTITION_ROOT)
+    print(f"{len(result)} Partitionen nach {PARTITION_ROOT} geschrieben")
@@ -0,0 +1,177 @@
+"""
+Periodenvergleich für die KPI-Karten (Vorjahr, Vormonat, Vorschicht).
+
+PeriodCube fasst die aufbereiteten KPI-Daten einmal je Periode, Linie und
+Schicht zusammen – inklusive der Summen über alle Linien bzw. Schichten
+("All"). Ein Vergleich ist danach ein Dictionary-Zugriff je Periode statt
+eines erneuten Scans, und er berücksichtigt dieselben Filter wie die
+Karten.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services.kpis import row_sums
+from services.rolling_kpis import FIELDS, SHIFTS, SOURCES, KpiSums, shift_slots, slot_start
+
+MONATE = ["Jan", "Feb", "Mär", "Apr", "Mai", "Jun", "Jul", "Aug", "Sep", "Okt", "Nov", "Dez"]
+
+# Vergleichsarten: Kürzel -> Beschriftung
+MODES: Dict[str, str] = {
+    "YoY": "Vorjahr",
+    "MoM": "Vormonat",
+    "SoS": "Vorschicht",
+}
+
+Key = Tuple[int, str, str]
+
+
+@dataclass
+class PeriodComparison:
+    """Kennzahlen einer Periode und ihrer Vorperiode (previous=None ohne Vorperiode)."""
+    label: str
+    current: KpiSums
+    previous: Optional[KpiSums]
+
+    def delta(self, metric: str, relative: bool = False) -> Optional[float]:
+        """
+        Veränderung einer KpiSums-Kennzahl gegenüber der Vorperiode:
+        absolut (z. B. Prozentpunkte) oder relativ in Prozent.
+        """
+        if self.previous is None:
+            return None
+        current = getattr(self.current, metric)
+        previous = getattr(self.previous, metric)
+        if not relative:
+            return current - previous
+        return (current - previous) / previous * 100 if previous else None
+
+
+def _rollup(base: pd.DataFrame, period: str) -> pd.DataFrame:
+    """Summen je Periode für alle Kombinationen aus Linie/Schicht bzw. "All"."""
+    parts = []
+    for linie in (True, False):
+        for schicht in (True, False):
+            keys = [period] + (["Produktionslinie"] if linie else []) + (["Schicht"] if schicht else [])
+            part = base.groupby(keys, observed=True)[FIELDS].sum().reset_index()
+            if not linie:
+                part["Produktionslinie"] = "All"
+            if not schicht:
+                part["Schicht"] = "All"
+            parts.append(part)
+    return pd.concat(parts, ignore_index=True)
+
+
+def _to_dict(frame: pd.DataFrame, period: str) -> Dict[Key, np.ndarray]:
+    keys = zip(frame[period].astype(int), frame["Produktionslinie"], frame["Schicht"])
+    return dict(zip(keys, frame[FIELDS].to_numpy()))
+
+
+class PeriodCube:
+    """Vorberechnete Summen je Jahr, Monat und Schicht-Slot für Vergleiche in O(1)."""
+
+    def __init__(self, df: pd.DataFrame):
+        slots = shift_slots(df)
+        df = df[slots.notna()]
+        base = pd.concat([
+            pd.DataFrame({
+                "Slot": slots[slots.notna()].astype("int64"),
+                "Jahr": df["Datum"].dt.year,
+                # Fortlaufende Monatsnummer, damit der Vormonat auch über den Jahreswechsel reicht
+                "Monat": df["Datum"].dt.year * 12 + df["Datum"].dt.month - 1,
+                "Produktionslinie": df["Produktionslinie"].astype(object),
+                "Schicht": df["Schicht"].astype(object),
+            }),
+            row_sums(df, list(SOURCES.values())).set_axis(FIELDS, axis=1),
+        ], axis=1)
+
+        self._years = _to_dict(_rollup(base, "Jahr"), "Jahr")
+        self._months = _to_dict(_rollup(base, "Monat"), "Monat")
+        self._last_months = self._last_periods(base, "Monat")
+        self._last_slots = self._last_periods(base, "Slot")
+
+    @staticmethod
+    def _last_periods(
+        base: pd.DataFrame, period: str
+    ) -> Dict[Key, Tuple[int, np.ndarray, Optional[int], Optional[np.ndarray]]]:
+        """
+        Je (Jahr, Linie, Schicht): letzte Periode des Jahres mit Daten und
+        die davor liegende Periode mit Daten (auch aus dem Vorjahr).
+        """
+        rolled = _rollup(base, period)
+        rolled["Jahr"] = (rolled[period] // 12 if period == "Monat" else
+                          pd.to_datetime(rolled[period] // 3, unit="D").dt.year)
+        rolled = rolled.sort_values(["Produktionslinie", "Schicht", period], ignore_index=True)
+
+        values = rolled[FIELDS].to_numpy()
+        group = rolled.groupby(["Produktionslinie", "Schicht"], sort=False)
+        position = group.cumcount().to_numpy()
+        last = rolled.groupby(["Jahr", "Produktionslinie", "Schicht"]).tail(1).index
+
+        result = {}
+        for i in last:
+            row = rolled.loc[i]
+            key = (int(row["Jahr"]), row["Produktionslinie"], row["Schicht"])
+            has_previous = position[i] > 0
+            result[key] = (
+                int(row[period]), values[i],
+                int(rolled.loc[i - 1, period]) if has_previous else None,
+                values[i - 1] if has_previous else None
+            )
+        return result
+
+    def year_over_year(self, jahr: int, linie: str = "All", schicht: str = "All") -> PeriodComparison:
+        current = self._years.get((jahr, linie, schicht))
+        previous = self._years.get((jahr - 1, linie, schicht))
+        return PeriodComparison(
+            label=f"vs {jahr - 1}",
+            current=KpiSums.from_vector(current) if current is not None else KpiSums(),
+            previous=KpiSums.from_vector(previous) if previous is not None else None
+        )
+
+    def month_over_month(self, jahr: int, linie: str = "All", schicht: str = "All") -> PeriodComparison:
+        entry = self._last_months.get((jahr, linie, schicht))
+        if entry is None:
+            return PeriodComparison("–", KpiSums(), None)
+        monat, current, _, _ = entry
+        # Vormonat im Kalender (nicht der letzte Monat mit Daten)
+        previous = self._months.get((monat - 1, linie, schicht))
+        return PeriodComparison(
+            label=f"{_month_label(monat)} vs {_month_label(monat - 1)}",
+            current=KpiSums.from_vector(current),
+            previous=KpiSums.from_vector(previous) if previous is not None else None
+        )
+
+    def shift_over_shift(self, jahr: int, linie: str = "All", schicht: str = "All") -> PeriodComparison:
+        entry = self._last_slots.get((jahr, linie, schicht))
+        if entry is None:
+            return PeriodComparison("–", KpiSums(), None)
+        slot, current, previous_slot, previous = entry
+        label = _slot_label(slot)
+        if previous_slot is not None:
+            label += f" vs {_slot_label(previous_slot)}"
+        return PeriodComparison(
+            label=label,
+            current=KpiSums.from_vector(current),
+            previous=KpiSums.from_vector(previous) if previous is not None else None
+        )
+
+    def compare(self, mode: str, jahr: int, linie: str = "All", schicht: str = "All") -> PeriodComparison:
+        """Vergleich nach Kürzel aus MODES."""
+        methods = {
+            "YoY": self.year_over_year,
+            "MoM": self.month_over_month,
+            "SoS": self.shift_over_shift,
+        }
+        return methods[mode](jahr, linie, schicht)
+
+
+def _month_label(monat: int) -> str:
+    return f"{MONATE[monat % 12]} {monat // 12}"
+
+
+def _slot_label(slot: int) -> str:
+    return f"{SHIFTS[slot % 3]} {slot_start(slot):%d.%m.}"
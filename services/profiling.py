@@ -0,0 +1,195 @@
+"""
+Opt-in Profiling einzelner Seitenläufe (cProfile).
+
+Aktiviert wird das Profiling pro Rerun über den Query-Parameter
+?profile=1 – nur zusammen mit Admin-Zugang (services.admin, z. B.
+.../Production_KPIs_Pandas?profile=1&admin=<Token>) – oder für alle
+Läufe mit PORTFOLIO_PROFILE=1. begin_page() startet den Profiler im
+Script-Thread, render_timing_panel() beendet ihn und legt das Profil als
+.prof-Datei ab (PORTFOLIO_PROFILE_DIR, Standard: profiles/). Es bleiben
+die neuesten PORTFOLIO_MAX_PROFILES Dateien (Standard 50).
+
+Die Profile lassen sich im versteckten Admin-Bereich von app.py
+als Top-N-Tabelle und Icicle-Diagramm ansehen oder mit gängigen Tools
+(snakeviz, pstats) öffnen.
+"""
+
+import cProfile
+import logging
+import os
+import pstats
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+BASE_PATH = Path(__file__).resolve().parent.parent
+PROFILE_DIR = Path(os.environ.get("PORTFOLIO_PROFILE_DIR", BASE_PATH / "profiles"))
+# Höchstzahl abgelegter Profile; ältere werden beim Speichern gelöscht
+MAX_PROFILES = int(os.environ.get("PORTFOLIO_MAX_PROFILES", 50))
+
+_state = threading.local()
+
+
+def profiling_requested() -> bool:
+    """True bei PORTFOLIO_PROFILE=1 oder Query-Parameter ?profile=1 mit Admin-Zugang."""
+    if os.environ.get("PORTFOLIO_PROFILE", "0") == "1":
+        return True
+    try:
+        import streamlit as st
+
+        # Lokaler Import: services.admin importiert dieses Modul
+        from services.admin import admin_requested
+        return st.query_params.get("profile") == "1" and admin_requested()
+    except Exception:
+        # Außerhalb einer Streamlit-Session gibt es keine Query-Parameter
+        return False
+
+
+def start_profile(page: str) -> bool:
+    """Startet den Profiler für den aktuellen Seitenlauf (Script-Thread)."""
+    # Ein abgebrochener Lauf (z. B. st.stop()) hinterlässt ggf. einen aktiven Profiler
+    stop_profile(save=False)
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Es läuft bereits ein anderer Profiler (z. B. in einer parallelen Session)
+        logger.warning("Profiling für %s übersprungen: anderer Profiler aktiv", page)
+        return False
+
+    _state.current = (page, profiler)
+    return True
+
+
+def stop_profile(save: bool = True) -> Optional[Path]:
+    """Beendet den Profiler und speichert das Profil; liefert den Dateipfad."""
+    current = getattr(_state, "current", None)
+    _state.current = None
+    if current is None:
+        return None
+
+    page, profiler = current
+    profiler.disable()
+    if not save:
+        return None
+
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    path = PROFILE_DIR / f"{page}_{datetime.now():%Y%m%d-%H%M%S-%f}.prof"
+    profiler.dump_stats(str(path))
+    logger.info("Profil gespeichert: %s", path)
+    _trim_profiles()
+    return path
+
+
+def _trim_profiles() -> None:
+    """Älteste Profile löschen, bis höchstens MAX_PROFILES übrig sind."""
+    files = sorted(PROFILE_DIR.glob("*.prof"), key=lambda p: p.stat().st_mtime)
+    for path in files[:max(0, len(files) - MAX_PROFILES)]:
+        path.unlink(missing_ok=True)
+
+
+def list_profiles() -> pd.DataFrame:
+    """
+    Vorhandene Profile, neueste zuerst.
+
+    Returns:
+        pd.DataFrame: Datei, Seite, Zeitpunkt, Groesse_KB
+    """
+    rows = []
+    for path in PROFILE_DIR.glob("*.prof"):
+        page, _, stamp = path.stem.partition("_")
+        rows.append({
+            "Datei": path.name,
+            "Seite": page,
+            "Zeitpunkt": pd.to_datetime(stamp, format="%Y%m%d-%H%M%S-%f", errors="coerce"),
+            "Groesse_KB": round(path.stat().st_size / 1024, 1)
+        })
+    columns = ["Datei", "Seite", "Zeitpunkt", "Groesse_KB"]
+    return pd.DataFrame(rows, columns=columns).sort_values("Zeitpunkt", ascending=False)
+
+
+def _label(func) -> str:
+    filename, line, name = func
+    if filename == "~":
+        return name
+    return f"{name} ({Path(filename).name}:{line})"
+
+
+def top_functions(path: Path, n: int = 30, sort: str = "cumulative") -> pd.DataFrame:
+    """
+    Top-N Funktionen eines Profils.
+
+    Args:
+        path: .prof-Datei
+        n: Anzahl Zeilen
+        sort: "cumulative" (inkl. Unteraufrufe) oder "tottime" (Eigenzeit)
+
+    Returns:
+        pd.DataFrame: Funktion, Aufrufe, Eigenzeit_s, Gesamtzeit_s, Anteil_%
+    """
+    stats = pstats.Stats(str(path)).stats
+    total = max(sum(tt for _, _, tt, _, _ in stats.values()), 1e-9)
+
+    df = pd.DataFrame([
+        {
+            "Funktion": _label(func),
+            "Aufrufe": nc,
+            "Eigenzeit_s": tt,
+            "Gesamtzeit_s": ct,
+            "Anteil_%": ct / total * 100
+        }
+        for func, (cc, nc, tt, ct, callers) in stats.items()
+    ])
+    column = "Gesamtzeit_s" if sort == "cumulative" else "Eigenzeit_s"
+    return df.nlargest(n, column).round(4).reset_index(drop=True)
+
+
+def flame_tree(path: Path, min_share: float = 0.005) -> pd.DataFrame:
+    """
+    Aufrufbaum für ein Icicle-/Flame-Graph-Diagramm (plotly).
+
+    cProfile speichert nur Aufrufer-Kanten, keine vollständigen Stacks. Jede
+    Funktion wird daher ihrem zeitintensivsten Aufrufer zugeordnet; Knoten
+    unter min_share der Gesamtzeit entfallen.
+
+    Returns:
+        pd.DataFrame: id, parent, label, value (Sekunden, je Elternknoten begrenzt)
+    """
+    stats = pstats.Stats(str(path)).stats
+    total = max(sum(tt for _, _, tt, _, _ in stats.values()), 1e-9)
+    keep = {func for func, (_, _, _, ct, _) in stats.items() if ct >= total * min_share}
+
+    children = {}
+    for func in keep:
+        callers = {c: edge for c, edge in stats[func][4].items() if c in keep and c != func}
+        if callers:
+            parent = max(callers, key=lambda c: callers[c][3])
+            edge_time = callers[parent][3]
+        else:
+            parent, edge_time = None, stats[func][3]
+        children.setdefault(parent, []).append((func, edge_time))
+
+    root = "Seitenlauf"
+    rows = [{"id": root, "parent": "", "label": root, "value": total}]
+    stack = [(None, root, total)]
+    seen = set()
+    while stack:
+        func, node_id, budget = stack.pop()
+        remaining = budget
+        for child, edge_time in sorted(children.get(func, []), key=lambda c: -c[1]):
+            if child in seen:
+                continue
+            seen.add(child)
+            value = min(edge_time, remaining)
+            remaining -= value
+            child_id = f"{node_id}/{_label(child)}"
+            rows.append({"id": child_id, "parent": node_id, "label": _label(child), "value": value})
+            stack.append((child, child_id, value))
+
+    return pd.DataFrame(rows)
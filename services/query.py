@@ -0,0 +1,213 @@
+"""
+Deklarative Abfragen auf dem Star Schema (services.star_schema).
+
+Eine QuerySpec beschreibt Dimension, Gruppierung, Kennzahlen, abgeleitete
+Quoten, Sortierung und Limit – das Gegenstück zu
+
+    SELECT <Gruppierung>, SUM(...) ... FROM fact_produktion JOIN <Dimension>
+    GROUP BY ... ORDER BY ... LIMIT ...
+
+Der Planer gruppiert direkt auf dem Integer-Fremdschlüssel der
+Faktentabelle (np.bincount über die IDs) und verknüpft die Labels der
+Dimension erst mit dem kleinen Ergebnis. Gruppiert die Abfrage gröber als
+die Dimension (z. B. dim_datum nach Jahr und Monat), bildet der Planer die
+IDs vorab auf Gruppennummern ab – ebenfalls nur mit so vielen Zeilen, wie
+die Dimension hat.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services.ranking import top_k
+from services.star_schema import StarSchema
+
+AGGREGATIONS = ("sum", "count", "min", "max")
+
+# SQL-Name der Dimension -> (Attribut in StarSchema, Alias)
+DIMENSIONS: Dict[str, Tuple[str, str]] = {
+    "dim_datum": ("dim_datum", "d"),
+    "dim_unternehmen": ("dim_unternehmen", "u"),
+    "dim_produkt": ("dim_produkt", "p"),
+    "dim_produktionslinie": ("dim_linie", "l"),
+    "dim_schicht": ("dim_schicht", "s"),
+    "dim_software": ("dim_software", "sw"),
+    "dim_status": ("dim_status", "st"),
+}
+
+
+@dataclass(frozen=True)
+class Measure:
+    """Aggregat einer Spalte der Faktentabelle."""
+    column: str
+    alias: str
+    agg: str = "sum"
+
+    def __post_init__(self):
+        if self.agg not in AGGREGATIONS:
+            raise ValueError(f"Unbekannte Aggregation: {self.agg} (erlaubt: {', '.join(AGGREGATIONS)})")
+
+
+@dataclass(frozen=True)
+class Ratio:
+    """Abgeleitete Quote aus zwei Kennzahlen: numerator * scale / denominator, gerundet."""
+    alias: str
+    numerator: str
+    denominator: str
+    scale: float = 100.0
+    digits: int = 2
+
+
+@dataclass(frozen=True)
+class QuerySpec:
+    """
+    Deklarative Abfrage auf fact_produktion mit einer Dimension.
+
+    order_by: (Spalte, aufsteigend) – Spalten aus group_by, Kennzahlen oder Quoten
+    having: (Kennzahl, Mindestwert) – z. B. Mindeststückzahl für Quoten-Ranglisten
+    """
+    dimension: str
+    group_by: Tuple[str, ...]
+    measures: Tuple[Measure, ...]
+    ratios: Tuple[Ratio, ...] = ()
+    order_by: Tuple[Tuple[str, bool], ...] = ()
+    limit: Optional[int] = None
+    having: Tuple[Tuple[str, float], ...] = ()
+
+    def __post_init__(self):
+        if self.dimension not in DIMENSIONS:
+            raise ValueError(f"Unbekannte Dimension: {self.dimension}")
+        columns = set(self.group_by) | {m.alias for m in self.measures} | {r.alias for r in self.ratios}
+        for column, _ in self.order_by:
+            if column not in columns:
+                raise ValueError(f"ORDER BY auf unbekannte Spalte: {column}")
+        for column, _ in self.having:
+            if column not in {m.alias for m in self.measures}:
+                raise ValueError(f"HAVING auf unbekannte Kennzahl: {column}")
+
+    def to_sql(self) -> str:
+        """SQL-Äquivalent (Anzeige auf der SQL-Seite und Schlüssel für services.query_cache)."""
+        _, alias = DIMENSIONS[self.dimension]
+        measures = {m.alias: m for m in self.measures}
+        select = [f"{alias}.{col}" for col in self.group_by]
+        select += [f"{m.agg.upper()}(f.{m.column}) as {m.alias}" for m in self.measures]
+        for r in self.ratios:
+            numerator, denominator = measures[r.numerator], measures[r.denominator]
+            select.append(
+                f"ROUND({numerator.agg.upper()}(f.{numerator.column}) * {r.scale:g}.0 / "
+                f"{denominator.agg.upper()}(f.{denominator.column}), {r.digits}) as {r.alias}"
+            )
+
+        key = _id_column(self.dimension)
+        lines = [
+            "SELECT ",
+            ",\n".join(f"    {s}" for s in select),
+            "FROM fact_produktion f",
+            f"JOIN {self.dimension} {alias} ON f.{key} = {alias}.{key}",
+            "GROUP BY " + ", ".join(f"{alias}.{col}" for col in self.group_by),
+        ]
+        if self.having:
+            lines.append("HAVING " + " AND ".join(
+                f"{measures[col].agg.upper()}(f.{measures[col].column}) >= {minimum:g}"
+                for col, minimum in self.having
+            ))
+        if self.order_by:
+            lines.append("ORDER BY " + ", ".join(
+                f"{col}{'' if ascending else ' DESC'}" for col, ascending in self.order_by
+            ))
+        if self.limit is not None:
+            lines.append(f"LIMIT {self.limit}")
+        return "\n".join(lines) + ";"
+
+
+def _id_column(dimension: str) -> str:
+    # dim_produktionslinie -> linie_id usw. (Namensschema aus build_star_schema)
+    attribute, _ = DIMENSIONS[dimension]
+    return attribute[len("dim_"):] + "_id"
+
+
+def _aggregate_by_group(codes: np.ndarray, values: pd.Series, agg: str, size: int) -> np.ndarray:
+    """Aggregat je Gruppennummer (Index = Nummer) in einem Durchlauf über die Faktentabelle."""
+    if agg == "count":
+        # COUNT(spalte) zählt nicht-leere Werte – auch in Textspalten (z. B. Auftragsnummer)
+        return np.bincount(codes[values.notna().to_numpy()], minlength=size)
+    data = values.to_numpy(dtype="float64", na_value=np.nan)
+    valid = ~np.isnan(data)
+    if valid.all():
+        valid = slice(None)
+    if agg == "sum":
+        return np.bincount(codes[valid], weights=data[valid], minlength=size)
+
+    fill = np.inf if agg == "min" else -np.inf
+    result = np.full(size, fill)
+    (np.minimum if agg == "min" else np.maximum).at(result, codes[valid], data[valid])
+    result[np.isinf(result)] = np.nan
+    return result
+
+
+def execute(spec: QuerySpec, schema: StarSchema) -> pd.DataFrame:
+    """
+    Führt eine QuerySpec aus.
+
+    Returns:
+        pd.DataFrame: Spalten group_by, Kennzahlen und Quoten (in dieser Reihenfolge)
+    """
+    attribute, _ = DIMENSIONS[spec.dimension]
+    dim: pd.DataFrame = getattr(schema, attribute)
+    fact = schema.fact_produktion
+    key = _id_column(spec.dimension)
+    group_by = list(spec.group_by)
+
+    # 1) Gruppennummer je ID der Dimension – nur so viele Zeilen, wie die Dimension hat.
+    #    Ist die Gruppierung gröber als die ID (dim_datum nach Jahr/Monat), teilen sich IDs eine Gruppe.
+    ids = dim[key].to_numpy(dtype="int64")
+    groups = dim.groupby(group_by, sort=True, observed=True).ngroup().to_numpy()
+    n_groups = int(groups.max(initial=-1)) + 1
+
+    # 2) GROUP BY auf dem Integer-Fremdschlüssel; Zeilen ohne Treffer (-1) fallen wie beim JOIN weg
+    keys = fact[key]
+    codes = (keys.to_numpy(dtype="float64", na_value=-1) if keys.hasnans else keys.to_numpy()).astype("int64")
+    # Letzter Eintrag bleibt -1 und fängt fehlende Schlüssel (Index -1) ab
+    lookup = np.full(max(int(ids.max(initial=0)), int(codes.max(initial=0))) + 2, -1)
+    lookup[ids] = groups
+    codes = lookup[codes]
+    rows = codes >= 0
+    if rows.all():
+        rows = slice(None)
+    codes = codes[rows]
+    present = np.bincount(codes, minlength=n_groups) > 0
+
+    # 3) Labels nur an das kleine Ergebnis hängen (erste Dimensionszeile je Gruppe)
+    labelled = np.flatnonzero(groups >= 0)
+    first = labelled[np.unique(groups[labelled], return_index=True)[1]]
+    result = {col: dim[col].to_numpy()[first][present] for col in group_by}
+    for m in spec.measures:
+        result[m.alias] = _aggregate_by_group(codes, fact[m.column][rows], m.agg, n_groups)[present]
+    result = pd.DataFrame(result)
+
+    # Ganzzahlige Summen/Counts wieder als Ganzzahl ausgeben (wie pandas.groupby().sum())
+    for m in spec.measures:
+        if m.agg == "count" or (m.agg == "sum" and pd.api.types.is_integer_dtype(fact[m.column])):
+            result[m.alias] = result[m.alias].round().astype("int64")
+
+    for r in spec.ratios:
+        result[r.alias] = (
+            result[r.numerator] * r.scale / result[r.denominator].replace(0, pd.NA)
+        ).round(r.digits)
+
+    for column, minimum in spec.having:
+        result = result[result[column] >= minimum]
+
+    if len(spec.order_by) == 1 and pd.api.types.is_numeric_dtype(result[spec.order_by[0][0]]):
+        # ORDER BY <Kennzahl> LIMIT k als Teilauswahl statt vollständiger Sortierung
+        column, ascending = spec.order_by[0]
+        result = top_k(result, column, k=spec.limit, ascending=ascending)
+    else:
+        if spec.order_by:
+            columns, ascending = zip(*spec.order_by)
+            result = result.sort_values(list(columns), ascending=list(ascending))
+        if spec.limit is not None:
+            result = result.head(spec.limit)
+    return result.reset_index(drop=True)
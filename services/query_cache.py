@@ -0,0 +1,159 @@
+"""
+Ergebnis-Cache für die Abfragen der SQL-Seite.
+
+Schlüssel ist die normalisierte Abfrage plus der Fingerabdruck des
+Datenstands (services.refresh): Solange sich weder Abfrage noch Daten
+ändern, kostet ein erneuter Seitenaufruf nur einen Cache-Zugriff. Der
+Cache ist prozessweit, nach Einträgen und Bytes begrenzt (LRU) und kann
+mit PORTFOLIO_QUERY_CACHE_DIR zusätzlich auf Platte abgelegt werden, um
+Neustarts zu überdauern.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+import pandas as pd
+
+from services.metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+MAX_ENTRIES = 64
+MAX_BYTES = 256 * 1024**2
+
+# Version von Abfrage-Ausführung und Ergebnisformat – erhöhen, wenn sich
+# Ergebnisse bei gleicher Abfrage und gleichen Daten ändern (z. B. nach
+# einem Bugfix in services.query), damit alte Einträge auf Platte nicht
+# mehr getroffen werden
+CACHE_FORMAT = 2
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalform einer Abfrage: Kommentare entfernt, Leerraum zusammengefasst,
+    Kleinschreibung außerhalb von String-Literalen, ohne abschließendes ";".
+    """
+    query = re.sub(r"--[^\n]*", " ", query)
+    parts = re.split(r"('(?:[^']|'')*')", query)
+    parts = [p if p.startswith("'") else p.lower() for p in parts]
+    return re.sub(r"\s+", " ", "".join(parts)).strip().rstrip(";").strip()
+
+
+def query_key(query: str, dataset: str) -> str:
+    """Cache-Schlüssel aus Cache-Format, Datenstand und normalisierter Abfrage."""
+    text = f"{CACHE_FORMAT}\n{dataset}\n{normalize_query(query)}"
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class QueryCache:
+    """
+    LRU-Cache für Abfrageergebnisse (DataFrames), optional mit Ablage auf Platte.
+
+    Ergebnisse werden von allen Sessions geteilt – nicht in-place verändern.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = MAX_ENTRIES,
+        max_bytes: int = MAX_BYTES,
+        directory: Optional[Path] = None
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.directory = Path(directory) if directory is not None else None
+        self._entries: "OrderedDict[str, Tuple[pd.DataFrame, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.pkl"
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry[0]
+
+        if self.directory is None or not self._path(key).exists():
+            return None
+        try:
+            result = pd.read_pickle(self._path(key))
+            # Zugriffszeit für die LRU-Bereinigung der Ablage
+            os.utime(self._path(key))
+        except Exception:
+            logger.exception("Abfrage-Cache: Datei %s nicht lesbar", self._path(key))
+            return None
+        self._remember(key, result)
+        return result
+
+    def put(self, key: str, result: pd.DataFrame) -> None:
+        self._remember(key, result)
+        if self.directory is not None:
+            result.to_pickle(self._path(key))
+            self._trim_directory()
+
+    def _remember(self, key: str, result: pd.DataFrame) -> None:
+        size = int(result.memory_usage(index=True, deep=True).sum())
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (result, size)
+            self._bytes += size
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+    def _trim_directory(self) -> None:
+        """Älteste Dateien löschen, bis höchstens max_entries übrig sind."""
+        files = sorted(self.directory.glob("*.pkl"), key=lambda p: p.stat().st_mtime)
+        for path in files[:max(0, len(files) - self.max_entries)]:
+            path.unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.directory is not None:
+            for path in self.directory.glob("*.pkl"):
+                path.unlink(missing_ok=True)
+
+    def cached(
+        self, name: str, query: str, dataset: str, compute: Callable[[], pd.DataFrame]
+    ) -> pd.DataFrame:
+        """
+        Liefert das Ergebnis aus dem Cache oder berechnet es mit compute().
+
+        Args:
+            name: Name für die Metriken (portfolio_cache_requests_total)
+            query: Abfrage (wird normalisiert)
+            dataset: Fingerabdruck des Datenstands
+        """
+        key = query_key(query, dataset)
+        result = self.get(key)
+        CACHE_REQUESTS.inc(function=f"query.{name}", result="miss" if result is None else "hit")
+        if result is None:
+            result = compute()
+            self.put(key, result)
+        return result
+
+
+_directory = os.environ.get("PORTFOLIO_QUERY_CACHE_DIR")
+QUERY_CACHE = QueryCache(directory=Path(_directory) if _directory else None)
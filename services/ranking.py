@@ -0,0 +1,59 @@
+"""
+Top-K-Ranglisten mit Teilauswahl statt vollständiger Sortierung.
+
+top_k bestimmt die Grenze der k besten Zeilen mit np.partition (O(n)) und
+sortiert nur die ausgewählten Zeilen – bei zehntausenden Produktvarianten
+und k = 15 ein Bruchteil von sort_values().head(). Ein Mindestvolumen
+(z. B. Stückzahl) verhindert, dass Kleinstchargen mit zufällig hoher Quote
+die Rangliste anführen. Fehlende Werte landen wie bei sort_values am Ende.
+"""
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+def top_k(
+    df: pd.DataFrame,
+    column: str,
+    k: Optional[int] = None,
+    ascending: bool = False,
+    min_volume: Optional[float] = None,
+    volume_column: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Die k Zeilen mit den höchsten (ascending=False) bzw. niedrigsten Werten.
+
+    Args:
+        df: Tabelle mit der Ranking-Spalte
+        column: Ranking-Spalte (numerisch)
+        k: Anzahl Zeilen (None = alle, sortiert)
+        ascending: True = kleinste Werte zuerst
+        min_volume: nur Zeilen mit volume_column >= min_volume
+        volume_column: Spalte für min_volume (z. B. "stueckzahl")
+
+    Returns:
+        pd.DataFrame: höchstens k Zeilen in Ranglisten-Reihenfolge, Index wie in df
+    """
+    if min_volume is not None:
+        if volume_column is None:
+            raise ValueError("min_volume benötigt volume_column")
+        df = df[df[volume_column].to_numpy(dtype="float64", na_value=np.nan) >= min_volume]
+
+    values = df[column].to_numpy(dtype="float64", na_value=np.nan)
+    # Schlüssel aufsteigend: bei absteigender Rangliste negieren, fehlende Werte ans Ende
+    keys = np.where(np.isnan(values), np.inf, values if ascending else -values)
+
+    if k is not None and k < len(df):
+        if k <= 0:
+            return df.iloc[:0]
+        threshold = np.partition(keys, k - 1)[k - 1]
+        better = np.flatnonzero(keys < threshold)
+        # Gleichstand an der Grenze: frühere Zeilen zuerst (wie eine stabile Sortierung)
+        ties = np.flatnonzero(keys == threshold)[:k - len(better)]
+        candidates = np.concatenate([better, ties])
+        order = candidates[np.argsort(keys[candidates], kind="stable")]
+    else:
+        order = np.argsort(keys, kind="stable")
+    return df.iloc[order]
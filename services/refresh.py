@@ -0,0 +1,207 @@
+"""
+Nicht blockierende Aktualisierung des Datenstands (Double Buffering).
+
+Jeder Datenstand ist ein versionierter Snapshot der Dateisignaturen.
+Die Pages lesen zu Beginn eines Laufs current_snapshot() und übergeben
+dessen Version an die Funktionen aus services.page_data – die Version ist
+Teil des Cache-Schlüssels, und alle Dateizugriffe innerhalb von
+snapshot_scope() lesen genau diese Dateiversionen.
+
+Ändert sich eine Datenquelle, lädt der Refresher-Thread die neue Version
+vollständig in den Spalten-Cache, berechnet die Standardansichten der
+Pages vor (services.warmup) und tauscht erst danach die Referenz aus.
+Laufende Sessions sehen also entweder den alten oder den neuen Stand,
+nie eine Mischung, und warten nie auf das Neuladen. Der vorherige Stand
+bleibt bis zum nächsten Tausch im Speicher (zwei Puffer).
+
+Auch der erste Stand (Version 1) wird vollständig geladen, bevor er gilt:
+Jede Spaltenauswahl eines Stands ist damit ein Cache-Hit. Müsste doch
+einmal gelesen werden und hat sich die Datei inzwischen geändert, bricht
+der Loader ab (SourceChangedError), statt neue Daten unter der Signatur
+des alten Stands abzulegen.
+
+Intervall: PORTFOLIO_REFRESH_INTERVAL (Sekunden, Standard 30, 0 = aus).
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+
+from services.data_loader import (
+    SourceChangedError, pin_signatures, preload_sources, retain_signatures, source_signatures
+)
+from services.timing import span
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL_S = 30
+
+THREAD_NAME = "data-refresh"
+
+# Versuche für den ersten Stand, falls sich eine Datei während des Ladens ändert
+INITIAL_ATTEMPTS = 3
+
+
+@dataclass(frozen=True)
+class DatasetSnapshot:
+    """Ein konsistenter Datenstand: Version und Signaturen aller Quelldateien."""
+    version: int
+    signatures: Dict[str, Tuple[int, int]]
+    created: datetime = field(default_factory=datetime.now)
+
+    @property
+    def fingerprint(self) -> str:
+        """
+        Prozessübergreifend stabiler Hash der Dateisignaturen (die Version
+        zählt nur innerhalb eines Prozesses) – z. B. für Caches auf Platte.
+        """
+        text = "\n".join(
+            f"{path}|{mtime}|{size}" for path, (mtime, size) in sorted(self.signatures.items())
+        )
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+_current: Optional[DatasetSnapshot] = None
+_previous: Optional[DatasetSnapshot] = None
+# Snapshots, deren Daten im Cache liegen (aktuell, vorherig, ggf. im Aufbau)
+_snapshots: Dict[int, DatasetSnapshot] = {}
+
+_lock = threading.Lock()
+# Serialisiert den Aufbau neuer Stände (Thread und manueller Anstoß)
+_build_lock = threading.Lock()
+
+_thread: Optional[threading.Thread] = None
+_wakeup = threading.Event()
+
+
+def current_snapshot() -> DatasetSnapshot:
+    """Der aktuell gültige Datenstand (wird beim ersten Aufruf angelegt und vollständig geladen)."""
+    global _current
+    snapshot = _current
+    if snapshot is not None:
+        return snapshot
+    with _build_lock:
+        if _current is None:
+            snapshot = _build_initial()
+            with _lock:
+                _current = snapshot
+        return _current
+
+
+def _build_initial() -> DatasetSnapshot:
+    """Erster Datenstand: Signaturen festhalten und alle Spalten genau dieser Dateiversionen laden."""
+    for attempt in range(1, INITIAL_ATTEMPTS + 1):
+        snapshot = DatasetSnapshot(version=1, signatures=source_signatures())
+        with _lock:
+            _snapshots[snapshot.version] = snapshot
+            _retain()
+        try:
+            with span("refresh.build"), pin_signatures(snapshot.signatures):
+                preload_sources()
+            return snapshot
+        except SourceChangedError:
+            # Datei während des Ladens ersetzt: mit den neuen Signaturen erneut
+            if attempt == INITIAL_ATTEMPTS:
+                raise
+            logger.info("Datenquelle während des Ladens geändert, neuer Versuch (%d)", attempt)
+
+
+def previous_snapshot() -> Optional[DatasetSnapshot]:
+    return _previous
+
+
+def _retain() -> None:
+    retain_signatures(
+        (path, sig) for snapshot in _snapshots.values() for path, sig in snapshot.signatures.items()
+    )
+
+
+@contextmanager
+def snapshot_scope(version: int) -> Iterator[None]:
+    """Dateizugriffe im Block lesen die Dateiversionen des Datenstands version."""
+    snapshot = _snapshots.get(version)
+    with pin_signatures(snapshot.signatures) if snapshot is not None else nullcontext():
+        yield
+
+
+def refresh(force: bool = False) -> Optional[DatasetSnapshot]:
+    """
+    Baut einen neuen Datenstand auf, falls sich eine Quelldatei geändert hat
+    (oder force=True), und tauscht ihn danach atomar aus.
+
+    Returns:
+        DatasetSnapshot: der neue Stand, oder None ohne Änderung
+    """
+    from services.warmup import warm_up
+
+    global _current, _previous
+    current_snapshot()
+    with _build_lock:
+        base = _current
+        signatures = source_signatures()
+        if signatures == base.signatures and not force:
+            return None
+
+        snapshot = DatasetSnapshot(version=base.version + 1, signatures=signatures)
+        with _lock:
+            _snapshots[snapshot.version] = snapshot
+            _retain()
+
+        with span("refresh.build"), pin_signatures(snapshot.signatures):
+            # Zweiter Puffer: alle Spalten der neuen Version laden, dann die Standardansichten
+            preload_sources()
+            warm_up(version=snapshot.version)
+
+        with _lock:
+            _previous, _current = _current, snapshot
+            for version in list(_snapshots):
+                if version not in (_previous.version, _current.version):
+                    del _snapshots[version]
+            _retain()
+
+    logger.info("Datenstand %d aktiv (vorher %d)", snapshot.version, base.version)
+    return snapshot
+
+
+def request_refresh() -> None:
+    """Stößt eine sofortige Prüfung im Refresher-Thread an (kehrt sofort zurück)."""
+    _wakeup.set()
+
+
+def refresh_interval() -> float:
+    return float(os.environ.get("PORTFOLIO_REFRESH_INTERVAL", DEFAULT_INTERVAL_S))
+
+
+def start_refresher(interval: Optional[float] = None) -> Optional[threading.Thread]:
+    """
+    Startet den Refresher einmalig pro Prozess als Daemon-Thread
+    (weitere Aufrufe liefern den bestehenden Thread).
+    """
+    from services.warmup import quiet_script_run_context
+
+    global _thread
+    interval = refresh_interval() if interval is None else interval
+    if interval <= 0:
+        return None
+    with _lock:
+        if _thread is None:
+            def run() -> None:
+                current_snapshot()
+                while True:
+                    forced = _wakeup.wait(interval)
+                    _wakeup.clear()
+                    try:
+                        refresh(force=forced)
+                    except Exception:
+                        # Der bisherige Stand bleibt gültig; nächster Versuch im nächsten Intervall
+                        logger.exception("Aktualisierung des Datenstands fehlgeschlagen")
+
+            quiet_script_run_context(THREAD_NAME)
+            _thread = threading.Thread(target=run, name=THREAD_NAME, daemon=True)
+            _thread.start()
+    return _thread
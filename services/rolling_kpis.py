@@ -0,0 +1,209 @@
+"""
+Rollierende KPI-Fenster mit O(1)-Aktualisierung.
+
+Die Zeit ist in Schichten eingeteilt (Datum + Früh/Spät/Nacht). Je Linie
+und Schicht liegt ein Ringpuffer mit den Summen der letzten Schicht-Slots
+sowie je Fenster (letzte Schicht, 24h, 7 Tage, 30 Tage) eine laufende
+Summe. Ein neuer Datensatz wird in seinen Slot und die betroffenen
+Fenstersummen addiert; rückt die Zeit vor, werden die herausfallenden
+Slots abgezogen. Abfragen lesen nur die Fenstersummen – unabhängig davon,
+wie viele Jahre Historie eingeflossen sind.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services.kpis import KPIS, row_sums
+
+SHIFTS = ["Früh", "Spät", "Nacht"]
+SHIFT_INDEX = {s: i for i, s in enumerate(SHIFTS)}
+
+# Fenstergröße in Schicht-Slots (3 Schichten pro Tag)
+WINDOWS: Dict[str, int] = {
+    "Letzte Schicht": 1,
+    "24h": 3,
+    "7 Tage": 21,
+    "30 Tage": 90,
+}
+
+# KpiSums-Feld -> additive Summe aus services.kpis.SUMS
+SOURCES: Dict[str, str] = {
+    "rows": "Datensaetze",
+    "output": "Stueckzahl",
+    "scrap": "Ausschuss",
+    "energy": "Energieverbrauch_kWh",
+    "run_hours": "Betriebsstunden",
+    "planned_hours": "Planzeit_h",
+}
+FIELDS = list(SOURCES)
+
+
+@dataclass
+class KpiSums:
+    """Laufende Summen; Quoten ergeben sich als Quotient der Summen (services.kpis.KPIS)."""
+    rows: int = 0
+    output: float = 0.0
+    scrap: float = 0.0
+    energy: float = 0.0
+    run_hours: float = 0.0
+    planned_hours: float = 0.0
+
+    def add(self, other: "KpiSums") -> None:
+        self.rows += other.rows
+        self.output += other.output
+        self.scrap += other.scrap
+        self.energy += other.energy
+        self.run_hours += other.run_hours
+        self.planned_hours += other.planned_hours
+
+    def _ratio(self, name: str) -> float:
+        kpi = KPIS[name]
+        sums = {SOURCES[f]: getattr(self, f) for f in FIELDS}
+        value = kpi.of(sums[kpi.numerator], sums[kpi.denominator])
+        return 0.0 if np.isnan(value) else value
+
+    @property
+    def avg_scrap_rate(self) -> float:
+        return self._ratio("Ausschussquote_%")
+
+    @property
+    def avg_availability(self) -> float:
+        return self._ratio("Verfuegbarkeit_%")
+
+    @property
+    def good_parts(self) -> float:
+        return self.output - self.scrap
+
+    @property
+    def energy_per_unit(self) -> float:
+        return self._ratio("kWh_pro_Stück")
+
+    @classmethod
+    def from_vector(cls, values: np.ndarray) -> "KpiSums":
+        return cls(int(round(values[0])), *(float(v) for v in values[1:]))
+
+
+def shift_slots(df: pd.DataFrame) -> pd.Series:
+    """Schicht-Slot je Zeile (Tage seit 1970 * 3 + Schicht); NaN bei unbekannter Schicht."""
+    tage = pd.Series(df["Datum"].to_numpy("datetime64[D]").astype("int64"), index=df.index)
+    return tage * 3 + df["Schicht"].astype(object).map(SHIFT_INDEX)
+
+
+def slot_start(slot: int) -> pd.Timestamp:
+    """Beginn eines Schicht-Slots (Früh 06:00, Spät 14:00, Nacht 22:00)."""
+    return pd.Timestamp(slot // 3, unit="D") + pd.Timedelta(hours=6 + 8 * (slot % 3))
+
+
+class RollingKpis:
+    """
+    Laufende Fenstersummen je (Linie, Schicht).
+
+    Datensätze, die älter als das größte Fenster sind, werden nur gezählt
+    (dropped), nicht gespeichert.
+    """
+
+    def __init__(self, windows: Optional[Dict[str, int]] = None):
+        self.windows = dict(windows or WINDOWS)
+        self.size = max(self.windows.values())
+        self.head: Optional[int] = None
+        self.dropped = 0
+        self._buckets: Dict[Tuple[str, str], np.ndarray] = {}
+        self._sums: Dict[Tuple[str, str], np.ndarray] = {}
+
+    @property
+    def as_of(self) -> Optional[pd.Timestamp]:
+        """Beginn des jüngsten Slots, auf den sich die Fenster beziehen."""
+        return slot_start(self.head) if self.head is not None else None
+
+    def _key_state(self, key: Tuple[str, str]) -> Tuple[np.ndarray, np.ndarray]:
+        if key not in self._buckets:
+            self._buckets[key] = np.zeros((self.size, len(FIELDS)))
+            self._sums[key] = np.zeros((len(self.windows), len(FIELDS)))
+        return self._buckets[key], self._sums[key]
+
+    def _advance(self, slot: int) -> None:
+        """Rückt den jüngsten Slot vor und zieht herausfallende Slots ab."""
+        if self.head is None or slot - self.head >= self.size:
+            # Erster Datensatz oder Lücke größer als alle Fenster: alles verfällt
+            for key in self._buckets:
+                self._buckets[key][:] = 0
+                self._sums[key][:] = 0
+            self.head = slot
+            return
+
+        sizes = list(self.windows.values())
+        for new in range(self.head + 1, slot + 1):
+            for buckets, sums in zip(self._buckets.values(), self._sums.values()):
+                for i, size in enumerate(sizes):
+                    sums[i] -= buckets[(new - size) % self.size]
+                buckets[new % self.size] = 0
+        self.head = slot
+
+    def add(self, slot: int, linie: str, schicht: str, values: np.ndarray) -> None:
+        """Addiert Summen (Reihenfolge wie FIELDS) für einen Slot – O(1)."""
+        if self.head is None or slot > self.head:
+            self._advance(slot)
+        age = self.head - slot
+        if age >= self.size:
+            self.dropped += int(values[0])
+            return
+
+        buckets, sums = self._key_state((linie, schicht))
+        buckets[slot % self.size] += values
+        for i, size in enumerate(self.windows.values()):
+            if age < size:
+                sums[i] += values
+
+    def update(self, df: pd.DataFrame) -> None:
+        """
+        Übernimmt aufbereitete Datensätze (prepare_kpi_data). Historie wird
+        vorab auf das größte Fenster gekürzt und je Slot, Linie und Schicht
+        zusammengefasst.
+        """
+        slots = shift_slots(df)
+        df = df[slots.notna()]
+        if df.empty:
+            return
+        slots = slots[slots.notna()].to_numpy(dtype="int64")
+        newest = int(slots.max()) if self.head is None else max(self.head, int(slots.max()))
+        recent = slots > newest - self.size
+        self.dropped += int((~recent).sum())
+
+        df = df[recent]
+        values = row_sums(df, list(SOURCES.values())).set_axis(FIELDS, axis=1)
+        values["slot"] = slots[recent]
+        values["Produktionslinie"] = df["Produktionslinie"].to_numpy()
+        values["Schicht"] = df["Schicht"].to_numpy()
+        grouped = values.groupby(["slot", "Produktionslinie", "Schicht"], sort=True)[FIELDS].sum()
+        for (slot, linie, schicht), row in zip(grouped.index, grouped.to_numpy()):
+            self.add(int(slot), linie, schicht, row)
+
+    def window(self, name: str, linie: str = "All", schicht: str = "All") -> KpiSums:
+        """Summen eines Fensters für eine Filterauswahl ("All" = alle) – O(1) je Schlüssel."""
+        i = list(self.windows).index(name)
+        total = np.zeros(len(FIELDS))
+        for (key_linie, key_schicht), sums in self._sums.items():
+            if linie in ("All", key_linie) and schicht in ("All", key_schicht):
+                total += sums[i]
+        if round(total[0]) == 0:
+            # Leeres Fenster: Rundungsreste des Abziehens nicht anzeigen
+            return KpiSums()
+        return KpiSums.from_vector(total)
+
+    def as_frame(self, linie: str = "All", schicht: str = "All") -> pd.DataFrame:
+        """Alle Fenster als Tabelle für das Dashboard."""
+        rows = []
+        for name in self.windows:
+            sums = self.window(name, linie, schicht)
+            rows.append({
+                "Fenster": name,
+                "Datensätze": sums.rows,
+                "Stückzahl": sums.output,
+                "Ausschussquote_%": sums.avg_scrap_rate,
+                "Verfügbarkeit_%": sums.avg_availability,
+                "kWh_pro_Stück": sums.energy_per_unit,
+            })
+        return pd.DataFrame(rows)
@@ -0,0 +1,311 @@
+"""
+Mergebare Sketches für Distinct Counts und Quantile.
+
+- HyperLogLog: geschätzte Anzahl verschiedener Werte (z. B. Auftragsnummern)
+  mit Standardfehler ≈ 1.04 / sqrt(2^p); zusammenführen = Maximum der Register
+- QuantileSketch: Quantile mit relativem Fehler (logarithmische Buckets,
+  DDSketch-Verfahren); zusammenführen = Bucket-Zähler addieren. Die
+  Fehlerschranke gilt gegenüber dem linear interpolierten Quantil
+  (np.quantile)
+
+SketchCube hält je Zelle Linie × Schicht × Monat einen Sketch je Spalte.
+Distinct Counts und Perzentile über beliebige Roll-ups (z. B. je Linie
+über alle Monate eines Jahres) ergeben sich durch Zusammenführen der
+betroffenen Zellen – ohne die Rohdaten erneut zu lesen.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services.olap import Level, build_levels, group_codes
+from services.star_schema import StarSchema
+
+DISTINCT_COLUMNS = ("Auftragsnummer",)
+QUANTILE_COLUMNS = ("Stillstandszeit_Min",)
+SKETCH_GRAIN = ("Produktionslinie", "Schicht", "Monat")
+
+DEFAULT_PRECISION = 12
+DEFAULT_ACCURACY = 0.01
+
+
+# =========================
+# HyperLogLog
+# =========================
+def _hash(values) -> np.ndarray:
+    """64-Bit-Hash je Wert (stabil über Prozesse, unabhängig vom dtype-Layout)."""
+    return pd.util.hash_array(np.asarray(values, dtype=object).astype(str))
+
+
+def _register_updates(hashes: np.ndarray, precision: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Register-Index (untere Bits) und Rang (führende Nullen + 1 der oberen Bits)."""
+    index = (hashes & np.uint64((1 << precision) - 1)).astype("int64")
+    # Höchstens 53 Bit, damit frexp die Bitlänge exakt liefert
+    shift = max(precision, 11)
+    rest = (hashes >> np.uint64(shift)).astype("float64")
+    bit_length = np.frexp(rest)[1]
+    rank = (64 - shift) - bit_length + 1
+    return index, rank.astype("uint8")
+
+
+def hll_estimate(registers: np.ndarray) -> np.ndarray:
+    """
+    Schätzung je Zeile eines Register-Arrays (n × 2^p) bzw. für ein einzelnes Register-Array.
+    """
+    registers = np.atleast_2d(registers)
+    m = registers.shape[1]
+    alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+    raw = alpha * m * m / np.sum(np.exp2(-registers.astype("float64")), axis=1)
+    zeros = np.count_nonzero(registers == 0, axis=1)
+    # Kleine Kardinalitäten: Linear Counting über leere Register
+    with np.errstate(divide="ignore"):
+        linear = m * np.log(m / np.maximum(zeros, 1))
+    estimate = np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
+    estimate[registers.max(axis=1) == 0] = 0.0
+    return estimate
+
+
+@dataclass
+class HyperLogLog:
+    """Distinct-Count-Sketch mit 2^precision Registern."""
+    precision: int = DEFAULT_PRECISION
+    registers: np.ndarray = field(default=None, repr=False)
+
+    def __post_init__(self):
+        if not 4 <= self.precision <= 16:
+            raise ValueError("precision muss zwischen 4 und 16 liegen")
+        if self.registers is None:
+            self.registers = np.zeros(1 << self.precision, dtype="uint8")
+
+    def add(self, values: Iterable) -> None:
+        index, rank = _register_updates(_hash(list(values)), self.precision)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        if other.precision != self.precision:
+            raise ValueError("Nur Sketches gleicher Präzision lassen sich zusammenführen")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> float:
+        return float(hll_estimate(self.registers)[0])
+
+
+# =========================
+# Quantile (logarithmische Buckets)
+# =========================
+@dataclass
+class QuantileSketch:
+    """
+    Quantil-Sketch für nicht-negative Werte mit relativem Fehler relative_accuracy.
+
+    Werte unter min_value zählen in einen eigenen Null-Bucket.
+    """
+    relative_accuracy: float = DEFAULT_ACCURACY
+    min_value: float = 1e-9
+    zero_count: int = 0
+    offset: int = 0
+    counts: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype="int64"), repr=False)
+
+    @property
+    def gamma(self) -> float:
+        return (1 + self.relative_accuracy) / (1 - self.relative_accuracy)
+
+    @property
+    def count(self) -> int:
+        return int(self.zero_count + self.counts.sum())
+
+    def bucket(self, values: np.ndarray) -> np.ndarray:
+        return np.ceil(np.log(values) / np.log(self.gamma)).astype("int64")
+
+    def _resize(self, low: int, high: int) -> None:
+        """Zähler-Array so erweitern, dass es die Buckets low..high abdeckt."""
+        if self.counts.size:
+            low, high = min(low, self.offset), max(high, self.offset + self.counts.size - 1)
+        counts = np.zeros(high - low + 1, dtype="int64")
+        if self.counts.size:
+            start = self.offset - low
+            counts[start:start + self.counts.size] = self.counts
+        self.offset, self.counts = low, counts
+
+    def add(self, values: Iterable[float]) -> None:
+        values = np.asarray(list(values) if not isinstance(values, np.ndarray) else values, dtype="float64")
+        values = values[~np.isnan(values)]
+        small = values < self.min_value
+        self.zero_count += int(small.sum())
+        buckets = self.bucket(values[~small])
+        if buckets.size:
+            self._resize(int(buckets.min()), int(buckets.max()))
+            self.counts += np.bincount(buckets - self.offset, minlength=self.counts.size)
+
+    def merge(self, other: "QuantileSketch") -> None:
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Nur Sketches gleicher Genauigkeit lassen sich zusammenführen")
+        self.zero_count += other.zero_count
+        if other.counts.size:
+            self._resize(other.offset, other.offset + other.counts.size - 1)
+            start = other.offset - self.offset
+            self.counts[start:start + other.counts.size] += other.counts
+
+    def quantile(self, q: float) -> Optional[float]:
+        return quantiles_from_counts(
+            self.zero_count, self.counts, self.offset, self.gamma, [q]
+        )[0]
+
+
+def quantiles_from_counts(
+    zero_count: int, counts: np.ndarray, offset: int, gamma: float, qs: Sequence[float]
+) -> list:
+    """Quantile aus Null-Bucket und Bucket-Zählern (None ohne Werte)."""
+    total = zero_count + int(counts.sum())
+    if total == 0:
+        return [None for _ in qs]
+    cumulative = zero_count + np.cumsum(counts)
+
+    def value(rank: int) -> float:
+        """Schätzwert des rank-ten Werts (0-basiert): Mitte des Buckets, relativer Fehler ≤ relative_accuracy."""
+        if rank < zero_count:
+            return 0.0
+        i = int(np.searchsorted(cumulative, rank, side="right"))
+        return float(2 * gamma ** (offset + i) / (gamma + 1))
+
+    result = []
+    for q in qs:
+        # Lineare Interpolation zwischen den benachbarten Rängen wie np.quantile; als
+        # Mischung zweier Schätzwerte bleibt der relative Fehler ≤ relative_accuracy
+        rank = q * (total - 1)
+        lower = int(np.floor(rank))
+        upper = min(lower + 1, total - 1)
+        low, high = value(lower), value(upper)
+        result.append(low + (high - low) * (rank - lower))
+    return result
+
+
+# =========================
+# Sketches je Würfelzelle
+# =========================
+def _coarsen(levels: Dict[str, Level], source: str, target: str, codes: np.ndarray) -> np.ndarray:
+    """Codes einer feineren Ebene auf eine gröbere derselben Dimension abbilden (Monat -> Jahr)."""
+    fine, coarse = levels[source], levels[target]
+    if fine.source != coarse.source:
+        raise ValueError(f"{target} lässt sich nicht aus {source} ableiten")
+    ids = np.flatnonzero(fine.lookup >= 0)
+    representative = np.empty(len(fine.labels), dtype="int64")
+    representative[fine.lookup[ids]] = ids
+    return coarse.lookup[representative[codes]]
+
+
+class SketchCube:
+    """
+    HyperLogLog- und Quantil-Sketches je Zelle einer Körnung (Standard: Linie × Schicht × Monat).
+
+    Register und Bucket-Zähler aller Zellen liegen in je einem 2D-Array, ein
+    Roll-up ist ein Maximum bzw. eine Summe über die ausgewählten Zeilen.
+    """
+
+    def __init__(
+        self,
+        schema: StarSchema,
+        grain: Sequence[str] = SKETCH_GRAIN,
+        distinct_columns: Sequence[str] = DISTINCT_COLUMNS,
+        quantile_columns: Sequence[str] = QUANTILE_COLUMNS,
+        precision: int = DEFAULT_PRECISION,
+        relative_accuracy: float = DEFAULT_ACCURACY
+    ):
+        self.levels = build_levels(schema)
+        self.grain = tuple(grain)
+        self.precision = precision
+        self.relative_accuracy = relative_accuracy
+        fact = schema.fact_produktion
+
+        codes = []
+        for name in self.grain:
+            level = self.levels[name]
+            ids = fact[level.source].to_numpy(dtype="float64", na_value=-1).astype("int64")
+            ids[ids >= len(level.lookup)] = -1
+            codes.append(np.where(ids >= 0, level.lookup[np.maximum(ids, 0)], -1))
+        valid = np.logical_and.reduce([c >= 0 for c in codes])
+        inverse, cell_codes = group_codes([c[valid] for c in codes], [len(self.levels[n].labels) for n in self.grain])
+        self.codes: Dict[str, np.ndarray] = dict(zip(self.grain, cell_codes))
+        n_cells = len(cell_codes[0]) if cell_codes else 0
+
+        self.registers: Dict[str, np.ndarray] = {}
+        for column in distinct_columns:
+            registers = np.zeros((n_cells, 1 << precision), dtype="uint8")
+            values = fact[column].to_numpy()[valid]
+            present = pd.notna(values)
+            index, rank = _register_updates(_hash(values[present]), precision)
+            np.maximum.at(registers, (inverse[present], index), rank)
+            self.registers[column] = registers
+
+        # Gemeinsamer Bucket-Bereich je Spalte, damit Zeilen direkt addierbar sind
+        self.quantiles: Dict[str, Tuple[np.ndarray, np.ndarray, int]] = {}
+        template = QuantileSketch(relative_accuracy)
+        for column in quantile_columns:
+            values = fact[column].to_numpy(dtype="float64", na_value=np.nan)[valid]
+            present = ~np.isnan(values)
+            small = present & (values < template.min_value)
+            large = present & ~small
+            zero = np.bincount(inverse[small], minlength=n_cells)
+            buckets = template.bucket(values[large])
+            offset = int(buckets.min()) if buckets.size else 0
+            width = int(buckets.max()) - offset + 1 if buckets.size else 1
+            counts = np.bincount(
+                inverse[large] * width + (buckets - offset), minlength=n_cells * width
+            ).reshape(n_cells, width)
+            self.quantiles[column] = (zero, counts, offset)
+
+    @property
+    def gamma(self) -> float:
+        return QuantileSketch(self.relative_accuracy).gamma
+
+    def _level_codes(self, name: str) -> np.ndarray:
+        if name in self.codes:
+            return self.codes[name]
+        for source in self.grain:
+            if self.levels[source].source == self.levels[name].source:
+                return _coarsen(self.levels, source, name, self.codes[source])
+        raise ValueError(f"Ebene {name} ist in der Körnung {' × '.join(self.grain)} nicht enthalten")
+
+    def _select(self, by: Sequence[str], filters: Optional[Dict[str, Sequence]]):
+        mask = np.ones(len(next(iter(self.codes.values()))), dtype=bool) if self.codes else np.zeros(0, bool)
+        for name, allowed in (filters or {}).items():
+            mask &= np.isin(self._level_codes(name), self.levels[name].codes_for(allowed))
+        keys = [self._level_codes(name)[mask] for name in by]
+        inverse, group = group_codes(keys, [len(self.levels[name].labels) for name in by])
+        if not by:
+            inverse = np.zeros(int(mask.sum()), dtype="int64")
+        n_groups = int(inverse.max(initial=-1)) + 1
+        labels = pd.DataFrame({name: self.levels[name].labels[codes] for name, codes in zip(by, group)})
+        return mask, inverse, n_groups, labels
+
+    def distinct_count(
+        self, column: str, by: Sequence[str] = (), filters: Optional[Dict[str, Sequence]] = None
+    ) -> pd.DataFrame:
+        """Geschätzte Anzahl verschiedener Werte je Gruppe (Spalte "<column>_distinct")."""
+        mask, inverse, n_groups, result = self._select(by, filters)
+        merged = np.zeros((n_groups, self.registers[column].shape[1]), dtype="uint8")
+        np.maximum.at(merged, inverse, self.registers[column][mask])
+        result[f"{column}_distinct"] = np.round(hll_estimate(merged)).astype("int64") if n_groups else []
+        return result
+
+    def quantile(
+        self,
+        column: str,
+        qs: Sequence[float] = (0.5, 0.95),
+        by: Sequence[str] = (),
+        filters: Optional[Dict[str, Sequence]] = None
+    ) -> pd.DataFrame:
+        """Quantile je Gruppe (Spalten "<column>_p50", "<column>_p95", ...)."""
+        mask, inverse, n_groups, result = self._select(by, filters)
+        zero, counts, offset = self.quantiles[column]
+        merged_zero = np.bincount(inverse, weights=zero[mask], minlength=n_groups).astype("int64")
+        merged = np.zeros((n_groups, counts.shape[1]), dtype="int64")
+        np.add.at(merged, inverse, counts[mask])
+        values = [
+            quantiles_from_counts(merged_zero[g], merged[g], offset, self.gamma, qs) for g in range(n_groups)
+        ]
+        for i, q in enumerate(qs):
+            result[f"{column}_p{round(q * 100):g}"] = [row[i] for row in values]
+        return result
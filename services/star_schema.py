@@ -0,0 +1,92 @@
+"""
+Star Schema der SQL-Seite.
+
+Teilt den validierten Datensatz in Dimensionstabellen (Stammdaten) und
+eine Faktentabelle (Messwerte + Foreign Keys) auf.
+"""
+
+from dataclasses import dataclass
+
+import pandas as pd
+
+FACT_COLUMNS = [
+    "datum_id", "unternehmen_id", "produkt_id", "linie_id", "schicht_id",
+    "software_id", "status_id", "Auftragsnummer",
+    "Stueckzahl", "Ausschuss", "Betriebsstunden", "Stillstandszeit_Min",
+    "Materialkosten", "Energieverbrauch_kWh", "Mitarbeiter_Produktion",
+    "MaxTemperatur", "Durchschnittstemperatur", "EndOfLine_Test"
+]
+
+
+@dataclass
+class StarSchema:
+    """Dimensionstabellen und Faktentabelle des Produktionsdatensatzes."""
+    dim_datum: pd.DataFrame
+    dim_unternehmen: pd.DataFrame
+    dim_produkt: pd.DataFrame
+    dim_linie: pd.DataFrame
+    dim_schicht: pd.DataFrame
+    dim_software: pd.DataFrame
+    dim_status: pd.DataFrame
+    fact_produktion: pd.DataFrame
+
+
+def _dimension(df: pd.DataFrame, columns, id_col: str) -> pd.DataFrame:
+    dim = df[columns].drop_duplicates().reset_index(drop=True)
+    dim[id_col] = dim.index + 1
+    return dim
+
+
+def build_star_schema(df: pd.DataFrame) -> StarSchema:
+    """
+    Baut Dimensionen und Faktentabelle (entspricht den JOINs eines Data Warehouse).
+
+    Args:
+        df: validierte Produktionsdaten (ValidationResult.clean)
+    """
+    # Dimension: Datum
+    dim_datum = (
+        df[["Datum"]]
+        .dropna()
+        .drop_duplicates()
+        .sort_values("Datum")
+        .reset_index(drop=True)
+    )
+    dim_datum["datum_id"] = dim_datum.index + 1
+    dim_datum["jahr"] = dim_datum["Datum"].dt.year
+    dim_datum["monat"] = dim_datum["Datum"].dt.month
+    dim_datum["tag"] = dim_datum["Datum"].dt.day
+
+    dim_unternehmen = _dimension(df, ["Unternehmen"], "unternehmen_id")
+    dim_produkt = _dimension(df, ["Produkt", "Modifikation"], "produkt_id")
+    dim_linie = _dimension(df, ["Produktionslinie"], "linie_id")
+    dim_schicht = _dimension(df, ["Schicht"], "schicht_id")
+    dim_software = _dimension(df, ["Softwareversion", "Firmwareversion"], "software_id")
+    dim_status = _dimension(df, ["Status", "Fehlercode"], "status_id")
+
+    # JOINs durchführen
+    fact = (
+        df
+        .merge(dim_datum[["Datum", "datum_id"]], on="Datum", how="left")
+        .merge(dim_unternehmen, on="Unternehmen", how="left")
+        .merge(dim_produkt, on=["Produkt", "Modifikation"], how="left")
+        .merge(dim_linie, on="Produktionslinie", how="left")
+        .merge(dim_schicht, on="Schicht", how="left")
+        .merge(dim_software, on=["Softwareversion", "Firmwareversion"], how="left")
+        .merge(dim_status, on=["Status", "Fehlercode"], how="left")
+    )
+
+    # Faktentabelle mit nur IDs und Messwerten + Primary Key
+    fact_produktion = fact[FACT_COLUMNS].copy()
+    fact_produktion.insert(0, "produktion_id", range(1, len(fact_produktion) + 1))
+
+    return StarSchema(
+        dim_datum=dim_datum,
+        dim_unternehmen=dim_unternehmen,
+        dim_produkt=dim_produkt,
+        dim_linie=dim_linie,
+        dim_schicht=dim_schicht,
+        dim_software=dim_software,
+        dim_status=dim_status,
+        fact_produktion=fact_produktion
+    )
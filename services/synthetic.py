@@ -0,0 +1,125 @@
+"""
+Synthetischer Datengenerator mit dem Schema des Produktionsdatensatzes.
+
+Erzeugt beliebig große Datensätze mit denselben 21 Spalten, Wertebereichen
+und Kardinalitäten wie data/produktionsdaten_premium_5Jahre.csv – für
+Benchmarks und Lasttests jenseits der 8.234 Beispielzeilen.
+"""
+
+from pathlib import Path
+from typing import Union
+
+import numpy as np
+import pandas as pd
+
+UNTERNEHMEN = ["TechSystems AG", "ControlWare KG", "Industrium GmbH", "NextFactory Solutions"]
+PRODUKTE = {
+    "Automation Unit": ["AU-700", "AU-710"],
+    "Control Panel": ["CP-400", "CP-430", "CP-470"],
+    "Edge Controller": ["EC-200", "EC-210", "EC-250"],
+    "Embedded Box PC": ["EPC-30", "EPC-35"],
+    "HMI-Terminal": ["HMI-10", "HMI-15"],
+    "IO-Gateway": ["IOGW-50", "IOGW-55"],
+    "Industrie-PC": ["IPC-100", "IPC-110", "IPC-150"],
+    "Industrie-Server": ["SRV-500", "SRV-520"],
+    "Monitoring Unit": ["MON-800", "MON-820"],
+    "Robust Panel PC": ["RPPC-1000", "RPPC-1100"]
+}
+LINIEN = ["Linie 1", "Linie 2", "Linie 3", "Linie 4"]
+SCHICHTEN = ["Früh", "Spät", "Nacht"]
+SOFTWARE = [f"v{major}.{minor}" for major in range(1, 5) for minor in range(10)]
+FIRMWARE = [f"f{major}.{minor}" for major in range(1, 4) for minor in range(10)]
+STATUS = ["abgeschlossen", "in Produktion", "pausiert", "Fehler"]
+FEHLERCODES = ["-", "I/O_ERROR", "POWER_FAIL", "TEMP_HIGH", "VIBRATION"]
+MITARBEITER = [75, 90, 110, 120]
+
+# Anteil nicht bestandener End-of-Line-Tests im Originaldatensatz
+EOL_FAIL_RATE = 0.073
+
+
+def generate_production_data(
+    rows: int,
+    seed: int = 0,
+    start: str = "2019-01-01",
+    years: int = 5
+) -> pd.DataFrame:
+    """
+    Erzeugt einen synthetischen Produktionsdatensatz.
+
+    Args:
+        rows: Anzahl der Zeilen
+        seed: Seed für reproduzierbare Daten
+        start: Erster Produktionstag
+        years: Zeitraum in Jahren
+
+    Returns:
+        pd.DataFrame: Datensatz im Schema der Original-CSV
+    """
+    rng = np.random.default_rng(seed)
+
+    days = pd.date_range(start, periods=int(365.25 * years), freq="D")
+    datum = np.sort(rng.choice(days.values, size=rows))
+
+    produkte = np.array(list(PRODUKTE))
+    produkt_idx = rng.integers(0, len(produkte), rows)
+    modifikation = np.empty(rows, dtype=object)
+    for i, name in enumerate(produkte):
+        sel = produkt_idx == i
+        modifikation[sel] = rng.choice(PRODUKTE[name], size=int(sel.sum()))
+
+    stueckzahl = rng.integers(20, 300, rows)
+    ausschuss = np.minimum(rng.integers(0, 30, rows), stueckzahl)
+    max_temp = rng.uniform(40, 90, rows).round(1)
+    avg_temp = (max_temp - rng.uniform(0, 10, rows)).round(1)
+
+    # Auftragsnummern wachsen mit dem Datenvolumen (A-10000 … )
+    order_space = max(90_000, rows * 10)
+
+    return pd.DataFrame({
+        "Datum": pd.to_datetime(datum).strftime("%Y-%m-%d"),
+        "Unternehmen": rng.choice(UNTERNEHMEN, rows),
+        "Produkt": produkte[produkt_idx],
+        "Modifikation": modifikation,
+        "Produktionslinie": rng.choice(LINIEN, rows),
+        "Schicht": rng.choice(SCHICHTEN, rows),
+        "Stueckzahl": stueckzahl,
+        "Ausschuss": ausschuss,
+        "Betriebsstunden": rng.uniform(1, 12, rows).round(1),
+        "Stillstandszeit_Min": rng.integers(0, 60, rows),
+        "MaxTemperatur": max_temp,
+        "Durchschnittstemperatur": np.maximum(avg_temp, 30.0),
+        "Softwareversion": rng.choice(SOFTWARE, rows),
+        "Firmwareversion": rng.choice(FIRMWARE, rows),
+        "EndOfLine_Test": np.where(rng.random(rows) < EOL_FAIL_RATE, "Nicht bestanden", "Bestanden"),
+        "Materialkosten": rng.uniform(1000, 10000, rows).round(2),
+        "Energieverbrauch_kWh": rng.uniform(5, 40, rows).round(2),
+        "Auftragsnummer": np.char.add("A-", (rng.integers(0, order_space, rows) + 10_000).astype(str)),
+        "Status": rng.choice(STATUS, rows),
+        "Fehlercode": rng.choice(FEHLERCODES, rows),
+        "Mitarbeiter_Produktion": rng.choice(MITARBEITER, rows)
+    })
+
+
+def write_synthetic_csv(
+    rows: int,
+    path: Union[str, Path],
+    seed: int = 0,
+    chunk_rows: int = 1_000_000
+) -> Path:
+    """
+    Schreibt einen synthetischen Datensatz blockweise als CSV,
+    damit auch 10 Mio. Zeilen ohne großen Speicherbedarf entstehen.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    written = 0
+    chunk = 0
+    while written < rows:
+        n = min(chunk_rows, rows - written)
+        part = generate_production_data(n, seed=seed + chunk)
+        part.to_csv(path, mode="w" if chunk == 0 else "a", header=chunk == 0, index=False)
+        written += n
+        chunk += 1
+
+    return path
@@ -0,0 +1,172 @@
+"""
+Leichtgewichtige Zeitmessung für die Hot Paths der Pages.
+
+Die Pages legen Spans um ihre Stufen (Datenaufbereitung, Queries,
+Schleifen, Groupbys, Chart-Aufbau):
+
+    with span("kpi.load_and_prepare_data"):
+        df = load_and_prepare_data(...)
+
+Die Messwerte werden prozessweit über alle Reruns gesammelt (Dauer und
+Netto-Anzahl allokierter Python-Speicherblöcke). Aktiviert wird die Messung
+mit PORTFOLIO_TIMING=1 oder durch einen Listener (z. B. services.metrics);
+ansonsten ist span() ein No-op ohne Messung.
+
+begin_page(name) am Anfang einer Page und render_timing_panel() am Ende
+messen zusätzlich den kompletten Seitenlauf als Stufe "<name>.page" und
+schalten auf Wunsch das Profiling ein (siehe services.profiling).
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager, nullcontext
+from typing import Callable, ContextManager, Deque, Dict, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from services.profiling import profiling_requested, start_profile, stop_profile
+
+logger = logging.getLogger(__name__)
+
+# Anzahl der zuletzt gespeicherten Messungen je Stufe
+MAX_SAMPLES = 1000
+
+_NOOP = nullcontext()
+
+
+class StageTimer:
+    """Sammelt Dauer und Allokationen je Stufe über mehrere Reruns."""
+
+    def __init__(self, enabled: bool = False, max_samples: int = MAX_SAMPLES):
+        self.enabled = enabled
+        self._samples: Dict[str, Deque[Tuple[float, int]]] = defaultdict(
+            lambda: deque(maxlen=max_samples)
+        )
+        self._listeners: List[Callable[[str, float, int], None]] = []
+        self._lock = threading.Lock()
+        self._pages = threading.local()
+
+    @property
+    def active(self) -> bool:
+        return self.enabled or bool(self._listeners)
+
+    def add_listener(self, listener: Callable[[str, float, int], None]) -> None:
+        """Registriert listener(name, sekunden, allokationen) für jede Messung."""
+        with self._lock:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+
+    def span(self, name: str) -> ContextManager[None]:
+        """Misst den umschlossenen Block; ohne Timer und Listener ein No-op."""
+        if not self.active:
+            return _NOOP
+        return self._measure(name)
+
+    def begin_page(self, name: str) -> None:
+        """Startet die Messung eines Seitenlaufs (pro Script-Thread)."""
+        self._pages.current = (name, time.perf_counter(), sys.getallocatedblocks())
+
+    def end_page(self) -> None:
+        """Beendet die mit begin_page gestartete Messung."""
+        current = getattr(self._pages, "current", None)
+        self._pages.current = None
+        if current is not None and self.active:
+            name, start, blocks = current
+            self.record(f"{name}.page", time.perf_counter() - start,
+                        sys.getallocatedblocks() - blocks)
+
+    @contextmanager
+    def _measure(self, name: str) -> Iterator[None]:
+        blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start, sys.getallocatedblocks() - blocks)
+
+    def record(self, name: str, seconds: float, allocations: int = 0) -> None:
+        with self._lock:
+            self._samples[name].append((seconds, allocations))
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener(name, seconds, allocations)
+        logger.debug("span %s: %.2f ms, %+d blocks", name, seconds * 1000, allocations)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Kennzahlen je Stufe.
+
+        Returns:
+            pd.DataFrame: Stufe, Anzahl, p50/p95/Summe in ms, p50 Allokationen
+        """
+        with self._lock:
+            samples = {name: list(values) for name, values in self._samples.items()}
+
+        rows = []
+        for name, values in samples.items():
+            durations = np.array([v[0] for v in values]) * 1000
+            allocations = np.array([v[1] for v in values])
+            rows.append({
+                "Stufe": name,
+                "Anzahl": len(values),
+                "p50_ms": round(float(np.percentile(durations, 50)), 2),
+                "p95_ms": round(float(np.percentile(durations, 95)), 2),
+                "Summe_ms": round(float(durations.sum()), 1),
+                "p50_Allokationen": int(np.percentile(allocations, 50))
+            })
+
+        columns = ["Stufe", "Anzahl", "p50_ms", "p95_ms", "Summe_ms", "p50_Allokationen"]
+        return pd.DataFrame(rows, columns=columns).sort_values("p95_ms", ascending=False)
+
+    def log_summary(self) -> None:
+        """Schreibt p50/p95 je Stufe als eine Log-Zeile."""
+        parts = [
+            f"{row.Stufe}={row.p50_ms:.1f}/{row.p95_ms:.1f}ms"
+            for row in self.summary().itertuples()
+        ]
+        logger.info("timing p50/p95: %s", " ".join(parts))
+
+
+timer = StageTimer(enabled=os.environ.get("PORTFOLIO_TIMING", "0") == "1")
+
+
+def span(name: str) -> ContextManager[None]:
+    """Kurzform für timer.span(name)."""
+    return timer.span(name)
+
+
+def begin_page(name: str) -> None:
+    """Startet Seitenmessung und – falls angefordert – das Profiling."""
+    timer.begin_page(name)
+    if profiling_requested():
+        start_profile(name)
+
+
+def render_timing_panel() -> None:
+    """
+    Beendet die Messung des Seitenlaufs und zeigt p50/p95 je Stufe in
+    einem Expander (nur bei aktivem Timer).
+    """
+    timer.end_page()
+    profile = stop_profile()
+    if profile is not None:
+        import streamlit as st
+        st.caption(f"🔬 Profil gespeichert: {profile.name}")
+
+    if not timer.enabled:
+        return
+
+    import streamlit as st
+
+    with st.expander("⏱️ Timing (p50/p95 je Stufe, alle Reruns)"):
+        st.dataframe(timer.summary(), use_container_width=True, hide_index=True)
+    timer.log_summary()
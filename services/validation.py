@@ -0,0 +1,155 @@
+"""
+Validierung und Quarantäne für Produktionsdaten.
+
+Alle Regeln werden vektorisiert in einem Durchlauf geprüft. Jede Zeile
+erhält eine Bitmaske ihrer Verstöße; Zeilen mit Quarantäne-Verstößen
+werden in eine Seitentabelle verschoben, statt auf den Pages verstreut
+mit dropna/errors="coerce" behandelt zu werden.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+NUMERIC_COLS = [
+    "Stueckzahl", "Ausschuss", "Betriebsstunden", "Stillstandszeit_Min",
+    "MaxTemperatur", "Durchschnittstemperatur", "Materialkosten",
+    "Energieverbrauch_kWh", "Mitarbeiter_Produktion"
+]
+TEXT_COLS = ["Produktionslinie", "Schicht"]
+NON_NEGATIVE_COLS = [
+    "Stueckzahl", "Ausschuss", "Betriebsstunden", "Stillstandszeit_Min",
+    "Materialkosten", "Energieverbrauch_kWh", "Mitarbeiter_Produktion"
+]
+
+# Plausible Temperaturgrenzen in °C
+TEMP_MIN = -20.0
+TEMP_MAX = 150.0
+
+# Bit je Regel
+TYPE_ERROR = 1 << 0
+NEGATIVE_VALUE = 1 << 1
+SCRAP_EXCEEDS_OUTPUT = 1 << 2
+TEMP_OUT_OF_RANGE = 1 << 3
+DUPLICATE_ORDER = 1 << 4
+ZERO_OUTPUT = 1 << 5
+
+RULES: Dict[int, str] = {
+    TYPE_ERROR: "Fehlender oder ungültiger Wert",
+    NEGATIVE_VALUE: "Negativer Messwert",
+    SCRAP_EXCEEDS_OUTPUT: "Ausschuss > Stückzahl",
+    TEMP_OUT_OF_RANGE: "Temperatur außerhalb des Bereichs",
+    DUPLICATE_ORDER: "Doppelte Auftragsnummer",
+    ZERO_OUTPUT: "Stückzahl = 0"
+}
+
+# Doppelte Auftragsnummern und Stückzahl 0 werden nur gemeldet: Im Datensatz
+# wiederholen sich Auftragsnummern über unabhängige Records, und Stückzahl 0
+# ist ein gültiger Stillstand. Ratio-KPIs müssen 0 im Nenner selbst abfangen.
+DEFAULT_QUARANTINE = TYPE_ERROR | NEGATIVE_VALUE | SCRAP_EXCEEDS_OUTPUT | TEMP_OUT_OF_RANGE
+
+MASK_COL = "Verstoss_Maske"
+
+
+@dataclass
+class ValidationResult:
+    """
+    Ergebnis der Validierung.
+
+    clean enthält die gültigen Zeilen (typkonvertiert), quarantine die
+    aussortierten Zeilen inkl. Bitmaske, counts die Anzahl je Regel.
+    """
+    clean: pd.DataFrame
+    quarantine: pd.DataFrame
+    counts: pd.DataFrame
+    masks: np.ndarray
+
+    @property
+    def quarantined_rows(self) -> int:
+        return len(self.quarantine)
+
+
+def describe_mask(mask: int) -> str:
+    """Übersetzt eine Bitmaske in lesbare Regelnamen."""
+    return ", ".join(name for bit, name in RULES.items() if mask & bit)
+
+
+def _flag(masks: np.ndarray, condition: pd.Series, bit: int) -> None:
+    masks[condition.to_numpy(dtype=bool, na_value=False)] |= bit
+
+
+def validate_production_data(
+    df: pd.DataFrame,
+    quarantine_rules: int = DEFAULT_QUARANTINE,
+    required: Optional[Iterable[str]] = None
+) -> ValidationResult:
+    """
+    Prüft Typen, Wertebereiche und Duplikate in einem vektorisierten Durchlauf.
+
+    Regeln für Spalten, die im DataFrame fehlen (z. B. bei Column
+    Projection), werden übersprungen.
+
+    Args:
+        df: Rohdaten
+        quarantine_rules: Bitmaske der Regeln, die zur Quarantäne führen
+        required: Spalten, die nicht leer sein dürfen (Standard: alle
+            vorhandenen Mess- und Schlüsselspalten)
+
+    Returns:
+        ValidationResult
+    """
+    df = df.copy()
+    masks = np.zeros(len(df), dtype=np.uint8)
+
+    # Typen
+    if "Datum" in df.columns:
+        df["Datum"] = pd.to_datetime(df["Datum"], errors="coerce")
+    for col in NUMERIC_COLS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+
+    if required is None:
+        required = [c for c in ["Datum"] + TEXT_COLS + NUMERIC_COLS if c in df.columns]
+    _flag(masks, df[list(required)].isna().any(axis=1), TYPE_ERROR)
+
+    # Wertebereiche
+    present = [c for c in NON_NEGATIVE_COLS if c in df.columns]
+    if present:
+        _flag(masks, (df[present] < 0).any(axis=1), NEGATIVE_VALUE)
+
+    if {"Stueckzahl", "Ausschuss"} <= set(df.columns):
+        _flag(masks, df["Ausschuss"] > df["Stueckzahl"], SCRAP_EXCEEDS_OUTPUT)
+
+    if "Stueckzahl" in df.columns:
+        _flag(masks, df["Stueckzahl"] == 0, ZERO_OUTPUT)
+
+    temp_cols = [c for c in ("MaxTemperatur", "Durchschnittstemperatur") if c in df.columns]
+    if temp_cols:
+        out_of_range = ((df[temp_cols] < TEMP_MIN) | (df[temp_cols] > TEMP_MAX)).any(axis=1)
+        if len(temp_cols) == 2:
+            out_of_range |= df["Durchschnittstemperatur"] > df["MaxTemperatur"]
+        _flag(masks, out_of_range, TEMP_OUT_OF_RANGE)
+
+    # Duplikate (erstes Vorkommen bleibt unmarkiert)
+    if "Auftragsnummer" in df.columns:
+        _flag(masks, df["Auftragsnummer"].duplicated(keep="first"), DUPLICATE_ORDER)
+
+    bad = (masks & quarantine_rules) != 0
+
+    quarantine = df[bad].copy()
+    quarantine[MASK_COL] = masks[bad]
+
+    counts = pd.DataFrame({
+        "Regel": list(RULES.values()),
+        "Anzahl": [int(np.count_nonzero(masks & bit)) for bit in RULES],
+        "Quarantäne": [bool(quarantine_rules & bit) for bit in RULES]
+    })
+
+    return ValidationResult(
+        clean=df[~bad].reset_index(drop=True),
+        quarantine=quarantine.reset_index(drop=True),
+        counts=counts,
+        masks=masks
+    )
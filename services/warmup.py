@@ -0,0 +1,175 @@
+"""
+Warm-up der gemeinsamen Caches beim Serverstart.
+
+Berechnet im Hintergrund-Thread vor, was die Seiten mit ihren
+Standardfiltern benötigen: aufbereitete Datensätze, Dimensionen und
+Faktentabelle der SQL-Seite sowie die Aggregate des KPI-Dashboards.
+Die Seiten rufen dieselben Funktionen aus services.page_data auf und
+erhalten danach Cache-Hits statt eines kalten Renderings.
+
+Start:
+    python -m services.warmup [streamlit-Optionen]   # Warm-up ab Serverstart
+    streamlit run app.py                              # Warm-up beim ersten Aufruf von app.py
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+import pandas as pd
+
+from services.data_loader import load_partition_index
+from services.page_data import (
+    load_cost_attribution, load_downtime_histograms, load_error_index, load_ideal_rates,
+    load_kpi_aggregates, load_kpi_data, load_oee, load_oee_totals, load_olap_cube, load_oop_data,
+    load_period_cube, load_rolling_kpis, load_sketch_cube, load_sql_data, load_star_schema
+)
+from services.refresh import current_snapshot, start_refresher
+from services.timing import span
+
+logger = logging.getLogger(__name__)
+
+# Wartezeit auf die Streamlit-Runtime (Sekunden), bevor ohne sie gestartet wird
+RUNTIME_TIMEOUT_S = 30
+
+THREAD_NAME = "cache-warmup"
+
+_thread: Optional[threading.Thread] = None
+_thread_lock = threading.Lock()
+
+
+class _ThreadFilter(logging.Filter):
+    """Unterdrückt Streamlits "missing ScriptRunContext"-Warnung aus einem Hintergrund-Thread."""
+
+    def __init__(self, thread_name: str):
+        super().__init__()
+        self.thread_name = thread_name
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.threadName != self.thread_name
+
+
+def quiet_script_run_context(thread_name: str) -> None:
+    """Gecachte Funktionen außerhalb eines Seitenlaufs ohne Warnungsflut aufrufen."""
+    logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").addFilter(
+        _ThreadFilter(thread_name)
+    )
+
+
+def warmup_steps(version: int) -> List[Tuple[str, Callable[[], object]]]:
+    """
+    Schritte in Reihenfolge; die Argumente entsprechen exakt den
+    Standardfiltern der Seiten, damit die Cache-Schlüssel übereinstimmen.
+    """
+    partitions = load_partition_index(version=version)
+    jahre = sorted(int(j) for j in partitions["Jahr"].unique())
+    linien = sorted(partitions["Produktionslinie"].unique())
+    latest = jahre[-1]
+
+    def oop_oee() -> object:
+        # Standardfilter der OOP-Seite: gesamter Zeitraum (Tagesgrenzen), erste Linie, alle Schichten
+        df = load_oop_data(jahre=list(range(jahre[0], latest + 1)), linien=[linien[0]],
+                           version=version)
+        return load_oee_totals(
+            linien[0],
+            pd.to_datetime(pd.to_datetime(partitions["min_datum"]).min().date()),
+            pd.to_datetime(pd.to_datetime(partitions["max_datum"]).max().date()),
+            tuple(sorted(df["Schicht"].unique())),
+            version=version
+        )
+
+    steps = [
+        # KPI-Dashboard: neuestes Jahr, alle Linien und Schichten
+        ("kpi.load_and_prepare_data",
+         lambda: load_kpi_data(jahre=[latest], linien=None, version=version)),
+        ("oee.ideal_rates", lambda: load_ideal_rates(version=version)),
+        ("kpi.aggregates", lambda: load_kpi_aggregates(latest, "All", "All", version=version)),
+        ("kpi.rolling_windows", lambda: load_rolling_kpis(version=version)),
+        ("kpi.period_cube", lambda: load_period_cube(version=version)),
+        # SQL-Seite: Validierung, Dimensionen, Faktentabelle
+        ("sql.load_and_validate_data", lambda: load_sql_data(version=version)),
+        ("sql.star_schema", lambda: load_star_schema(version=version)),
+        ("sql.olap_cube", lambda: load_olap_cube(version=version)),
+        ("sql.sketch_cube", lambda: load_sketch_cube(version=version)),
+        ("sql.cost_attribution", lambda: load_cost_attribution(version=version)),
+        ("sql.oee", lambda: load_oee(by=("Produktionslinie", "Schicht"), version=version)),
+        # KPI-Dashboard: Fehlercode-Index (baut auf den validierten Daten der SQL-Seite auf)
+        ("kpi.error_index", lambda: load_error_index(version=version)),
+        # OOP-Seite: gesamter Zeitraum, erste Linie; Linienvergleich auf allen Daten
+        ("oop.load_and_prepare_data",
+         lambda: load_oop_data(jahre=list(range(jahre[0], latest + 1)), linien=[linien[0]],
+                               version=version)),
+        ("oop.cross_line", lambda: load_oop_data(version=version)),
+        ("oop.downtime_histograms", lambda: load_downtime_histograms(version=version)),
+        ("oop.oee", oop_oee),
+        ("oop.oee_lines", lambda: load_oee(by=("Produktionslinie",), version=version)),
+    ]
+    return steps
+
+
+def warm_up(version: Optional[int] = None) -> float:
+    """
+    Führt alle Warm-up-Schritte für einen Datenstand aus (Standard: den
+    aktuellen, siehe services.refresh); liefert die Dauer in Sekunden.
+    """
+    if version is None:
+        version = current_snapshot().version
+    start = time.perf_counter()
+    for name, step in warmup_steps(version):
+        try:
+            with span(f"warmup.{name}"):
+                step()
+        except Exception:
+            # Ein fehlgeschlagener Schritt wird beim ersten Seitenaufruf normal berechnet
+            logger.exception("Warm-up-Schritt %s fehlgeschlagen", name)
+    duration = time.perf_counter() - start
+    logger.info("Warm-up abgeschlossen in %.2fs", duration)
+    return duration
+
+
+def _wait_for_runtime(timeout: float) -> None:
+    from streamlit.runtime import Runtime
+
+    deadline = time.monotonic() + timeout
+    while not Runtime.exists() and time.monotonic() < deadline:
+        time.sleep(0.1)
+
+
+def start_warmup(wait_for_runtime: bool = True) -> Optional[threading.Thread]:
+    """
+    Startet den Warm-up einmalig pro Prozess in einem Daemon-Thread
+    (weitere Aufrufe liefern den bestehenden Thread).
+    Mit PORTFOLIO_WARMUP=0 abschaltbar (z. B. für Cold-Render-Benchmarks).
+    """
+    global _thread
+    if os.environ.get("PORTFOLIO_WARMUP", "1") == "0":
+        return None
+    with _thread_lock:
+        if _thread is None:
+            def run() -> None:
+                if wait_for_runtime:
+                    # Caches sollen den Storage-Manager der laufenden Runtime nutzen
+                    _wait_for_runtime(RUNTIME_TIMEOUT_S)
+                warm_up()
+
+            quiet_script_run_context(THREAD_NAME)
+            _thread = threading.Thread(target=run, name=THREAD_NAME, daemon=True)
+            _thread.start()
+    return _thread
+
+
+def main() -> None:
+    """Startet Warm-up- und Refresher-Thread und danach den Streamlit-Server im selben Prozess."""
+    from streamlit.web import cli
+
+    start_warmup()
+    start_refresher()
+    sys.argv = ["streamlit", "run", "app.py", *sys.argv[1:]]
+    sys.exit(cli.main())
+
+
+if __name__ == "__main__":
+    main()
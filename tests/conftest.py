@@ -0,0 +1,8 @@
+"""Gemeinsame Einstellungen der Tests (Aufruf aus dem Repository-Root: python -m pytest)."""
+
+import sys
+from pathlib import Path
+
+BASE_PATH = Path(__file__).resolve().parent.parent
+if str(BASE_PATH) not in sys.path:
+    sys.path.insert(0, str(BASE_PATH))
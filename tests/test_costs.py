@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.costs import VARIANT, CostAttribution
+from services.synthetic import generate_production_data
+from services.validation import validate_production_data
+
+
+@pytest.fixture(scope="module")
+def clean():
+    return validate_production_data(generate_production_data(8_000, seed=6)).clean
+
+
+@pytest.fixture(scope="module")
+def costs(clean):
+    return CostAttribution(clean)
+
+
+def _direct(df: pd.DataFrame, by) -> pd.DataFrame:
+    """Referenz: Summen je Gruppe per groupby, Kennzahlen als Quotient der Summen."""
+    df = df.fillna({"Stueckzahl": 0, "Ausschuss": 0, "Materialkosten": 0, "Energieverbrauch_kWh": 0})
+    df = df.assign(Gutteile=df["Stueckzahl"] - df["Ausschuss"])
+    grouped = df.groupby(list(by), observed=True)[
+        ["Stueckzahl", "Ausschuss", "Gutteile", "Materialkosten", "Energieverbrauch_kWh"]
+    ].sum()
+    grouped["Materialkosten_pro_Gutteil"] = grouped["Materialkosten"] / grouped["Gutteile"]
+    return grouped
+
+
+@pytest.mark.parametrize("by, linie, jahr", [
+    (VARIANT, None, None),
+    (["Produktionslinie"], None, None),
+    (["Produkt", "Produktionslinie"], None, 2021),
+    (VARIANT, "Linie 2", None),
+    (["Produkt"], "Linie 1", 2022),
+])
+def test_ranking_matches_groupby(clean, costs, by, linie, jahr):
+    rows = pd.Series(True, index=clean.index)
+    if linie is not None:
+        rows &= clean["Produktionslinie"] == linie
+    if jahr is not None:
+        rows &= clean["Datum"].dt.year == jahr
+    selection = clean[rows]
+    expected = _direct(selection, by)
+    overall = selection["Materialkosten"].sum() / (selection["Stueckzahl"] - selection["Ausschuss"]).sum()
+
+    ranked = costs.ranking(by=by, linie=linie, jahr=jahr)
+    result = ranked.set_index(list(by)).reindex(expected.index)
+
+    assert len(ranked) == len(expected)
+    assert list(ranked["Rang"]) == list(range(1, len(ranked) + 1))
+    assert ranked["Materialkosten_pro_Gutteil"].is_monotonic_decreasing
+    for column in ["Stueckzahl", "Gutteile", "Materialkosten", "Materialkosten_pro_Gutteil"]:
+        np.testing.assert_allclose(result[column], expected[column])
+    np.testing.assert_allclose(
+        result["Index"], (expected["Materialkosten_pro_Gutteil"] / overall * 100).round(1)
+    )
+    share = expected["Materialkosten"] / expected["Materialkosten"].sum() * 100
+    np.testing.assert_allclose(result["Kostenanteil_%"], share.round(2))
+    # Anteile je Gruppierung summieren sich auf 100 % (bis auf Rundung je Zeile)
+    assert ranked["Kostenanteil_%"].sum() == pytest.approx(100, abs=0.005 * len(ranked) + 1e-9)
+
+
+def test_shares_refer_to_whole_selection_with_top_k(costs):
+    full = costs.ranking(by=VARIANT)
+    top = costs.ranking(by=VARIANT, k=3)
+
+    # Top-k zeigt die ersten Zeilen der vollständigen Rangliste, Anteile bleiben auf die Auswahl bezogen
+    pd.testing.assert_frame_equal(top, full.head(3))
+    assert top["Kostenanteil_%"].sum() < 100
+
+
+def test_view_rollups_match_groupby(clean, costs):
+    view = costs.view(by=["Produktionslinie", "Monat"]).set_index(["Produktionslinie", "Monat"])
+    monat = clean["Datum"].dt.strftime("%Y-%m").rename("Monat")
+    expected = _direct(clean.assign(Monat=monat), ["Produktionslinie", "Monat"])
+
+    np.testing.assert_allclose(view.loc[expected.index, "Materialkosten"], expected["Materialkosten"])
+    np.testing.assert_allclose(
+        view.loc[expected.index, "Materialkosten_pro_Gutteil"], expected["Materialkosten_pro_Gutteil"]
+    )
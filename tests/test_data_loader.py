@@ -0,0 +1,134 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.data_loader import (
+    SourceChangedError, clear_column_cache, load_production_data, pin_signatures
+)
+from services.partition_store import write_partitions
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    clear_column_cache()
+    yield
+    clear_column_cache()
+
+
+def _records(n: int = 600, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Datum": pd.to_datetime("2022-01-01") + pd.to_timedelta(rng.integers(0, 3 * 365, n), unit="D"),
+        "Auftragsnummer": np.arange(n),
+        "Produktionslinie": rng.choice(["Linie 1", "Linie 2", "Linie 3"], n),
+        "Schicht": rng.choice(["Früh", "Spät", "Nacht"], n),
+        "Stueckzahl": rng.integers(0, 400, n),
+    })
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "produktion.csv"
+    _records().to_csv(path, index=False)
+    return path
+
+
+@pytest.fixture
+def partition_root(tmp_path):
+    root = tmp_path / "partitioned"
+    write_partitions(_records(), root)
+    return root
+
+
+def _sorted(df: pd.DataFrame) -> pd.DataFrame:
+    # Partitionen kommen in Manifest-Reihenfolge, die Gesamtdatei in Dateireihenfolge
+    return df.sort_values("Auftragsnummer", ignore_index=True)
+
+
+def test_projection_returns_requested_columns(csv_path):
+    full = load_production_data(csv_path)
+    df = load_production_data(csv_path, columns=["Stueckzahl", "Datum"])
+
+    assert list(df.columns) == ["Stueckzahl", "Datum"]
+    pd.testing.assert_frame_equal(df, full[["Stueckzahl", "Datum"]])
+    assert pd.api.types.is_datetime64_any_dtype(df["Datum"])
+    # Textspalten mit wenigen Ausprägungen sind auf jedem Pfad kategorial
+    assert isinstance(load_production_data(csv_path, columns=["Schicht"])["Schicht"].dtype,
+                      pd.CategoricalDtype)
+
+
+@pytest.mark.parametrize("jahre, linien", [
+    ([2023], None),
+    (None, ["Linie 2"]),
+    ([2022, 2024], ["Linie 1", "Linie 3"]),
+    ([1999], None),
+    (None, []),
+])
+def test_pruning_equals_full_load_and_filter(csv_path, partition_root, jahre, linien):
+    columns = ["Auftragsnummer", "Datum", "Produktionslinie", "Stueckzahl"]
+    full = load_production_data(csv_path, columns=columns)
+    mask = pd.Series(True, index=full.index)
+    if jahre is not None:
+        mask &= full["Datum"].dt.year.isin(jahre)
+    if linien is not None:
+        mask &= full["Produktionslinie"].isin(linien)
+    expected = _sorted(full[mask])
+
+    # Partition Pruning (eigene Dateien je Jahr/Linie) und Filter im Speicher (eine Datei)
+    for source in (partition_root, csv_path):
+        df = load_production_data(source, jahre=jahre, linien=linien, columns=columns)
+        assert list(df.columns) == columns
+        pd.testing.assert_frame_equal(
+            _sorted(df), expected, check_dtype=False, check_categorical=False, check_index_type=False
+        )
+
+
+def test_empty_selection_keeps_header(partition_root):
+    df = load_production_data(partition_root, jahre=[1999])
+
+    assert df.empty
+    assert list(df.columns) == list(_records().columns)
+
+
+def test_cache_invalidated_when_file_changes(csv_path):
+    before = load_production_data(csv_path, columns=["Stueckzahl"])
+
+    stat = csv_path.stat()
+    _records(n=500, seed=1).to_csv(csv_path, index=False)
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    after = load_production_data(csv_path, columns=["Stueckzahl"])
+
+    assert len(before) == 600
+    assert len(after) == 500
+    pd.testing.assert_series_equal(after["Stueckzahl"], _records(n=500, seed=1)["Stueckzahl"])
+
+
+def test_pinned_scope_serves_cached_version(csv_path):
+    key = str(csv_path.resolve())
+    before = load_production_data(csv_path, columns=["Stueckzahl"])
+    stat = csv_path.stat()
+    signatures = {key: (stat.st_mtime_ns, stat.st_size)}
+
+    _records(n=500, seed=1).to_csv(csv_path, index=False)
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    # Bereits gecachte Spalten des festgehaltenen Stands bleiben lesbar
+    with pin_signatures(signatures):
+        pinned = load_production_data(csv_path, columns=["Stueckzahl"])
+    pd.testing.assert_frame_equal(pinned, before)
+
+
+def test_pinned_scope_raises_when_source_changed(csv_path):
+    key = str(csv_path.resolve())
+    load_production_data(csv_path, columns=["Stueckzahl"])
+    stat = csv_path.stat()
+    signatures = {key: (stat.st_mtime_ns, stat.st_size)}
+
+    _records(n=500, seed=1).to_csv(csv_path, index=False)
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    # Eine noch nicht gecachte Spalte müsste aus der neuen Datei gelesen werden
+    with pin_signatures(signatures), pytest.raises(SourceChangedError):
+        load_production_data(csv_path, columns=["Schicht"])
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.downtime import (
+    DEFAULT_THRESHOLD, MAD_SCALE, MAX_MINUTES, N_BINS, _bins, build_histograms, robust_stats
+)
+
+
+def _histogram(values):
+    return np.bincount(_bins(np.asarray(values, dtype="float64")), minlength=N_BINS)
+
+
+def _median_mad(values):
+    median = np.median(values)
+    return median, np.median(np.abs(np.asarray(values) - median))
+
+
+@pytest.fixture
+def records():
+    rng = np.random.default_rng(5)
+    n = 3_000
+    df = pd.DataFrame({
+        "Produktionslinie": rng.choice(["Linie 1", "Linie 2"], n),
+        "Schicht": rng.choice(["Früh", "Spät", "Nacht"], n),
+        "Fehlercode": rng.choice(["E1", "E2", None], n),
+        "Stillstandszeit_Min": rng.integers(0, 60, n).astype(float),
+    })
+    # Ausreißer, teils im Überlauf-Bin (> 480 Minuten)
+    outliers = rng.choice(n, 40, replace=False)
+    df.loc[outliers, "Stillstandszeit_Min"] = rng.choice([150, 300, 600, 1_200], 40)
+    # Gruppe mit MAD 0: mehr als die Hälfte der Werte identisch
+    group = df.index[(df["Produktionslinie"] == "Linie 2") & (df["Schicht"] == "Nacht")]
+    df.loc[group, "Stillstandszeit_Min"] = 20.0
+    df.loc[group[:3], "Stillstandszeit_Min"] = [0.0, 500.0, 900.0]
+    return df
+
+
+@pytest.mark.parametrize("values", [
+    [7],
+    [1, 2, 3, 4],
+    [0, 0, 5, 9, 9, 12],
+    [3, 3, 8, 10, 12, 600, 900],
+    [20, 20, 20, 20, 0, 1_000],
+    list(range(MAX_MINUTES + 1)),
+])
+def test_robust_stats_match_numpy(values):
+    assert robust_stats(_histogram(values)) == pytest.approx(_median_mad(values))
+
+
+def test_robust_stats_empty_histogram():
+    median, mad = robust_stats(np.zeros(N_BINS, dtype="int64"))
+    assert np.isnan(median) and np.isnan(mad)
+
+
+def test_stats_match_raw_values_per_group(records):
+    stats = build_histograms(records).stats(["Produktionslinie", "Schicht"])
+
+    for _, row in stats.iterrows():
+        values = records.loc[
+            (records["Produktionslinie"] == row["Produktionslinie"]) & (records["Schicht"] == row["Schicht"]),
+            "Stillstandszeit_Min"
+        ].to_numpy()
+        median, mad = _median_mad(values)
+        assert row["Anzahl"] == len(values)
+        assert (row["Median_Min"], row["MAD_Min"]) == pytest.approx((median, mad))
+        if mad > 0:
+            assert row["Schwelle_Min"] == pytest.approx(median + DEFAULT_THRESHOLD * mad / MAD_SCALE)
+        else:
+            assert np.isnan(row["Schwelle_Min"])
+
+
+def test_flag_matches_robust_z_on_raw_values(records):
+    by = ["Produktionslinie", "Schicht"]
+    flagged = build_histograms(records).flag(records, by)
+
+    # Referenz: robuster z-Wert je Datensatz aus np.median/MAD seiner Gruppe
+    grouped = records.groupby(by)["Stillstandszeit_Min"]
+    median = grouped.transform("median")
+    mad = grouped.transform(lambda x: np.median(np.abs(x - np.median(x))))
+    z = MAD_SCALE * (records["Stillstandszeit_Min"] - median) / mad.where(mad > 0)
+    expected = records[z > DEFAULT_THRESHOLD]
+
+    assert list(flagged.index) == list(expected.index)
+    np.testing.assert_allclose(flagged["z_robust"], z[expected.index].round(2))
+    # Überlauf-Werte werden mit ihrer tatsächlichen Dauer markiert
+    assert (flagged["Stillstandszeit_Min"] > MAX_MINUTES).any()
+    # Gruppe mit MAD 0: keine Schwelle, nichts markiert
+    zero_mad = (flagged["Produktionslinie"] == "Linie 2") & (flagged["Schicht"] == "Nacht")
+    assert not zero_mad.any()
+
+
+def test_histograms_are_additive(records):
+    whole = build_histograms(records)
+    parts = build_histograms(records.iloc[:1_000])
+    parts.update(records.iloc[1_000:])
+
+    assert len(parts) == len(whole) == len(records)
+    pd.testing.assert_frame_equal(parts.stats(["Produktionslinie"]), whole.stats(["Produktionslinie"]))
+    np.testing.assert_array_equal(parts.histogram(linie="Linie 1"), whole.histogram(linie="Linie 1"))
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from services.error_index import NO_ERROR, ErrorCodeIndex, intersect
+
+
+def _orders():
+    # Anzahl je Code: E1 = 6, E2 = 2, E3 = 1, E4 = 1, ohne Fehler = 2
+    codes = ["E1"] * 6 + ["E2"] * 2 + ["E3", "E4", NO_ERROR, None]
+    n = len(codes)
+    return pd.DataFrame({
+        "Datum": pd.to_datetime(["2022-05-01"] * 4 + ["2023-05-01"] * (n - 4)),
+        "Auftragsnummer": [f"A-{i}" for i in range(n)],
+        "Produktionslinie": ["Linie 1", "Linie 2"] * (n // 2),
+        "Schicht": ["Früh"] * n,
+        "Fehlercode": pd.Series(codes, dtype="category"),
+        "Ausschuss": np.arange(n, dtype=float),
+        "Stillstandszeit_Min": np.full(n, 10.0),
+    })
+
+
+def test_pareto_shares_and_abc_classes():
+    pareto = ErrorCodeIndex(_orders()).pareto("Anzahl")
+
+    assert pareto["Fehlercode"].tolist() == ["E1", "E2", "E3", "E4"]
+    assert pareto["Anzahl"].tolist() == [6, 2, 1, 1]
+    assert pareto["Anteil_%"].tolist() == [60.0, 20.0, 10.0, 10.0]
+    assert pareto["Kumuliert_%"].tolist() == [60.0, 80.0, 90.0, 100.0]
+    # Klasse nach dem kumulierten Anteil vor dem Code: E2 beginnt bei 60 % (A), E3 bei 80 % (B)
+    assert pareto["Klasse"].tolist() == ["A", "A", "B", "B"]
+
+
+def test_pareto_filters_match_pandas_and_include_no_error():
+    df = _orders()
+    index = ErrorCodeIndex(df)
+    pareto = index.pareto("Ausschuss", jahr=2023, linie="Linie 2", include_no_error=True)
+
+    selection = df[(df["Datum"].dt.year == 2023) & (df["Produktionslinie"] == "Linie 2")]
+    expected = (selection.assign(Fehlercode=selection["Fehlercode"].astype(object).fillna(NO_ERROR))
+                .groupby("Fehlercode")["Ausschuss"].sum().sort_values(ascending=False))
+    assert dict(zip(pareto["Fehlercode"], pareto["Ausschuss"])) == expected.to_dict()
+    assert pareto["Ausschuss"].is_monotonic_decreasing
+
+    orders = index.orders("E1", jahr=2023, linie="Linie 2")
+    assert orders["Auftragsnummer"].tolist() == ["A-5"]
+
+
+def test_intersect_of_sorted_postings():
+    result = intersect([np.array([1, 3, 5, 7]), np.array([3, 4, 5]), np.array([0, 3, 5, 9])])
+    assert result.tolist() == [3, 5]
+    assert intersect([np.array([1, 2]), np.array([], dtype="int64")]).size == 0
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.kpis import KPIS, RatioKpi, kpi_table, rollup, sum_table
+
+
+@pytest.fixture
+def records():
+    rng = np.random.default_rng(0)
+    n = 2_000
+    stueck = rng.integers(0, 400, n).astype(float)
+    df = pd.DataFrame({
+        "Jahr_Monat": rng.choice(["2023-11", "2023-12", "2024-01"], n),
+        "Produktionslinie": pd.Categorical(rng.choice(["Linie 1", "Linie 2", "Linie 3"], n)),
+        "Schicht": rng.choice(["Früh", "Spät", "Nacht"], n),
+        "Stueckzahl": stueck,
+        "Ausschuss": np.floor(stueck * rng.uniform(0, 0.1, n)),
+        "Energieverbrauch_kWh": rng.uniform(5, 50, n),
+        "Materialkosten": rng.uniform(100, 900, n),
+        "Stillstandszeit_Min": rng.uniform(0, 90, n),
+        "Betriebsstunden": rng.uniform(2, 8, n),
+    })
+    # Fehlende Messwerte zählen als 0, fehlende Schlüssel fallen weg
+    df.loc[3, "Ausschuss"] = np.nan
+    df.loc[7, "Schicht"] = None
+    return df
+
+
+def test_sum_table_matches_groupby(records):
+    by = ["Jahr_Monat", "Produktionslinie", "Schicht"]
+    table = sum_table(records, by, ["Datensaetze", "Stueckzahl", "Gutteile", "Planzeit_h"])
+
+    keyed = records.dropna(subset=by).fillna({"Ausschuss": 0})
+    expected = keyed.assign(
+        Gutteile=keyed["Stueckzahl"] - keyed["Ausschuss"],
+        Planzeit_h=keyed["Betriebsstunden"] + keyed["Stillstandszeit_Min"] / 60,
+    ).groupby(by, observed=True).agg(
+        Datensaetze=("Stueckzahl", "size"), Stueckzahl=("Stueckzahl", "sum"),
+        Gutteile=("Gutteile", "sum"), Planzeit_h=("Planzeit_h", "sum"),
+    ).reset_index()
+
+    assert table.attrs["sums"] == ["Datensaetze", "Stueckzahl", "Gutteile", "Planzeit_h"]
+    pd.testing.assert_frame_equal(table, expected, check_dtype=False, check_categorical=False)
+
+
+def test_rollup_is_ratio_of_sums(records):
+    table = sum_table(records, ["Jahr_Monat", "Produktionslinie", "Schicht"])
+    lines = rollup(table, ["Produktionslinie"], ["Ausschussquote_%", "Materialkosten_pro_Gutteil"])
+
+    keyed = records.dropna(subset=["Schicht"]).fillna({"Ausschuss": 0})
+    grouped = keyed.groupby("Produktionslinie", observed=True)
+    scrap = grouped["Ausschuss"].sum() / grouped["Stueckzahl"].sum() * 100
+    cost = grouped["Materialkosten"].sum() / (grouped["Stueckzahl"].sum() - grouped["Ausschuss"].sum())
+    np.testing.assert_allclose(lines["Ausschussquote_%"], scrap.to_numpy())
+    np.testing.assert_allclose(lines["Materialkosten_pro_Gutteil"], cost.to_numpy())
+
+    # Gesamt-Rollup entspricht der Tabelle direkt aus den Datensätzen
+    total = rollup(table, [], ["Verfuegbarkeit_%"])
+    direct = kpi_table(records.dropna(subset=["Schicht"]), [], ["Verfuegbarkeit_%"])
+    assert np.isclose(total["Verfuegbarkeit_%"].iloc[0], direct["Verfuegbarkeit_%"].iloc[0])
+
+
+def test_ratio_is_nan_for_zero_denominator():
+    assert np.isnan(RatioKpi("Ausschuss", "Stueckzahl").of(0, 0))
+    np.testing.assert_allclose(KPIS["kWh_pro_Stück"].of([10.0, 5.0], [4.0, 0.0]), [2.5, np.nan])
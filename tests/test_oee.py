@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.oee import IdealRates, compute_oee, oee_rollup, oee_sum_table, oee_totals
+
+
+@pytest.fixture
+def records():
+    rng = np.random.default_rng(3)
+    n = 1_500
+    stueck = rng.integers(0, 300, n).astype(float)
+    return pd.DataFrame({
+        "Datum": pd.to_datetime("2024-01-01") + pd.to_timedelta(rng.integers(0, 60, n), unit="D"),
+        "Produkt": rng.choice(["A", "B"], n),
+        "Modifikation": rng.choice(["X", "Y"], n),
+        "Produktionslinie": pd.Categorical(rng.choice(["Linie 1", "Linie 2", "Linie 3"], n)),
+        "Schicht": rng.choice(["Früh", "Spät", "Nacht"], n),
+        "Stueckzahl": stueck,
+        "Ausschuss": np.floor(stueck * rng.uniform(0, 0.1, n)),
+        "Stillstandszeit_Min": rng.uniform(0, 90, n),
+        "Betriebsstunden": rng.uniform(1, 8, n),
+    })
+
+
+def test_ideal_rates_are_p95_per_variant(records):
+    rates = IdealRates.from_history(records)
+
+    rate = records["Stueckzahl"] / records["Betriebsstunden"]
+    expected = rate.groupby([records["Produkt"], records["Modifikation"]]).quantile(0.95)
+    assert rates.rates == pytest.approx({k: v for k, v in expected.items()})
+    assert rates.default == pytest.approx(rate.quantile(0.95))
+
+
+def test_ideal_rates_ignore_zero_hours(records):
+    records.loc[:9, "Betriebsstunden"] = 0.0
+    rates = IdealRates.from_history(records)
+
+    valid = records.iloc[10:]
+    assert rates.default == pytest.approx((valid["Stueckzahl"] / valid["Betriebsstunden"]).quantile(0.95))
+
+
+def test_missing_variant_uses_default_rate(records):
+    rates = IdealRates(rates={("A", "X"): 50.0}, default=20.0)
+
+    expected = np.where((records["Produkt"] == "A") & (records["Modifikation"] == "X"), 50.0, 20.0)
+    np.testing.assert_array_equal(rates.for_rows(records), expected)
+
+
+def test_oee_is_ratio_of_sums(records):
+    rates = IdealRates(rates={("A", "X"): 40.0, ("A", "Y"): 45.0, ("B", "X"): 35.0}, default=30.0)
+    by = ["Produktionslinie", "Schicht"]
+    oee = compute_oee(records, rates, by=by)
+
+    # Handrechnung: Summen je Gruppe, danach Quotienten
+    soll = records["Betriebsstunden"] * rates.for_rows(records)
+    grouped = records.assign(
+        Planzeit_h=records["Betriebsstunden"] + records["Stillstandszeit_Min"] / 60,
+        Gutteile=records["Stueckzahl"] - records["Ausschuss"],
+        Soll_Stueckzahl=soll,
+    ).groupby(by, observed=True)[
+        ["Betriebsstunden", "Planzeit_h", "Stueckzahl", "Gutteile", "Soll_Stueckzahl"]
+    ].sum()
+    verfuegbarkeit = grouped["Betriebsstunden"] / grouped["Planzeit_h"]
+    leistung = grouped["Stueckzahl"] / grouped["Soll_Stueckzahl"]
+    qualitaet = grouped["Gutteile"] / grouped["Stueckzahl"]
+
+    np.testing.assert_allclose(oee["Verfuegbarkeit_%"], verfuegbarkeit.to_numpy() * 100)
+    np.testing.assert_allclose(oee["Leistung_%"], leistung.to_numpy() * 100)
+    np.testing.assert_allclose(oee["Qualitaet_%"], qualitaet.to_numpy() * 100)
+    np.testing.assert_allclose(oee["OEE_%"], (verfuegbarkeit * leistung * qualitaet).to_numpy() * 100)
+
+
+def test_rollup_of_sum_table_matches_direct_oee(records):
+    rates = IdealRates.from_history(records)
+    table = oee_sum_table(records, rates, ["Datum", "Produktionslinie", "Schicht"])
+
+    lines = oee_rollup(table, ["Produktionslinie"])
+    direct = compute_oee(records, rates, by=["Produktionslinie"])
+    np.testing.assert_allclose(lines["OEE_%"], direct["OEE_%"])
+
+    # Gefilterte Summentabelle = OEE der gefilterten Datensätze
+    selection = (table["Produktionslinie"] == "Linie 2") & table["Schicht"].isin(["Früh", "Nacht"])
+    rows = (records["Produktionslinie"] == "Linie 2") & records["Schicht"].isin(["Früh", "Nacht"])
+    expected = oee_totals(records[rows], rates)
+    result = oee_rollup(table[selection]).iloc[0]
+    for column in ["OEE_%", "Verfuegbarkeit_%", "Leistung_%", "Qualitaet_%"]:
+        assert result[column] == pytest.approx(expected[column])
+
+
+def test_zero_hour_group_has_no_ratio(records):
+    rates = IdealRates(default=30.0)
+    records.loc[records["Produktionslinie"] == "Linie 3", ["Betriebsstunden", "Stillstandszeit_Min",
+                                                           "Stueckzahl", "Ausschuss"]] = 0.0
+    oee = compute_oee(records, rates, by=["Produktionslinie"]).set_index("Produktionslinie")
+
+    # Nenner 0 ergibt NaN statt 0 % oder einer Division durch null
+    assert oee.loc["Linie 3", ["OEE_%", "Verfuegbarkeit_%", "Leistung_%", "Qualitaet_%"]].isna().all()
+    assert oee.loc[["Linie 1", "Linie 2"], "OEE_%"].notna().all()
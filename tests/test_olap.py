@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.olap import DEFAULT_GRAINS, MEASURES, RATIOS, ROWS, OlapCube
+from services.star_schema import build_star_schema
+from services.synthetic import generate_production_data
+from services.validation import validate_production_data
+
+
+@pytest.fixture(scope="module")
+def schema():
+    clean = validate_production_data(generate_production_data(5_000, seed=4)).clean
+    return build_star_schema(clean)
+
+
+@pytest.fixture(scope="module")
+def cube(schema):
+    return OlapCube.from_schema(schema)
+
+
+@pytest.fixture(scope="module")
+def facts(schema):
+    """Faktentabelle mit den Beschriftungen der Ebenen (JOIN auf die Dimensionen)."""
+    dim_datum, dim_produkt = schema.dim_datum, schema.dim_produkt
+    datum = dim_datum.assign(
+        Jahr=dim_datum["jahr"],
+        Monat=dim_datum["jahr"].astype(str) + "-" + dim_datum["monat"].astype(str).str.zfill(2),
+        Tag=dim_datum["Datum"].dt.date,
+    )
+    produkt = dim_produkt.assign(
+        Produkt=dim_produkt["Produkt"].astype(str) + " " + dim_produkt["Modifikation"].astype(str)
+    )
+    return (
+        schema.fact_produktion
+        .merge(datum[["datum_id", "Jahr", "Monat", "Tag"]], on="datum_id")
+        .merge(schema.dim_unternehmen, on="unternehmen_id")
+        .merge(schema.dim_linie, on="linie_id")
+        .merge(schema.dim_schicht, on="schicht_id")
+        .merge(produkt[["produkt_id", "Produkt"]], on="produkt_id")
+    )
+
+
+def _groupby(facts: pd.DataFrame, levels) -> pd.DataFrame:
+    """Referenz: Summen und Quoten direkt per groupby auf der Faktentabelle."""
+    grouped = facts.fillna({column: 0 for column in MEASURES}).groupby(list(levels), observed=True)
+    expected = grouped[list(MEASURES)].sum()
+    expected.insert(0, ROWS, grouped.size())
+    for alias, (numerator, denominator, scale) in RATIOS.items():
+        expected[alias] = expected[numerator] * scale / expected[denominator].replace(0, np.nan)
+    return expected.reset_index()
+
+
+def _assert_matches(result: pd.DataFrame, expected: pd.DataFrame, levels) -> None:
+    result = result.sort_values(list(levels), ignore_index=True)
+    expected = expected.sort_values(list(levels), ignore_index=True)
+    assert result[list(levels)].astype(str).equals(expected[list(levels)].astype(str))
+    np.testing.assert_array_equal(result[ROWS], expected[ROWS])
+    for column in MEASURES:
+        np.testing.assert_allclose(result[column], expected[column])
+    for column in RATIOS:
+        np.testing.assert_allclose(result[column], expected[column].round(3), atol=1e-3)
+
+
+def test_drill_down_and_roll_up_match_groupby(cube, facts):
+    view = cube.view().drill_down().drill_down()
+    assert view.levels == ("Unternehmen", "Produktionslinie")
+    _assert_matches(view.result(), _groupby(facts, view.levels), view.levels)
+
+    finer = view.drill_down("Schicht").drill_down("Monat")
+    _assert_matches(finer.result(), _groupby(facts, finer.levels), finer.levels)
+
+    rolled = finer.roll_up().roll_up("Produktionslinie")
+    assert rolled.levels == ("Unternehmen", "Schicht")
+    _assert_matches(rolled.result(), _groupby(facts, rolled.levels), rolled.levels)
+
+
+def test_slice_matches_filtered_groupby(cube, facts):
+    jahr = int(facts["Jahr"].min()) + 1
+    view = cube.view().drill_down("Produktionslinie").drill_down("Jahr").slice("Jahr", jahr)
+
+    assert view.levels == ("Produktionslinie",)
+    _assert_matches(view.result(), _groupby(facts[facts["Jahr"] == jahr], view.levels), view.levels)
+
+
+def test_dice_matches_filtered_groupby(cube, facts):
+    schichten = ["Früh", "Nacht"]
+    produkte = sorted(facts["Produkt"].unique())[:2]
+    view = cube.view().drill_down("Produktionslinie").dice(Schicht=schichten, Produkt=produkte)
+
+    rows = facts["Schicht"].isin(schichten) & facts["Produkt"].isin(produkte)
+    assert 0 < rows.sum() < len(facts)
+    _assert_matches(view.result(), _groupby(facts[rows], view.levels), view.levels)
+
+
+def test_pivot_matches_groupby(cube, facts):
+    pivot = cube.view().dice(Schicht=["Früh", "Spät"]).pivot(
+        "Produktionslinie", "Schicht", "Ausschussquote_%"
+    )
+
+    rows = facts["Schicht"].isin(["Früh", "Spät"])
+    expected = _groupby(facts[rows], ["Produktionslinie", "Schicht"]).pivot(
+        index="Produktionslinie", columns="Schicht", values="Ausschussquote_%"
+    )
+    np.testing.assert_allclose(pivot.to_numpy(), expected.round(3).to_numpy(), atol=1e-3)
+    assert list(pivot.index) == list(expected.index)
+    assert list(pivot.columns) == list(expected.columns)
+
+
+def test_unmaterialized_grain_falls_back_to_finer_cuboid(cube, facts):
+    # Schicht × Produkt × Jahr ist nicht materialisiert; Jahr lässt sich nur aus Tag ableiten
+    levels = ("Schicht", "Produkt", "Jahr")
+    view = cube.view().drill_down("Schicht").drill_down("Produkt").drill_down("Jahr")
+
+    assert view.source().grain == DEFAULT_GRAINS[0]
+    _assert_matches(view.result(), _groupby(facts, levels), levels)
+
+    # Filter auf Monat bei Gruppierung nach Linie: ebenfalls aus einem feineren Cuboid
+    monat = sorted(facts["Monat"].unique())[3]
+    filtered = cube.view().drill_down("Produktionslinie").dice(Monat=[monat])
+    assert "Monat" in filtered.source().grain
+    expected = _groupby(facts[facts["Monat"] == monat], filtered.levels)
+    _assert_matches(filtered.result(), expected, filtered.levels)
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+from services.period_compare import PeriodCube
+
+
+def _record(datum, schicht, linie, stueck, ausschuss):
+    return {
+        "Datum": pd.Timestamp(datum), "Schicht": schicht, "Produktionslinie": linie,
+        "Stueckzahl": float(stueck), "Ausschuss": float(ausschuss), "Energieverbrauch_kWh": 10.0,
+        "Betriebsstunden": 8.0, "Stillstandszeit_Min": 0.0,
+    }
+
+
+def _cube():
+    return PeriodCube(pd.DataFrame([
+        _record("2021-06-01", "Früh", "Linie 1", 100, 10),
+        _record("2022-11-30", "Spät", "Linie 1", 200, 4),
+        _record("2022-12-31", "Früh", "Linie 2", 300, 30),
+        _record("2022-12-31", "Nacht", "Linie 1", 100, 2),
+        _record("2023-01-01", "Früh", "Linie 1", 400, 8),
+        _record("2023-01-01", "Früh", "Linie 2", 100, 5),
+    ]))
+
+
+def test_year_over_year_uses_the_previous_calendar_year():
+    cube = _cube()
+    comparison = cube.year_over_year(2023)
+    assert comparison.label == "vs 2022"
+    assert comparison.current.output == 500
+    assert comparison.previous.output == 600
+    assert np.isclose(comparison.delta("avg_scrap_rate"), 13 / 500 * 100 - 36 / 600 * 100)
+
+    assert cube.year_over_year(2021).previous is None
+    assert cube.year_over_year(2023, linie="Linie 2").previous.output == 300
+
+
+def test_month_over_month_crosses_the_year_boundary():
+    cube = _cube()
+    comparison = cube.month_over_month(2023)
+    assert comparison.label == "Jan 2023 vs Dez 2022"
+    assert comparison.current.output == 500
+    assert comparison.previous.output == 400
+
+    # Letzter Monat der Spätschicht ist November; Vormonat im Kalender (Oktober) ohne Daten
+    late = cube.month_over_month(2022, schicht="Spät")
+    assert late.label == "Nov 2022 vs Okt 2022"
+    assert late.previous is None
+    assert cube.month_over_month(2024).previous is None
+
+
+def test_shift_over_shift_takes_the_last_shift_of_the_previous_year():
+    cube = _cube()
+    comparison = cube.shift_over_shift(2023, linie="Linie 1")
+    assert comparison.label == "Früh 01.01. vs Nacht 31.12."
+    assert comparison.current.output == 400
+    assert comparison.previous.output == 100
+
+    # Linie 2: vorherige Schicht mit Daten ist die Frühschicht am 31.12.
+    assert cube.compare("SoS", 2023, linie="Linie 2").previous.output == 300
+    assert cube.shift_over_shift(2021).previous is None
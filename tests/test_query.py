@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.query import Measure, QuerySpec, Ratio, execute
+from services.star_schema import build_star_schema
+from services.synthetic import generate_production_data
+from services.validation import validate_production_data
+
+
+@pytest.fixture(scope="module")
+def schema():
+    return build_star_schema(validate_production_data(generate_production_data(3000, seed=1)).clean)
+
+
+def _reference(schema, dimension, key, group_by, columns):
+    """Dasselbe Ergebnis per JOIN (merge) und GROUP BY in pandas."""
+    joined = schema.fact_produktion.merge(dimension, on=key)
+    return joined.groupby(group_by, observed=True).agg(**columns).reset_index()
+
+
+def test_execute_matches_merge_and_groupby(schema):
+    spec = QuerySpec(
+        dimension="dim_produktionslinie",
+        group_by=("Produktionslinie",),
+        measures=(
+            Measure("Stueckzahl", "stueckzahl"),
+            Measure("Ausschuss", "ausschuss"),
+            Measure("Auftragsnummer", "auftraege", "count"),
+            Measure("MaxTemperatur", "max_temp", "max"),
+            Measure("Betriebsstunden", "min_stunden", "min"),
+        ),
+        ratios=(Ratio("ausschussquote", "ausschuss", "stueckzahl"),),
+        order_by=(("Produktionslinie", True),),
+    )
+    result = execute(spec, schema)
+    expected = _reference(schema, schema.dim_linie, "linie_id", ["Produktionslinie"], {
+        "stueckzahl": ("Stueckzahl", "sum"),
+        "ausschuss": ("Ausschuss", "sum"),
+        "auftraege": ("Auftragsnummer", "count"),
+        "max_temp": ("MaxTemperatur", "max"),
+        "min_stunden": ("Betriebsstunden", "min"),
+    })
+    expected["ausschussquote"] = (expected["ausschuss"] * 100 / expected["stueckzahl"]).round(2)
+
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False, check_categorical=False)
+
+
+def test_execute_coarser_grouping_with_having_order_and_limit(schema):
+    spec = QuerySpec(
+        dimension="dim_datum",
+        group_by=("jahr", "monat"),
+        measures=(Measure("Stueckzahl", "stueckzahl"), Measure("Energieverbrauch_kWh", "energie")),
+        order_by=(("energie", False),),
+        limit=5,
+        having=(("stueckzahl", 3000),),
+    )
+    result = execute(spec, schema)
+    expected = _reference(schema, schema.dim_datum, "datum_id", ["jahr", "monat"], {
+        "stueckzahl": ("Stueckzahl", "sum"),
+        "energie": ("Energieverbrauch_kWh", "sum"),
+    })
+    expected = (expected[expected["stueckzahl"] >= 3000]
+                .sort_values("energie", ascending=False).head(5).reset_index(drop=True))
+
+    assert len(result) == 5
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+    assert np.isclose(result["energie"].iloc[0], expected["energie"].max())
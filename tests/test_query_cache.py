@@ -0,0 +1,58 @@
+import pandas as pd
+
+from services import query_cache
+from services.query_cache import QueryCache, normalize_query, query_key
+
+
+def _frame(rows=10):
+    return pd.DataFrame({"wert": range(rows)})
+
+
+def _size(frame):
+    return int(frame.memory_usage(index=True, deep=True).sum())
+
+
+def test_lru_eviction_by_entry_count():
+    cache = QueryCache(max_entries=2)
+    cache.put("a", _frame())
+    cache.put("b", _frame())
+    assert cache.get("a") is not None  # a ist jetzt zuletzt benutzt
+    cache.put("c", _frame())
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_lru_eviction_by_bytes():
+    small, large = _frame(10), _frame(1000)
+    cache = QueryCache(max_entries=10, max_bytes=_size(large) + _size(small))
+    cache.put("small", small)
+    cache.put("large", large)
+    assert cache.size_bytes == _size(small) + _size(large)
+
+    cache.put("small2", _frame(10))
+    assert cache.get("small") is None
+    assert cache.size_bytes == _size(large) + _size(small)
+
+    # Ein Eintrag größer als das Budget verdrängt alles, auch sich selbst
+    cache.put("huge", _frame(100_000))
+    assert len(cache) == 0 and cache.size_bytes == 0
+
+
+def test_keys_ignore_formatting_but_not_literals_or_dataset():
+    query = "SELECT Linie,\n  SUM(x) -- Summe\nFROM f WHERE s = 'Früh';"
+    assert normalize_query(query) == "select linie, sum(x) from f where s = 'Früh'"
+    assert query_key(query, "v1") == query_key("select linie, sum(x) from f where s = 'Früh'", "v1")
+    assert query_key(query, "v1") != query_key(query.replace("'Früh'", "'früh'"), "v1")
+    assert query_key(query, "v1") != query_key(query, "v2")
+
+
+def test_cache_format_invalidates_entries_on_disk(tmp_path, monkeypatch):
+    query = "select linie, sum(x) from f"
+    QueryCache(directory=tmp_path).cached("test", query, "v1", lambda: _frame(3))
+
+    # Neuer Prozess mit geänderter Abfrage-Ausführung: alte Datei wird nicht mehr getroffen
+    monkeypatch.setattr(query_cache, "CACHE_FORMAT", query_cache.CACHE_FORMAT + 1)
+    result = QueryCache(directory=tmp_path).cached("test", query, "v1", lambda: _frame(5))
+    assert len(result) == 5
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.ranking import top_k
+
+
+def _table():
+    return pd.DataFrame({
+        "produkt": list("ABCDEFG"),
+        "quote": [5.0, 9.0, 9.0, np.nan, 1.0, 9.0, 3.0],
+        "stueckzahl": [100, 10, 500, 800, 300, 200, 50],
+    })
+
+
+@pytest.mark.parametrize("k", [None, 1, 2, 3, 5, 7, 10])
+@pytest.mark.parametrize("ascending", [False, True])
+def test_matches_stable_sort_including_ties_and_missing_values(k, ascending):
+    df = _table()
+    expected = df.sort_values("quote", ascending=ascending, kind="stable", na_position="last")
+    expected = expected if k is None else expected.head(k)
+    pd.testing.assert_frame_equal(top_k(df, "quote", k=k, ascending=ascending), expected)
+
+
+def test_ties_at_the_cutoff_keep_the_earlier_rows():
+    # B, C und F teilen sich Platz 1; bei k = 2 bleiben die beiden ersten Zeilen
+    assert top_k(_table(), "quote", k=2)["produkt"].tolist() == ["B", "C"]
+
+
+def test_min_volume_filters_before_ranking():
+    result = top_k(_table(), "quote", k=3, min_volume=150, volume_column="stueckzahl")
+    assert result["produkt"].tolist() == ["C", "F", "E"]
+    assert result.index.tolist() == [2, 5, 4]
+
+    assert top_k(_table(), "quote", k=0).empty
+    with pytest.raises(ValueError):
+        top_k(_table(), "quote", min_volume=100)
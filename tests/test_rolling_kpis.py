@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+from services.rolling_kpis import SHIFTS, WINDOWS, RollingKpis, shift_slots
+
+
+def _records(n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Datum": pd.Timestamp("2023-12-01") + pd.to_timedelta(rng.integers(0, 60, n), unit="D"),
+        "Schicht": rng.choice(SHIFTS, n),
+        "Produktionslinie": rng.choice(["Linie 1", "Linie 2"], n),
+        "Stueckzahl": rng.integers(50, 500, n).astype(float),
+        "Ausschuss": rng.integers(0, 20, n).astype(float),
+        "Energieverbrauch_kWh": rng.uniform(10, 100, n),
+        "Betriebsstunden": rng.uniform(4, 8, n),
+        "Stillstandszeit_Min": rng.uniform(0, 60, n),
+    })
+
+
+def _expected(df, head, size, linie="All"):
+    slots = shift_slots(df)
+    mask = (slots > head - size) & (slots <= head)
+    if linie != "All":
+        mask &= df["Produktionslinie"] == linie
+    return df[mask]
+
+
+def test_windows_match_brute_force_after_incremental_updates():
+    df = _records()
+    rolling = RollingKpis()
+    # In drei Batches einspielen: ältere Slots fallen beim Vorrücken heraus
+    order = df.sort_values("Datum")
+    for start in range(0, len(order), 200):
+        rolling.update(order.iloc[start:start + 200])
+
+    for name, size in WINDOWS.items():
+        for linie in ("All", "Linie 2"):
+            expected = _expected(df, rolling.head, size, linie)
+            sums = rolling.window(name, linie)
+            assert sums.rows == len(expected)
+            assert np.isclose(sums.output, expected["Stueckzahl"].sum())
+            assert np.isclose(sums.avg_scrap_rate,
+                              expected["Ausschuss"].sum() / expected["Stueckzahl"].sum() * 100)
+
+
+def test_old_records_are_dropped_and_gaps_reset_windows():
+    df = _records()
+    rolling = RollingKpis()
+    rolling.update(df)
+    assert rolling.dropped == int((shift_slots(df) <= rolling.head - rolling.size).sum())
+
+    # Ein Datensatz weit nach allen Fenstern: alle bisherigen Summen verfallen
+    later = df.head(1).assign(Datum=pd.Timestamp("2024-12-01"), Schicht="Früh")
+    rolling.update(later)
+    assert rolling.window("30 Tage").rows == 1
+    assert rolling.window("Letzte Schicht").output == later["Stueckzahl"].iloc[0]
+
+    # Ein verspäteter Datensatz außerhalb des größten Fensters zählt nur als dropped
+    dropped = rolling.dropped
+    rolling.update(df.head(1))
+    assert rolling.dropped == dropped + 1
+    assert rolling.window("30 Tage").rows == 1
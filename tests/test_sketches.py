@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from services.sketches import HyperLogLog, QuantileSketch, SketchCube
+from services.star_schema import build_star_schema
+from services.synthetic import generate_production_data
+from services.validation import validate_production_data
+
+
+def test_hyperloglog_error_and_merge():
+    values = [f"A-{i}" for i in range(50_000)]
+    sketch = HyperLogLog(precision=12)
+    sketch.add(values)
+    # Standardfehler 1.04 / sqrt(4096) ≈ 1.6 %; Schranke 4 Standardfehler
+    assert abs(sketch.estimate() - 50_000) / 50_000 < 4 * 1.04 / 64
+
+    left, right = HyperLogLog(12), HyperLogLog(12)
+    left.add(values[:30_000])
+    right.add(values[20_000:])
+    left.merge(right)
+    np.testing.assert_array_equal(left.registers, sketch.registers)
+
+    small = HyperLogLog(12)
+    small.add(["x", "y", "z", "x"])
+    assert round(small.estimate()) == 3
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_quantile_sketch_relative_error_bound(seed):
+    rng = np.random.default_rng(seed)
+    values = np.concatenate([rng.lognormal(2, 1.5, 5_000), np.zeros(100)])
+    left, right = QuantileSketch(0.01), QuantileSketch(0.01)
+    left.add(values[:2_000])
+    right.add(values[2_000:])
+    left.merge(right)
+
+    for q in (0.0, 0.01, 0.25, 0.5, 0.9, 0.95, 0.99, 1.0):
+        exact = np.quantile(values, q)
+        estimate = left.quantile(q)
+        assert abs(estimate - exact) <= 0.01 * exact + 1e-12, q
+
+
+def test_sketch_cube_rollups_stay_within_bounds():
+    clean = validate_production_data(generate_production_data(20_000, seed=2)).clean
+    cube = SketchCube(build_star_schema(clean))
+
+    distinct = cube.distinct_count("Auftragsnummer", by=["Produktionslinie"])
+    quantiles = cube.quantile("Stillstandszeit_Min", (0.5, 0.95), by=["Produktionslinie"])
+    result = distinct.merge(quantiles, on="Produktionslinie")
+    for _, row in result.iterrows():
+        rows = clean[clean["Produktionslinie"] == row["Produktionslinie"]]
+        exact = rows["Auftragsnummer"].nunique()
+        assert abs(row["Auftragsnummer_distinct"] - exact) / exact < 4 * 1.04 / 64
+        for q in (0.5, 0.95):
+            exact = np.quantile(rows["Stillstandszeit_Min"], q)
+            assert abs(row[f"Stillstandszeit_Min_p{round(q * 100)}"] - exact) <= 0.01 * exact
+
+    total = cube.distinct_count("Auftragsnummer")["Auftragsnummer_distinct"].iloc[0]
+    assert abs(total - clean["Auftragsnummer"].nunique()) / clean["Auftragsnummer"].nunique() < 4 * 1.04 / 64
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+from services.validation import (
+    DEFAULT_QUARANTINE, DUPLICATE_ORDER, MASK_COL, NEGATIVE_VALUE, SCRAP_EXCEEDS_OUTPUT,
+    TEMP_OUT_OF_RANGE, TYPE_ERROR, ZERO_OUTPUT, describe_mask, validate_production_data
+)
+
+
+def _rows():
+    return pd.DataFrame({
+        "Datum": ["2023-01-02", "2023-01-02", "kein Datum", "2023-01-03", "2023-01-04", "2023-01-05"],
+        "Auftragsnummer": ["A-1", "A-2", "A-3", "A-1", "A-5", "A-6"],
+        "Produktionslinie": ["Linie 1"] * 6,
+        "Schicht": ["Früh"] * 6,
+        "Stueckzahl": [100, 50, 10, 0, 20, 30],
+        "Ausschuss": [5, 60, 1, 0, -1, 2],
+        "MaxTemperatur": [80.0, 80.0, 80.0, 80.0, 80.0, 70.0],
+        "Durchschnittstemperatur": [60.0, 60.0, 60.0, 60.0, 60.0, 75.0],
+    })
+
+
+def test_masks_flag_each_rule_per_row():
+    result = validate_production_data(_rows())
+
+    assert result.masks.tolist() == [
+        0,
+        SCRAP_EXCEEDS_OUTPUT,
+        TYPE_ERROR,
+        DUPLICATE_ORDER | ZERO_OUTPUT,
+        NEGATIVE_VALUE,
+        TEMP_OUT_OF_RANGE,
+    ]
+    counts = dict(zip(result.counts["Regel"], result.counts["Anzahl"]))
+    assert counts[describe_mask(ZERO_OUTPUT)] == 1
+    assert describe_mask(DUPLICATE_ORDER | ZERO_OUTPUT) == "Doppelte Auftragsnummer, Stückzahl = 0"
+
+
+def test_default_quarantine_keeps_reported_only_rules():
+    result = validate_production_data(_rows())
+
+    # Duplikate und Stückzahl 0 werden nur gemeldet, nicht aussortiert
+    assert result.clean["Auftragsnummer"].tolist() == ["A-1", "A-1"]
+    assert result.quarantine["Auftragsnummer"].tolist() == ["A-2", "A-3", "A-5", "A-6"]
+    assert (result.quarantine[MASK_COL] & DEFAULT_QUARANTINE != 0).all()
+    assert len(result.clean) + result.quarantined_rows == len(_rows())
+    assert pd.api.types.is_datetime64_any_dtype(result.clean["Datum"])
+
+
+def test_custom_quarantine_rules_and_projection():
+    result = validate_production_data(_rows(), quarantine_rules=DUPLICATE_ORDER)
+    assert result.quarantine["Auftragsnummer"].tolist() == ["A-1"]
+
+    # Regeln für fehlende Spalten entfallen (Column Projection)
+    projected = validate_production_data(_rows()[["Datum", "Stueckzahl"]])
+    assert np.array_equal(projected.masks, [0, 0, TYPE_ERROR, ZERO_OUTPUT, 0, 0])